@@ -0,0 +1,267 @@
+"""
+HTTP load test for the tenant-prospectus routes.
+
+Boots `src.main:app` under uvicorn against local stand-ins (a throwaway SQLite
+or Postgres database, fakeredis or a local Redis, an in-process SMTP sink),
+drives every route in `src/app/routes/tenants.py` from concurrent virtual users
+and reports throughput and p50/p95/p99 latency per endpoint as JSON.
+
+Usage:
+    python -m benchmarks.http_load run --concurrency 16 --duration 30 --output current.json
+    python -m benchmarks.http_load run --baseline benchmarks/baseline.json
+    python -m benchmarks.http_load compare current.json benchmarks/baseline.json --tolerance 0.15
+
+`run --baseline` and `compare` exit with status 1 when a regression is flagged.
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import logging
+import argparse
+import platform
+import threading
+import contextlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from benchmarks import standins
+
+API = "/api/v1/tenant-prospectus"
+
+class Recorder:
+    """Collects latency samples and status codes per endpoint, thread-safely."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, status: int, seconds: float):
+        with self._lock:
+            self.samples[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = math.ceil(q / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+def timed(http: requests.Session, recorder: Recorder, endpoint: str, method: str, url: str, **kwargs) -> requests.Response:
+    started = time.perf_counter()
+    response = http.request(method, url, **kwargs)
+    recorder.record(endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+def scenario(http: requests.Session, base_url: str, recorder: Recorder):
+    """One onboarding journey touching every tenant-prospectus route."""
+    suffix = uuid.uuid4().hex[:10]
+    payload = {
+        "title": f"Bench {suffix}",
+        "slug": f"bench-{suffix}",
+        "subscription": "TRAIL",
+        "requester_first_name": "Load",
+        "requester_last_name": "Test",
+        "requester_email": f"bench-{suffix}@example.com",
+        "requester_phone_number_country_code": "+1",
+        "requester_phone_number": "5555550100",
+        "requester_designation": "Engineer",
+    }
+
+    created = timed(http, recorder, f"POST {API}", "POST", f"{base_url}{API}", json=payload)
+    timed(http, recorder, f"GET {API}", "GET", f"{base_url}{API}", params={"page": 1, "limit": 10})
+    if created.status_code != 201:
+        return
+
+    id = created.json()["id"]
+    timed(http, recorder, f"GET {API}/{{id}}", "GET", f"{base_url}{API}/{id}")
+    activation = timed(http, recorder, f"GET {API}/{{id}}/identity-activation", "GET", f"{base_url}{API}/{id}/identity-activation")
+    timed(http, recorder, f"PUT {API}/{{id}}/promote-status", "PUT", f"{base_url}{API}/{id}/promote-status")
+
+    key = "invalid"
+    if activation.status_code == 200:
+        key = urlparse(activation.json()["activation_link"]).path.rsplit("/", 1)[-1]
+    timed(http, recorder, f"GET {API}/{{id}}/identity-verification/{{key}}", "GET", f"{base_url}{API}/{id}/identity-verification/{key}")
+
+def drive(base_url: str, concurrency: int, duration: float, recorder: Recorder) -> float:
+    """Runs scenarios from `concurrency` workers until `duration` seconds elapse; returns the wall time."""
+    deadline = time.monotonic() + duration
+
+    def worker():
+        with requests.Session() as http:
+            while time.monotonic() < deadline:
+                try:
+                    scenario(http, base_url, recorder)
+                except requests.RequestException as e:
+                    recorder.record("transport-error", 0, 0.0)
+                    logging.getLogger(__name__).debug("Request failed: %s", e)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return time.perf_counter() - started
+
+def summarize(recorder: Recorder, elapsed: float, settings: Dict) -> Dict:
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        statuses = recorder.statuses[endpoint]
+        endpoints[endpoint] = {
+            "requests": len(ordered),
+            "errors": sum(count for code, count in statuses.items() if code == 0 or code >= 500),
+            "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+            "throughput_rps": round(len(ordered) / elapsed, 2),
+            "latency_ms": {
+                "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50": round(percentile(ordered, 50) * 1000, 3),
+                "p95": round(percentile(ordered, 95) * 1000, 3),
+                "p99": round(percentile(ordered, 99) * 1000, 3),
+                "max": round(ordered[-1] * 1000, 3),
+            },
+        }
+
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        "benchmark": "http_load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "settings": settings,
+        "elapsed_seconds": round(elapsed, 3),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Flags endpoints whose p95/p99 latency grew, or whose throughput dropped, by more than `tolerance`.
+
+    Returns:
+        List[Dict]: One entry per regressed metric.
+    """
+    regressions = []
+    for endpoint, base in baseline.get("endpoints", {}).items():
+        now = current.get("endpoints", {}).get(endpoint)
+        if now is None:
+            regressions.append({"endpoint": endpoint, "metric": "missing", "baseline": None, "current": None})
+            continue
+
+        for metric in ("p95", "p99"):
+            before, after = base["latency_ms"][metric], now["latency_ms"][metric]
+            if before and after > before * (1 + tolerance):
+                regressions.append({"endpoint": endpoint, "metric": f"latency_ms.{metric}", "baseline": before, "current": after,
+                                    "change": round(after / before - 1, 3)})
+
+        before, after = base["throughput_rps"], now["throughput_rps"]
+        if before and after < before * (1 - tolerance):
+            regressions.append({"endpoint": endpoint, "metric": "throughput_rps", "baseline": before, "current": after,
+                                "change": round(after / before - 1, 3)})
+    return regressions
+
+def boot_application(args) -> tuple:
+    """Starts the stand-ins and uvicorn in-process; returns (base_url, server, smtp)."""
+    smtp = standins.FakeSmtpServer().start()
+    standins.configure_environment(args.database_url, smtp.port)
+
+    # Import only after the environment points at the stand-ins
+    import uvicorn
+    standins.install_redis(args.redis_url)
+    from src.main import app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    port = standins.free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    threading.Thread(target=server.run, name="uvicorn", daemon=True).start()
+
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("The application did not start within 30 seconds.")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server, smtp
+
+def write_report(report: Dict, output: Optional[str]):
+    encoded = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(encoded + "\n")
+    else:
+        print(encoded)
+
+def run(args) -> int:
+    server = smtp = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        base_url, server, smtp = boot_application(args)
+
+    recorder = Recorder()
+    # The application still prints to stdout on some paths; keep the JSON report clean
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if args.warmup > 0:
+            drive(base_url, args.concurrency, args.warmup, Recorder())
+        elapsed = drive(base_url, args.concurrency, args.duration, recorder)
+
+    settings = {"concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+                "target": args.url or "in-process", "database": "external" if args.database_url else "sqlite",
+                "redis": "external" if args.redis_url else "fakeredis"}
+    report = summarize(recorder, elapsed, settings)
+    if smtp is not None:
+        report["emails_delivered"] = smtp.delivered
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            report["regressions"] = compare(report, json.load(file), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    write_report(report, args.output)
+
+    if server is not None:
+        server.should_exit = True
+    if smtp is not None:
+        smtp.stop()
+    return exit_code
+
+def compare_files(args) -> int:
+    with open(args.current, encoding="utf-8") as current, open(args.baseline, encoding="utf-8") as baseline:
+        regressions = compare(json.load(current), json.load(baseline), args.tolerance)
+    print(json.dumps({"regressions": regressions}, indent=2))
+    return 1 if regressions else 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Boot the application and drive load against it.")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent virtual users.")
+    run_parser.add_argument("--duration", type=float, default=20.0, help="Measured run length in seconds.")
+    run_parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured warm-up length in seconds.")
+    run_parser.add_argument("--url", help="Drive an already running server instead of booting one in-process.")
+    run_parser.add_argument("--database-url", help="Throwaway database URL; defaults to a temporary SQLite file.")
+    run_parser.add_argument("--redis-url", help="Local Redis URL; defaults to fakeredis.")
+    run_parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    run_parser.add_argument("--baseline", help="Stored report to compare against.")
+    run_parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (0.10 = 10%%).")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two stored reports.")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10)
+    compare_parser.set_defaults(handler=compare_files)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Import-time budget check for `src.main`.
+
+Imports the application in a fresh interpreter with `-X importtime` while every
+outbound socket connection is refused, so the check fails both when importing
+opens a network connection and when it exceeds the time budget.
+
+The same check runs in the test suite (`tests/test_import_time.py`).
+
+Usage:
+    python -m benchmarks.import_time --budget-ms 2000
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import List, Optional
+
+# Refuse outbound connections, then import the application
+BOOTSTRAP = """
+import socket
+def _refuse(self, address):
+    raise RuntimeError("Network I/O during import: connect(%r)" % (address,))
+socket.socket.connect = _refuse
+socket.socket.connect_ex = _refuse
+import {module}
+"""
+
+# Cumulative import time allowed for `src.main`, in milliseconds
+BUDGET_MS = 2000.0
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def measure(module: str, runs: int) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best_us, slowest = None, []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOTSTRAP.format(module=module)],
+            cwd=root, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if "Error" in line and not line.startswith("import time:")]
+            raise RuntimeError(errors[-1].strip() if errors else "import failed")
+
+        entries = [(int(cumulative), name) for _, cumulative, _, name in
+                   (match.groups() for match in map(IMPORTTIME_LINE.match, result.stderr.splitlines()) if match)]
+        total = next(cumulative for cumulative, name in entries if name == module)
+        if best_us is None or total < best_us:
+            best_us = total
+            slowest = sorted(entries, reverse=True)[:10]
+
+    return {"module": module, "import_ms": round(best_us / 1000, 1),
+            "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in slowest]}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.main", help="Module to import.")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="Maximum cumulative import time.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to try; the best run counts.")
+    args = parser.parse_args(argv)
+
+    try:
+        report = measure(args.module, args.runs)
+    except RuntimeError as e:
+        print(json.dumps({"module": args.module, "passed": False, "error": str(e)}, indent=2))
+        return 1
+
+    report["budget_ms"] = args.budget_ms
+    report["passed"] = report["import_ms"] <= args.budget_ms
+    print(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
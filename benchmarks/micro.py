@@ -0,0 +1,197 @@
+"""
+Micro-benchmarks for per-call hot paths. No network service is needed: the
+database settings point at a temporary SQLite file and nothing is sent.
+
+Each benchmark reports throughput (ops/sec), mean time per call and, measured
+in a separate tracemalloc pass, the peak bytes allocated during one call and
+the memory blocks still held per call afterwards. The `encoding.*` cases compare
+JSON and MessagePack responses; their body sizes are reported under `payload_bytes`.
+
+Usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter hmac --min-time 1.0 --output micro.json
+"""
+import sys
+import json
+import time
+import uuid
+import argparse
+import platform
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import standins
+
+def run_coroutine(coroutine):
+    """Drives a coroutine that never suspends to completion without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("Benchmarked coroutine suspended; it needs an event loop.")
+
+def measure(func: Callable[[], object], min_time: float, alloc_samples: int) -> Dict:
+    # Calibrate a batch size that takes roughly 10 ms
+    batch = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(batch):
+            func()
+        if time.perf_counter() - started >= 0.01:
+            break
+        batch *= 2
+
+    # Timed runs
+    calls, elapsed = 0, 0.0
+    while elapsed < min_time:
+        started = time.perf_counter()
+        for _ in range(batch):
+            func()
+        elapsed += time.perf_counter() - started
+        calls += batch
+
+    # Allocation pass, kept apart because tracemalloc slows every allocation
+    tracemalloc.start()
+    peak = 0
+    baseline_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    for _ in range(alloc_samples):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        func()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    retained_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename")) - baseline_blocks
+    tracemalloc.stop()
+
+    return {
+        "calls": calls,
+        "ops_per_sec": round(calls / elapsed, 1),
+        "mean_us": round(elapsed / calls * 1_000_000, 3),
+        "alloc_peak_bytes_per_call": peak,
+        "alloc_retained_blocks_per_call": round(retained_blocks / alloc_samples, 2),
+    }
+
+def prospectus_rows(count: int) -> List:
+    """Builds `count` unsaved prospectus, importing the model only once the environment is configured."""
+    from src.app.model.Prospectus import Prospectus, ProspectusStages
+    return [
+        Prospectus(id=uuid.uuid4(), title=f"Tenant {i}", slug=f"tenant-{i}", subscription="TRAIL",
+                   status=ProspectusStages.INIT_TENANT_ADMIN_EMAIL_ACTIVATION.value)
+        for i in range(count)
+    ]
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    """Imports the application helpers (after the environment is configured) and builds the cases."""
+    from fastapi import BackgroundTasks
+    from src.app.schema.Prospectus import OnboardingNewProspectus, OnboardingNewProspectusResponse
+    from src.app.utils.HMAC import HmacAuthenticator
+    from src.app.utils.Mailer import EmailClient, EmailTemplates, EmailSender
+
+    id = uuid.uuid4()
+    email, slug = "requester@example.com", "acme-labs"
+    authenticator = HmacAuthenticator()
+    token = run_coroutine(authenticator.generate_token(id=id, email=email, slug=slug))
+    link = f"https://onboarding.example.com/auth/identity-verification/{token}?utm_source=tp.iv&utm_scope=email&utm_id={id}"
+
+    def render_template():
+        template = EmailTemplates.load("Identity_Activation")
+        return template.render(LINK=link, EMAIL=email, NAME="Ada Lovelace")
+
+    body = render_template()
+    client = EmailClient()
+
+    def build_mime():
+        # Scheduling on BackgroundTasks builds the message without dispatching it
+        return run_coroutine(client.notify(
+            subject="Let's Confirm & Connect", sender=EmailSender.NoReply, recipient=email,
+            message=body, background_tasks=BackgroundTasks(),
+        ))
+
+    payload = {
+        "title": "Acme Labs", "slug": slug, "subscription": "TRAIL",
+        "requester_first_name": "Ada", "requester_last_name": "Lovelace", "requester_email": email,
+        "requester_phone_number_country_code": "+44", "requester_phone_number": "2079460000",
+        "requester_designation": "Founder",
+    }
+
+    benchmarks = {
+        "hmac.generate_token": lambda: run_coroutine(authenticator.generate_token(id=id, email=email, slug=slug)),
+        "hmac.verify_token": lambda: run_coroutine(authenticator.verify_token(token)),
+        "mailer.template_load_and_render": render_template,
+        "mailer.notify_mime_construction": build_mime,
+        "schema.onboarding_new_prospectus_validate": lambda: OnboardingNewProspectus.model_validate(payload),
+    }
+    for count in (10, 50, 100):
+        rows = prospectus_rows(count)
+        benchmarks[f"schema.response_model_validate_x{count}"] = (
+            lambda rows=rows: [OnboardingNewProspectusResponse.model_validate(row) for row in rows]
+        )
+    benchmarks.update(encoding_benchmarks())
+    return benchmarks
+
+def encoding_cases() -> Dict[int, List]:
+    from src.app.schema.Prospectus import OnboardingNewProspectusResponse
+    return {
+        count: [OnboardingNewProspectusResponse.model_validate(row) for row in prospectus_rows(count)]
+        for count in (1, 100)
+    }
+
+def encoding_benchmarks() -> Dict[str, Callable[[], object]]:
+    """Response encoding as the routes do it: JSON through `jsonable_encoder`, MessagePack from the models."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from src.app.utils.ContentNegotiation import MsgPackResponse, unpack
+
+    benchmarks = {}
+    for count, models in encoding_cases().items():
+        json_body = JSONResponse(jsonable_encoder(models)).body
+        msgpack_body = MsgPackResponse(models).body
+        benchmarks[f"encoding.json_encode_x{count}"] = lambda models=models: JSONResponse(jsonable_encoder(models))
+        benchmarks[f"encoding.msgpack_encode_x{count}"] = lambda models=models: MsgPackResponse(models)
+        benchmarks[f"encoding.json_decode_x{count}"] = lambda body=json_body: json.loads(body)
+        benchmarks[f"encoding.msgpack_decode_x{count}"] = lambda body=msgpack_body: unpack(body)
+    return benchmarks
+
+def payload_sizes() -> Dict[str, int]:
+    """Body size of the same response in each encoding."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from src.app.utils.ContentNegotiation import MsgPackResponse
+
+    sizes = {}
+    for count, models in encoding_cases().items():
+        sizes[f"json_x{count}"] = len(JSONResponse(jsonable_encoder(models)).body)
+        sizes[f"msgpack_x{count}"] = len(MsgPackResponse(models).body)
+    return sizes
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text.")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum timed seconds per benchmark.")
+    parser.add_argument("--alloc-samples", type=int, default=200, help="Calls measured under tracemalloc.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args(argv)
+
+    standins.configure_environment()
+    results = {
+        name: measure(func, args.min_time, args.alloc_samples)
+        for name, func in build_benchmarks().items()
+        if args.filter in name
+    }
+
+    report = {
+        "benchmark": "micro",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "results": results,
+        "payload_bytes": payload_sizes(),
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(encoded + "\n")
+    else:
+        print(encoded)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Local stand-ins for the external services the application talks to, so
+benchmarks can boot `src.main:app` without Postgres, Redis or an SMTP provider.
+
+`configure_environment` must run before anything under `src` is imported,
+because the settings and the engine are built at import time.
+"""
+import os
+import socket
+import tempfile
+import threading
+import socketserver
+from typing import Optional
+
+def configure_environment(database_url: Optional[str] = None, smtp_port: Optional[int] = None) -> str:
+    """
+    Points the application settings at local stand-ins.
+
+    Args:
+        database_url (Optional[str]): A throwaway database; defaults to a temporary SQLite file.
+        smtp_port (Optional[int]): The port of the fake SMTP server, if one is running.
+
+    Returns:
+        str: The database URL in use.
+    """
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ihce-bench-'), 'bench.db')}"
+
+    os.environ["DB_CONNECTION_STRING"] = database_url
+    # A throwaway database has no migrations applied
+    os.environ["DB_CREATE_TABLES"] = "true"
+    # Every load-test request comes from one client address
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    if smtp_port is not None:
+        os.environ["SMTP_SERVER"] = "127.0.0.1"
+        os.environ["SMTP_PORT"] = str(smtp_port)
+        os.environ["SMTP_SECURITY"] = "none"
+    return database_url
+
+def install_redis(redis_url: Optional[str] = None):
+    """
+    Replaces the shared Redis connection with fakeredis, or with a local Redis when `redis_url` is given.
+
+    Args:
+        redis_url (Optional[str]): e.g. `redis://localhost:6379/15`; fakeredis is used when omitted.
+    """
+    import redis
+    from src.app.utils import Redis
+
+    if redis_url:
+        client = redis.Redis.from_url(redis_url, decode_responses=True)
+        client.ping()
+    else:
+        import fakeredis
+        client = fakeredis.FakeRedis(decode_responses=True)
+
+    def connect():
+        Redis.RedisClient.client = client
+
+    Redis.RedisClient.connect = connect
+    connect()
+    return client
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough ESMTP for `smtplib` to log in and deliver a message."""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost fake-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 SIZE 10485760\r\n")
+            elif command.startswith("AUTH"):
+                self.reply("235 2.7.0 Authentication successful")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.delivered += 1
+                self.reply("250 OK queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class FakeSmtpServer(socketserver.ThreadingTCPServer):
+    """
+    In-process SMTP sink on a free local port. Messages are accepted and counted, never delivered.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _SmtpHandler)
+        self.delivered = 0
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-smtp", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "FakeSmtpServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -1,7 +1,8 @@
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
-from sqlalchemy import pool
+from sqlalchemy import pool, text
 from alembic import context
+from src.config import AppConfigs
 from src.app.utils import Db
 
 # this is the Alembic Config object, which provides
@@ -43,8 +44,13 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
+    if context.get_context().dialect.name == "postgresql":
+        context.execute(f"SET lock_timeout = {AppConfigs.MIGRATION_LOCK_TIMEOUT_MS}")
+        context.execute(f"SET statement_timeout = {AppConfigs.MIGRATION_STATEMENT_TIMEOUT_MS}")
+
     with context.begin_transaction():
         context.run_migrations()
 
@@ -63,8 +69,16 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # Fail fast rather than queue behind a long transaction while holding up every query on the table
+            connection.execute(text(f"SET lock_timeout = {AppConfigs.MIGRATION_LOCK_TIMEOUT_MS}"))
+            connection.execute(text(f"SET statement_timeout = {AppConfigs.MIGRATION_STATEMENT_TIMEOUT_MS}"))
+            connection.commit()
+
+        # One transaction per revision: locks are released between revisions, and a
+        # failed revision leaves the earlier ones applied so the upgrade resumes from it
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, transaction_per_migration=True
         )
 
         with context.begin_transaction():
@@ -0,0 +1,41 @@
+"""Prospectus_Outbox
+
+Revision ID: 3c9e5d0b7a41
+Revises: aa7c62e6f17d
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e5d0b7a41'
+down_revision: Union[str, None] = 'aa7c62e6f17d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ProspectusOutbox',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('aggregate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('published_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_ProspectusOutbox_unpublished', 'ProspectusOutbox', ['id'], unique=False,
+        postgresql_where=sa.text('published_at IS NULL'), sqlite_where=sa.text('published_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ProspectusOutbox_unpublished', table_name='ProspectusOutbox')
+    op.drop_table('ProspectusOutbox')
@@ -0,0 +1,40 @@
+"""Prospectus_Stage_History
+
+Revision ID: 7d2f4a9c1e53
+Revises: 3c9e5d0b7a41
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f4a9c1e53'
+down_revision: Union[str, None] = '3c9e5d0b7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ProspectusStageHistory',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('prospectus_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('from_status', sa.String(), nullable=True),
+        sa.Column('to_status', sa.String(), nullable=False),
+        sa.Column('entered_at', sa.DateTime(), nullable=False),
+        sa.Column('transitioned_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_ProspectusStageHistory_prospectus_id'), 'ProspectusStageHistory', ['prospectus_id'], unique=False)
+    op.create_index('ix_ProspectusStageHistory_from_status_transitioned_at', 'ProspectusStageHistory', ['from_status', 'transitioned_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ProspectusStageHistory_from_status_transitioned_at', table_name='ProspectusStageHistory')
+    op.drop_index(op.f('ix_ProspectusStageHistory_prospectus_id'), table_name='ProspectusStageHistory')
+    op.drop_table('ProspectusStageHistory')
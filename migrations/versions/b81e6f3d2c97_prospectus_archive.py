@@ -0,0 +1,69 @@
+"""Prospectus_Archive
+
+Revision ID: b81e6f3d2c97
+Revises: 7d2f4a9c1e53
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from src.app.utils import Migrations
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e6f3d2c97'
+down_revision: Union[str, None] = '7d2f4a9c1e53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Yearly partitions created up front; the archiver adds later years as it reaches them
+FIRST_YEAR, LAST_YEAR = 2024, 2027
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ProspectusArchive',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('slug', sa.String(), nullable=False),
+        sa.Column('subscription', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('is_delete', sa.Boolean(), nullable=False),
+        sa.Column('requester_first_name', sa.String(), nullable=False),
+        sa.Column('requester_last_name', sa.String(), nullable=False),
+        sa.Column('requester_email', sa.String(), nullable=False),
+        sa.Column('requester_phone_number_country_code', sa.String(), nullable=True),
+        sa.Column('requester_phone_number', sa.String(), nullable=True),
+        sa.Column('requester_designation', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            op.execute(
+                f'CREATE TABLE "ProspectusArchive_{year}" PARTITION OF "ProspectusArchive" '
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+        op.execute('CREATE TABLE "ProspectusArchive_default" PARTITION OF "ProspectusArchive" DEFAULT')
+
+    # Archived rows are looked up by requester or slug for support requests; indexes cascade to the partitions
+    op.create_index('ix_ProspectusArchive_requester_email', 'ProspectusArchive', ['requester_email'], unique=False)
+    op.create_index('ix_ProspectusArchive_slug', 'ProspectusArchive', ['slug'], unique=False)
+
+    # Lets the archiver find finished prospectus without scanning the hot table (built without blocking onboarding)
+    Migrations.create_index_concurrently('ix_Prospectus_status_updated_at', 'Prospectus', ['status', 'updated_at'])
+
+
+def downgrade() -> None:
+    Migrations.drop_index_concurrently('ix_Prospectus_status_updated_at', 'Prospectus')
+    op.drop_index('ix_ProspectusArchive_slug', table_name='ProspectusArchive')
+    op.drop_index('ix_ProspectusArchive_requester_email', table_name='ProspectusArchive')
+    # Dropping the parent drops its partitions
+    op.drop_table('ProspectusArchive')
@@ -0,0 +1,6 @@
+from src.app.middleware.query_metrics import QueryMetricsMiddleware
+from src.app.middleware.tracing import TracingMiddleware
+from src.app.middleware.admission import AdmissionControlMiddleware
+from src.app.middleware.profiling import ProfilingMiddleware
+
+__all__ = ["QueryMetricsMiddleware", "TracingMiddleware", "AdmissionControlMiddleware", "ProfilingMiddleware"]
@@ -0,0 +1,135 @@
+import time
+import asyncio
+import logging
+import functools
+from typing import Dict, Optional
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.app.utils.Metrics import AppMetrics
+from src.config import AppConfigs
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+admission_queue_wait = AppMetrics.histogram(
+    "admission_queue_wait_seconds", "Time requests waited for a concurrency slot.", ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+admission_shed = AppMetrics.counter("admission_shed_total", "Requests rejected with 503 by admission control.", ["route", "reason"])
+admission_in_flight = AppMetrics.gauge("admission_in_flight", "Requests holding a concurrency slot.", ["route"])
+admission_queued = AppMetrics.gauge("admission_queued", "Requests waiting for a concurrency slot.", ["route"])
+
+# Request lines whose route name is remembered; paths carry ids, so the cache is bounded
+ROUTE_CACHE_SIZE = 4096
+
+class ConcurrencyLimiter:
+    """At most `limit` concurrent holders, at most `queue_size` waiters, each waiting no longer than `timeout`."""
+
+    def __init__(self, route: str, limit: int, queue_size: int, timeout: float):
+        self.route = route
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(limit)
+        self._waiting = 0
+
+    async def acquire(self) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: `None` once a slot is held, otherwise why the request was shed.
+        """
+        if not self._slots.locked():
+            await self._slots.acquire()
+            admission_queue_wait.observe(0.0, route=self.route)
+            return None
+        if self._waiting >= self.queue_size:
+            return "queue_full"
+
+        self._waiting += 1
+        admission_queued.inc(route=self.route)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return "queue_timeout"
+        finally:
+            self._waiting -= 1
+            admission_queued.dec(route=self.route)
+            admission_queue_wait.observe(time.perf_counter() - started, route=self.route)
+        return None
+
+    def release(self):
+        self._slots.release()
+
+class AdmissionControlMiddleware:
+    """
+    Caps the requests each route works on at once (`ADMISSION_LIMITS`, else
+    `ADMISSION_DEFAULT_CONCURRENCY`). Excess requests wait in a bounded queue for
+    at most `ADMISSION_QUEUE_TIMEOUT_SECONDS`; when the queue is full or the wait
+    runs out they are rejected at once with 503 and `Retry-After`, before any
+    database or SMTP work is started. Health probes and event streams are exempt.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+        # The routes do not change once serving, so a request line always resolves to the same route
+        self._route_names = functools.lru_cache(maxsize=ROUTE_CACHE_SIZE)(self._match_route)
+
+    @staticmethod
+    def _match_route(app: ASGIApp, method: str, root_path: str, path: str) -> Optional[str]:
+        scope = {"type": "http", "method": method, "root_path": root_path, "path": path}
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "name", None)
+        return None
+
+    def route_name(self, scope: Scope) -> Optional[str]:
+        """The name of the route serving `scope`, matched once per method and path."""
+        return self._route_names(scope["app"], scope["method"], scope.get("root_path", ""), scope["path"])
+
+    def limiter(self, route: str) -> ConcurrencyLimiter:
+        limiter = self._limiters.get(route)
+        if limiter is None:
+            limiter = self._limiters[route] = ConcurrencyLimiter(
+                route,
+                AppConfigs.ADMISSION_LIMITS.get(route, AppConfigs.ADMISSION_DEFAULT_CONCURRENCY),
+                AppConfigs.ADMISSION_QUEUE_SIZE,
+                AppConfigs.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            )
+        return limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or not AppConfigs.ADMISSION_ENABLED
+            or scope["path"].startswith(AppConfigs.ADMISSION_EXEMPT_PATH_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        route = self.route_name(scope) or "unmatched"
+        if route in AppConfigs.ADMISSION_EXEMPT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter(route)
+        reason = await limiter.acquire()
+        if reason is not None:
+            admission_shed.inc(route=route, reason=reason)
+            logger.warning("Shedding %s %s (%s): %s", scope["method"], scope["path"], route, reason)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "The service is overloaded. Please retry later."},
+                headers={"Retry-After": str(AppConfigs.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        admission_in_flight.inc(route=route)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_in_flight.dec(route=route)
+            limiter.release()
@@ -0,0 +1,66 @@
+import time
+import random
+import logging
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config import AppConfigs
+from src.app.utils.Profiling import PROFILE_HEADER, PROFILE_ID_HEADER, Profiles, profiler, profiles_captured, verify
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that carry a valid signed `X-Debug-Profile` header, or are
+    sampled at `PROFILE_SAMPLE_RATE`, and returns the profile id in `X-Profile-Id`.
+    Other requests pass straight through after a header lookup and a random draw.
+    One request is profiled at a time per process: a profiler sees everything on
+    the event loop thread, so concurrent profiles would only blur each other.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header = PROFILE_HEADER.lower().encode()
+        self.busy = False
+
+    def _trigger(self, scope: Scope):
+        if AppConfigs.PROFILE_SECRET:
+            for name, value in scope["headers"]:
+                if name == self.header:
+                    return "header" if verify(value.decode("latin-1")) else None
+        if AppConfigs.PROFILE_SAMPLE_RATE > 0 and random.random() < AppConfigs.PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.busy:
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        id = Profiles.new_id()
+        active = profiler(AppConfigs.PROFILE_MODE)
+
+        async def send_with_profile(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.lower().encode(), id.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        self.busy = True
+        started = time.perf_counter()
+        active.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            data = active.stop()
+            self.busy = False
+            label = f"{scope['method']} {scope['path']} {(time.perf_counter() - started) * 1000:.1f}ms"
+            try:
+                await Profiles.save(id, active.kind, active.extension, data, label)
+                profiles_captured.inc(trigger=trigger)
+            except Exception as e:
+                logger.warning("Could not store profile '%s': %s", id, e)
@@ -0,0 +1,43 @@
+import logging
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.app.utils import Db
+from src.config import AppConfigs
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+class QueryMetricsMiddleware:
+    """
+    Attaches a fresh `QueryStats` to every HTTP request so the engine hooks in `Db`
+    can count the queries it issues. In debug mode the totals are returned as
+    response headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = Db.QueryStats()
+        token = Db.query_stats.set(stats)
+
+        async def send_with_query_headers(message: Message):
+            if message["type"] == "http.response.start" and AppConfigs.DEBUG:
+                headers = list(message.get("headers", []))
+                headers.append((Db.QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()))
+                headers.append((Db.QUERY_TIME_HEADER.lower().encode(), f"{stats.duration_ms:.2f}".encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_query_headers)
+        finally:
+            Db.query_stats.reset(token)
+            if stats.count:
+                logger.debug(
+                    "%s %s issued %d queries in %.2f ms",
+                    scope["method"], scope["path"], stats.count, stats.duration_ms
+                )
@@ -0,0 +1,37 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.app.utils.Tracing import AppTracer
+
+class TracingMiddleware:
+    """
+    Opens the root span of every sampled HTTP request. Unsampled requests pass
+    straight through, so tracing costs a single random draw per request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not AppTracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = dict(scope["headers"]).get(b"traceparent", b"").decode() or None
+        with AppTracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent=traceparent,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        ) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_trace(message: Message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    root.set_attribute("http.response_time_ms", round(root.duration_ms, 3))
+                    headers = list(message.get("headers", []))
+                    headers.append((b"traceparent", f"00-{root.trace_id}-{root.span_id}-01".encode()))
+                    message["headers"] = headers
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
@@ -1,9 +1,9 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from enum import Enum
-from src.app.utils.Db import Base,engine
+from src.app.utils.Db import Base
 
 class ProspectusStages(Enum):
     INIT_TENANT_PROSPECTUS_ONBOARDING = "init.tenant.prospectus.onboarding"
@@ -41,7 +41,10 @@ class Prospectus(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Finds prospectus by stage and last change (archival, sweeps) without scanning the table
+        Index("ix_Prospectus_status_updated_at", "status", "updated_at"),
+    )
+
     def __repr__(self):
         return f"<Prospectus(id={self.id}, organization_name={self.title}, is_active={self.is_active})>"
-
-Base.metadata.create_all(engine)
\ No newline at end of file
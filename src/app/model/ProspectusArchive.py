@@ -0,0 +1,57 @@
+from sqlalchemy import Column, String, Boolean, DateTime, DDL, event
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from src.app.utils.Db import Base
+
+class ProspectusArchive(Base):
+    """
+    Cold storage for soft-deleted and long-finished prospectus, moved out of
+    `Prospectus` by `src.app.workers.prospectus_archiver`. On PostgreSQL the table
+    is range-partitioned by `created_at`, one partition per year plus a default one.
+    """
+    __tablename__: str = 'ProspectusArchive'
+
+    # The partition key must be part of the primary key of a partitioned table
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    created_at = Column(DateTime, primary_key=True)
+    title = Column(String, nullable=False)
+    slug = Column(String, nullable=False, index=True)
+    subscription = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    is_active = Column(Boolean, nullable=False)
+    is_delete = Column(Boolean, nullable=False)
+
+    # Requester details
+    requester_first_name = Column(String, nullable=False)
+    requester_last_name = Column(String, nullable=False)
+    requester_email = Column(String, nullable=False, index=True)
+    requester_phone_number_country_code = Column(String, nullable=True)
+    requester_phone_number = Column(String, nullable=True)
+    requester_designation = Column(String, nullable=False)
+
+    # Timestamps
+    updated_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    def __repr__(self):
+        return f"<ProspectusArchive(id={self.id}, organization_name={self.title}, status={self.status})>"
+
+def partition_name(year: int) -> str:
+    return f"{ProspectusArchive.__tablename__}_{year}"
+
+def partition_ddl(year: int) -> str:
+    """The statement creating the partition of `year` unless it already exists."""
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(year)}" PARTITION OF "{ProspectusArchive.__tablename__}" '
+        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+    )
+
+# Tables created by `create_all` still accept rows before any yearly partition exists
+event.listen(
+    ProspectusArchive.__table__,
+    "after_create",
+    DDL(f'CREATE TABLE IF NOT EXISTS "{ProspectusArchive.__tablename__}_default" PARTITION OF "{ProspectusArchive.__tablename__}" DEFAULT')
+    .execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, Integer, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+from src.app.utils.Db import Base
+
+class ProspectusOutbox(Base):
+    """
+    Events written in the same transaction as the change they describe, and
+    relayed to the event stream by `src.app.workers.outbox_relay`.
+    """
+    __tablename__: str = 'ProspectusOutbox'
+
+    # Monotonic id; the relay publishes in this order
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    published_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Only unpublished rows are indexed, so the relay's scan stays small as the table grows
+        Index("ix_ProspectusOutbox_unpublished", "id", postgresql_where=published_at.is_(None), sqlite_where=published_at.is_(None)),
+    )
+
+    def __repr__(self):
+        return f"<ProspectusOutbox(id={self.id}, event_type={self.event_type}, aggregate_id={self.aggregate_id})>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from src.app.utils.Db import Base
+
+class ProspectusStageHistory(Base):
+    """
+    Append-only log of prospectus stage transitions. Each row closes the stay in
+    `from_status` (entered at `entered_at`) and opens `to_status` at `transitioned_at`;
+    onboarding itself is recorded with no `from_status`.
+    """
+    __tablename__: str = 'ProspectusStageHistory'
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    prospectus_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    from_status = Column(String, nullable=True)
+    to_status = Column(String, nullable=False)
+
+    # Timestamps
+    entered_at = Column(DateTime, nullable=False)
+    transitioned_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Dwell-time aggregates group by the stage left, over a time window
+        Index("ix_ProspectusStageHistory_from_status_transitioned_at", "from_status", "transitioned_at"),
+    )
+
+    def __repr__(self):
+        return f"<ProspectusStageHistory(prospectus_id={self.prospectus_id}, from_status={self.from_status}, to_status={self.to_status})>"
@@ -1,14 +1,37 @@
-from typing import List, Type, Optional
+from typing import List, Type, Optional, Tuple
+from datetime import datetime
 from sqlalchemy.orm import Session
 from src.app.schema.Prospectus import OnboardingNewProspectus, OnboardingNewProspectusResponse
 from src.app.model.Prospectus import Prospectus, ProspectusStages
-from sqlalchemy import or_
+from src.app.model.ProspectusOutbox import ProspectusOutbox
+from src.app.model.ProspectusStageHistory import ProspectusStageHistory
+from sqlalchemy import or_, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from uuid import UUID
+from src.app.utils.Tracing import traced
+from src.app.utils import Db
+from src.app.utils.WriteBehind import WriteBehindBuffer
+from src.config import AppConfigs
 import logging
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
+# Create a shared WriteBehindBuffer instance for the stage history (flushed by the lifespan)
+StageHistoryBuffer = WriteBehindBuffer(
+    ProspectusStageHistory.__table__,
+    flush_rows=AppConfigs.STAGE_HISTORY_FLUSH_ROWS,
+    flush_interval=AppConfigs.STAGE_HISTORY_FLUSH_SECONDS,
+    max_rows=AppConfigs.STAGE_HISTORY_MAX_ROWS,
+)
+
+def _percentile(values: List[float], fraction: float) -> float:
+    # Linear interpolation between the closest ranks, as PostgreSQL's percentile_cont
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
 class ProspectusRepository:
     def __init__(self, db_session: Session):
         """
@@ -19,6 +42,7 @@ class ProspectusRepository:
         """
         self.db_session = db_session
 
+    @traced("repository.create_prospectus")
     async def create_prospectus(self, payload: OnboardingNewProspectus) -> Prospectus:
         try:
             # Construct the new prospectus object
@@ -35,7 +59,7 @@ class ProspectusRepository:
             prospectus.requester_phone_number_country_code = payload.requester_phone_number_country_code
 
             # Log the tenant creation attempt
-            logger.info(f"Attempting to create a new prospectus with title '{prospectus.title}'.")
+            logger.info("Attempting to create a new prospectus with title '%s'.", prospectus.title)
 
             # Add the tenant to the session and commit the transaction
             self.db_session.add(prospectus)
@@ -44,16 +68,26 @@ class ProspectusRepository:
             # Refresh the prospectus instance to populate generated fields (e.g., id)
             self.db_session.refresh(prospectus)
 
+            # Open the history of the prospectus; written later, off the request path
+            StageHistoryBuffer.append({
+                "prospectus_id": prospectus.id,
+                "from_status": None,
+                "to_status": prospectus.status,
+                "entered_at": prospectus.created_at,
+                "transitioned_at": prospectus.created_at,
+            })
+
             # Log successful tenant creation
-            logger.info(f"Prospectus '{prospectus.title}' successfully created with ID {prospectus.id}.")
+            logger.info("Prospectus '%s' successfully created with ID %s.", prospectus.title, prospectus.id)
 
             return prospectus
 
         except Exception as e:
             # Log unexpected errors
-            logger.error(f"An unexpected error occurred while creating a tenant: {str(e)}")
+            logger.error("An unexpected error occurred while creating a tenant: %s", e)
             raise
 
+    @traced("repository.get_prospectus")
     async def get_prospectus(self, page: int, limit: int) -> list[Type[Prospectus]]:
         """
         Retrieve a paginated list of prospectus.
@@ -65,15 +99,18 @@ class ProspectusRepository:
         Returns:
             List[OnboardingNewProspectusResponse]: List of prospectus data.
         """
-        prospectus = (
-            self.db_session.query(Prospectus)
-            .offset((page - 1) * limit)
-            .limit(limit)
-            .all()
-        )
+        with Db.replica_reads(self.db_session):
+            prospectus = (
+                self.db_session.query(Prospectus)
+                .order_by(Prospectus.created_at, Prospectus.id)
+                .offset((page - 1) * limit)
+                .limit(limit)
+                .all()
+            )
 
         return prospectus
 
+    @traced("repository.get_prospectus_by_id")
     async def get_prospectus_by_id(self, id: UUID) -> Optional[Prospectus]:
         """
         Retrieve a single prospectus by its UUID.
@@ -84,16 +121,131 @@ class ProspectusRepository:
         Returns:
             Optional[Prospectus]: The prospectus data if found, or None if not found.
         """
-        prospectus = self.db_session.query(Prospectus).filter(Prospectus.id == id).first()
+        with Db.replica_reads(self.db_session):
+            prospectus = self.db_session.query(Prospectus).filter(Prospectus.id == id).first()
         return prospectus
 
+    @traced("repository.get_prospectus_by_ids")
+    async def get_prospectus_by_ids(self, ids: List[UUID]) -> List[Prospectus]:
+        """
+        Retrieve many prospectus by their UUIDs in a single query.
+
+        Args:
+            ids (List[UUID]): The UUIDs of the prospectus to retrieve.
+
+        Returns:
+            List[Prospectus]: The prospectus found, in no particular order.
+        """
+        if not ids:
+            return []
+
+        if Db.engine.dialect.name == "postgresql":
+            # One array parameter keeps a single statement shape whatever the number of ids
+            condition = Prospectus.id == any_(bindparam("ids", list(ids), type_=ARRAY(PG_UUID(as_uuid=True))))
+        else:
+            condition = Prospectus.id.in_(ids)
+
+        with Db.replica_reads(self.db_session):
+            return self.db_session.query(Prospectus).filter(condition).all()
+
+    @traced("repository.get_prospectus_validators")
+    async def get_prospectus_validators(self, page: int, limit: int) -> List[Tuple[UUID, str, Optional[datetime]]]:
+        """
+        Retrieve only the `(id, status, updated_at)` columns of a page of prospectus, in the order of `get_prospectus`.
+
+        Args:
+            page (int): Offset for pagination.
+            limit (int): Maximum number of items to fetch.
+
+        Returns:
+            List[Tuple[UUID, str, Optional[datetime]]]: The validator columns of each prospectus on the page.
+        """
+        with Db.replica_reads(self.db_session):
+            rows = (
+                self.db_session.query(Prospectus.id, Prospectus.status, Prospectus.updated_at)
+                .order_by(Prospectus.created_at, Prospectus.id)
+                .offset((page - 1) * limit)
+                .limit(limit)
+                .all()
+            )
+        return [tuple(row) for row in rows]
+
+    @traced("repository.get_prospectus_validator")
+    async def get_prospectus_validator(self, id: UUID) -> Optional[Tuple[UUID, str, Optional[datetime]]]:
+        """
+        Retrieve only the `(id, status, updated_at)` columns of a prospectus.
+
+        Args:
+            id (UUID): The UUID of the prospectus.
+
+        Returns:
+            Optional[Tuple[UUID, str, Optional[datetime]]]: The validator columns, or None if not found.
+        """
+        with Db.replica_reads(self.db_session):
+            row = (
+                self.db_session.query(Prospectus.id, Prospectus.status, Prospectus.updated_at)
+                .filter(Prospectus.id == id)
+                .first()
+            )
+        return tuple(row) if row else None
+
+    @traced("repository.get_stale_activations")
+    async def get_stale_activations(self, entered_before: datetime, entered_after: datetime,
+                                    after: Optional[Tuple[datetime, UUID]], limit: int) -> List[Prospectus]:
+        """
+        Retrieve prospectus waiting in the email activation stage, entered within a time window.
+        Served by the `(status, updated_at)` index and paged by keyset rather than offset.
+
+        Args:
+            entered_before (datetime): Only prospectus that entered the stage before this time.
+            entered_after (datetime): Only prospectus that entered the stage after this time.
+            after (Optional[Tuple[datetime, UUID]]): The `(updated_at, id)` of the last row of the previous page.
+            limit (int): Maximum number of items to fetch.
+
+        Returns:
+            List[Prospectus]: The prospectus, oldest first.
+        """
+        query = self.db_session.query(Prospectus).filter(
+            Prospectus.status == ProspectusStages.INIT_TENANT_ADMIN_EMAIL_ACTIVATION.value,
+            Prospectus.updated_at < entered_before,
+            Prospectus.updated_at > entered_after,
+        )
+        if after is not None:
+            query = query.filter(or_(
+                Prospectus.updated_at > after[0],
+                (Prospectus.updated_at == after[0]) & (Prospectus.id > after[1]),
+            ))
+
+        with Db.replica_reads(self.db_session):
+            return query.order_by(Prospectus.updated_at, Prospectus.id).limit(limit).all()
+
+    @traced("repository.promote_prospectus_status")
     async def promote_prospectus_status(self,id: UUID, status: str) -> Prospectus:
         try:
-            prospectus = self.db_session.query(Prospectus).filter(Prospectus.id == id).first()
+            # Served from the identity map when the prospectus was already loaded in this session
+            prospectus = self.db_session.get(Prospectus, id)
+            previous_status = prospectus.status
+            # Only status changes touch `updated_at`, so it is when the previous status was entered
+            entered_at = prospectus.updated_at or prospectus.created_at
             prospectus.status = status
 
+            # Record the transition in the outbox; it commits (or rolls back) together with the status
+            occurred_at = datetime.utcnow()
+            self.db_session.add(ProspectusOutbox(
+                aggregate_id=prospectus.id,
+                event_type="prospectus.stage_changed",
+                payload={
+                    "id": str(prospectus.id),
+                    "slug": prospectus.slug,
+                    "previous_status": previous_status,
+                    "status": status,
+                    "occurred_at": occurred_at.isoformat(),
+                },
+                created_at=occurred_at,
+            ))
+
             # Log the tenant creation attempt
-            logger.info(f"Attempting to promote the prospectus status: '{status}'.")
+            logger.info("Attempting to promote the prospectus status: '%s'.", status)
 
             # Add the tenant to the session and commit the transaction
             self.db_session.commit()
@@ -101,18 +253,28 @@ class ProspectusRepository:
             # Refresh the prospectus instance to populate generated fields (e.g., id)
             self.db_session.refresh(prospectus)
 
-            print(f"{prospectus}")
+            logger.debug("Promoted %r", prospectus)
+
+            # Close the stay in the previous stage; written later, off the request path
+            StageHistoryBuffer.append({
+                "prospectus_id": prospectus.id,
+                "from_status": previous_status,
+                "to_status": prospectus.status,
+                "entered_at": entered_at,
+                "transitioned_at": prospectus.updated_at,
+            })
 
             # Log successful tenant creation
-            logger.info(f"Prospectus '{prospectus.title}' successfully updated with status {prospectus.status}.")
+            logger.info("Prospectus '%s' successfully updated with status %s.", prospectus.title, prospectus.status)
 
             return prospectus
 
         except Exception as e:
             # Log unexpected errors
-            logger.error(f"An unexpected error occurred while promoting prospectus status: {str(e)}")
+            logger.error("An unexpected error occurred while promoting prospectus status: %s", e)
             raise
 
+    @traced("repository.check_duplicate_prospectus")
     async def check_duplicate_prospectus(self, slug: Optional[str], requester_email: Optional[str]) -> Optional[Prospectus]:
         """
         Check for duplicate prospectus based on slug or requester email.
@@ -133,4 +295,50 @@ class ProspectusRepository:
         elif requester_email is not None:
             query = query.filter(Prospectus.requester_email == requester_email)
 
-        return query.first()
\ No newline at end of file
+        with Db.replica_reads(self.db_session):
+            return query.first()
+
+    @traced("repository.get_stage_dwell")
+    async def get_stage_dwell(self, since: Optional[datetime] = None) -> List[Tuple[str, int, float, float]]:
+        """
+        Aggregate the time spent in each stage over the transitions out of it.
+
+        Args:
+            since (Optional[datetime]): Only count transitions at or after this time.
+
+        Returns:
+            List[Tuple[str, int, float, float]]: `(stage, transitions, p50 seconds, p95 seconds)` per stage.
+        """
+        history = ProspectusStageHistory
+        condition = history.from_status.isnot(None)
+        if since is not None:
+            condition = condition & (history.transitioned_at >= since)
+
+        with Db.replica_reads(self.db_session):
+            if Db.engine.dialect.name == "postgresql":
+                dwell = func.extract("epoch", history.transitioned_at - history.entered_at)
+                rows = self.db_session.execute(
+                    select(
+                        history.from_status,
+                        func.count(),
+                        func.percentile_cont(0.5).within_group(dwell),
+                        func.percentile_cont(0.95).within_group(dwell),
+                    )
+                    .where(condition)
+                    .group_by(history.from_status)
+                    .order_by(history.from_status)
+                ).all()
+                return [(stage, count, float(p50), float(p95)) for stage, count, p50, p95 in rows]
+
+            # No ordered-set aggregates elsewhere: compute the percentiles here
+            rows = self.db_session.execute(
+                select(history.from_status, history.entered_at, history.transitioned_at).where(condition)
+            ).all()
+
+        durations = {}
+        for stage, entered_at, transitioned_at in rows:
+            durations.setdefault(stage, []).append((transitioned_at - entered_at).total_seconds())
+        return [
+            (stage, len(values), _percentile(values, 0.5), _percentile(values, 0.95))
+            for stage, values in sorted((stage, sorted(values)) for stage, values in durations.items())
+        ]
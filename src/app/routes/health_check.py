@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import PlainTextResponse
 from src.app.services.health_check import liveness, readiness
+from src.app.utils.Metrics import AppMetrics
+from src.app.utils.Profiling import PROFILE_HEADER, Profiles, verify
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -9,5 +12,27 @@ async def health_check_liveness(liveness_status: bool = Depends(liveness)):
     return liveness_status
 
 @router.get("/readiness", include_in_schema=False)
-async def health_check_readiness(readiness_status: bool = Depends(readiness)):
+async def health_check_readiness(readiness_status: dict = Depends(readiness)):
     return readiness_status
+
+@router.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+async def health_check_metrics():
+    return AppMetrics.render()
+
+# Profile routes (answered only with a valid signed X-Debug-Profile header)
+def signed_profile_request(request: Request):
+    if not verify(request.headers.get(PROFILE_HEADER, "")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+@router.get("/profiles", include_in_schema=False, response_class=PlainTextResponse, dependencies=[Depends(signed_profile_request)])
+async def health_check_profiles():
+    return "".join(f"{entry}\n" for entry in await Profiles.latest())
+
+@router.get("/profiles/{id}", include_in_schema=False, dependencies=[Depends(signed_profile_request)])
+async def health_check_profile(id: str):
+    profile = await Profiles.load(id) if id.isalnum() else None
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found or expired.")
+    kind, extension, data = profile
+    media_type = "text/plain; charset=utf-8" if kind == "collapsed" else "application/octet-stream"
+    return Response(data, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{id}.{extension}"'})
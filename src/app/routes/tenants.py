@@ -1,30 +1,43 @@
 from typing import List, Optional
 from uuid import UUID
-from src.app.utils import Db
-from fastapi import APIRouter, Query, Depends, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from src.app.utils import Db, HttpCache, ContentNegotiation
+from src.app.utils.RateLimiter import RateLimit
+from src.app.utils.Idempotency import IDEMPOTENCY_HEADER, idempotent
+from fastapi import APIRouter, Query, Depends, Header, Request, Response, status, BackgroundTasks
 from sqlalchemy.orm import Session
 from src.app.services.prospectus import ProspectusService
-from src.app.schema.Prospectus import OnboardingNewProspectus, IdentityActivationResponse, OnboardingNewProspectusResponse
+from src.app.schema.Prospectus import OnboardingNewProspectus, IdentityActivationResponse, OnboardingNewProspectusResponse, ProspectusLookup, StageDwell, TenantInfrastructureResponse
 
 # Initialize the router for Tenant-related APIs
 router = APIRouter(tags=["Tenant-Prospectus"], prefix="/tenant-prospectus")
 
 # Tenants routes
 # Route: Create a new tenant prospectus
-@router.post("", status_code=status.HTTP_201_CREATED, response_model=OnboardingNewProspectusResponse)
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=OnboardingNewProspectusResponse,
+             dependencies=[Depends(RateLimit("create_tenant_prospectus", keys=("ip", "body:requester_email", "body:slug")))])
 async def create_tenant_prospectus(
         prospectus: OnboardingNewProspectus,
         background_tasks: BackgroundTasks,
+        idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
         db_session: Session = Depends(Db.session)
 ):
     """
     Endpoint to onboard a new tenant prospectus.
+
+    Retries sent with the same `Idempotency-Key` header replay the first response instead of onboarding again.
     """
-    return await ProspectusService(db_session).onboarding_new_prospectus(background_tasks, prospectus)
+    return await idempotent(
+        "create_tenant_prospectus", idempotency_key, prospectus,
+        lambda: ProspectusService(db_session).onboarding_new_prospectus(background_tasks, prospectus),
+        status_code=status.HTTP_201_CREATED,
+    )
 
 # Route: Retrieve a paginated list of tenant prospectus
 @router.get("", status_code=status.HTTP_200_OK, response_model=List[OnboardingNewProspectusResponse])
 async def list_all_tenants(
+        request: Request,
+        response: Response,
         page: int = Query(1, ge=1, description="Page number for pagination"),
         limit: int = Query(10, ge=1, le=100, description="Number of items per page"),
         db_session: Session = Depends(Db.session)
@@ -46,15 +59,59 @@ async def list_all_tenants(
     - **No Data Available**: Returns an empty JSON array (`[]`).
     - **Successful Retrieval**: Returns a JSON array of OnboardingNewTenantResponse objects `List[OnboardingNewTenantResponse]`.
     - **Access Control**: This endpoint is accessible only to authorized users (dependencies for authentication can be added).
+    - **Conditional Requests**: Responses carry an `ETag` and `Last-Modified`; a matching `If-None-Match` or `If-Modified-Since` is answered with `304 Not Modified`.
+    - **Encoding**: JSON by default; `Accept: application/msgpack` is answered with MessagePack (UUIDs as 16-byte binaries).
 
     ## Returns
     - `List[OnboardingNewTenantResponse]`: Paginated list of tenant data.
     """
-    return await ProspectusService(db_session).list_prospectus(page, limit)
+    service = ProspectusService(db_session)
+    not_modified = HttpCache.conditional(request, response, await service.list_prospectus_validator(page, limit),
+                                         ContentNegotiation.representation(request))
+    if not_modified:
+        return ContentNegotiation.negotiate(request, response, not_modified)
+    return ContentNegotiation.negotiate(request, response, await service.list_prospectus(page, limit))
+
+# Route: Resolve many tenant prospectus at once
+@router.post("/lookup", status_code=status.HTTP_200_OK, response_model=List[OnboardingNewProspectusResponse],
+             openapi_extra=ContentNegotiation.request_body(ProspectusLookup))
+async def lookup_tenants(
+        request: Request,
+        response: Response,
+        lookup: ProspectusLookup = Depends(ContentNegotiation.body(ProspectusLookup)),
+        db_session: Session = Depends(Db.session)
+):
+    """
+    Resolve up to `PROSPECTUS_LOOKUP_MAX_IDS` tenant prospectus by ID with a single query.
+
+    ## Behavior
+    - **Ordering**: Results follow the order of the requested IDs; duplicates are returned once.
+    - **Missing IDs**: IDs that do not exist are omitted from the response.
+    - **Encoding**: The body may be sent as `application/msgpack` (IDs as strings or 16-byte binaries);
+      `Accept: application/msgpack` is answered with MessagePack. JSON stays the default both ways.
+    """
+    return ContentNegotiation.negotiate(request, response, await ProspectusService(db_session).lookup_prospectus(lookup.ids))
+
+# Route: Time spent in each onboarding stage
+@router.get("/stages/dwell", status_code=status.HTTP_200_OK, response_model=List[StageDwell])
+async def stage_dwell(
+        since_hours: Optional[int] = Query(None, ge=1, description="Only count transitions of the last hours"),
+        db_session: Session = Depends(Db.session)
+):
+    """
+    Retrieve the p50 and p95 time prospectus spend in each onboarding stage.
+
+    ## Behavior
+    - **Source**: Built from the stage history; each transition out of a stage counts as one stay in it.
+    - **Freshness**: History is written behind, so the latest transitions appear within `STAGE_HISTORY_FLUSH_SECONDS`.
+    """
+    return await ProspectusService(db_session).stage_dwell(since_hours)
 
 @router.get("/{id}", status_code=status.HTTP_200_OK, response_model=Optional[OnboardingNewProspectusResponse])
 async def get_tenant_by_id(
         id: UUID,
+        request: Request,
+        response: Response,
         db_session: Session = Depends(Db.session)
 ):
     """
@@ -74,11 +131,39 @@ async def get_tenant_by_id(
     - **No Data Available**: Returns `null` if no tenant is found.
     - **Successful Retrieval**: Returns the details of the requested tenant prospectus.
     - **Access Control**: This endpoint is accessible only to authorized users (dependencies for authentication can be added).
+    - **Conditional Requests**: Responses carry an `ETag` and `Last-Modified` derived from `(id, status, updated_at)`;
+      a matching `If-None-Match` or `If-Modified-Since` is answered with `304 Not Modified` without loading the prospectus.
+    - **Encoding**: JSON by default; `Accept: application/msgpack` is answered with MessagePack (UUIDs as 16-byte binaries).
 
     ## Returns
     - `Optional[OnboardingNewProspectusResponse]`: Details of the requested tenant prospectus, or `null` if not found.
     """
-    return await ProspectusService(db_session).get_prospectus(id)
+    service = ProspectusService(db_session)
+    not_modified = HttpCache.conditional(request, response, await service.prospectus_validator(id),
+                                         ContentNegotiation.representation(request))
+    if not_modified:
+        return ContentNegotiation.negotiate(request, response, not_modified)
+    return ContentNegotiation.negotiate(request, response, await service.get_prospectus(id))
+
+# Route: Stream tenant prospectus stage transitions
+@router.get("/{id}/events", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def tenant_prospectus_events(
+        id: UUID,
+        db_session: Session = Depends(Db.session)
+):
+    """
+    Stream the onboarding progress of a tenant prospectus as Server-Sent Events.
+
+    ## Description
+    - Sends the current status first, then a `status` event for every stage transition until the terminal stage.
+    - Keep-alive comments are sent while nothing changes; clients replace polling `GET /tenant-prospectus/{id}` with this stream.
+    """
+    events = await ProspectusService(db_session).watch_prospectus(id)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # Route: Promote tenant prospectus status
 @router.put("/{id}/promote-status", status_code=status.HTTP_200_OK, response_model=OnboardingNewProspectusResponse)
@@ -88,14 +173,26 @@ async def promote_tenant_prospectus(
 ):
     return await ProspectusService(db_session).promote_tenant_prospectus(id)
 
-@router.get("/{id}/identity-activation", status_code=status.HTTP_200_OK, response_model=IdentityActivationResponse)
+# Route: Check the tenant schema or database of a prospectus in the infrastructure stage
+@router.get("/{id}/infrastructure", status_code=status.HTTP_200_OK, response_model=TenantInfrastructureResponse)
+async def tenant_infrastructure(
+        id: UUID,
+        db_session: Session = Depends(Db.session)
+):
+    return await ProspectusService(db_session).tenant_infrastructure(id)
+
+@router.get("/{id}/identity-activation", status_code=status.HTTP_200_OK, response_model=IdentityActivationResponse,
+            dependencies=[Depends(RateLimit("identity_activation", keys=("ip", "path:id")))])
 async def identity_activation(
         id: UUID,
+        request: Request,
+        response: Response,
         db_session: Session = Depends(Db.session)
 ):
-    return await ProspectusService(db_session).identity_activation(id)
+    return ContentNegotiation.negotiate(request, response, await ProspectusService(db_session).identity_activation(id))
 
-@router.get("/{id}/identity-verification/{key}", status_code=status.HTTP_200_OK, response_model=str)
+@router.get("/{id}/identity-verification/{key}", status_code=status.HTTP_200_OK, response_model=str,
+            dependencies=[Depends(RateLimit("identity_verification", keys=("ip", "path:id")))])
 async def identity_verification(
         id: UUID,
         key: str,
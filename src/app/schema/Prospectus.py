@@ -1,7 +1,8 @@
-from pydantic import BaseModel, constr
+from pydantic import BaseModel, Field, constr
 from src.app.model.Prospectus import SubscriptionPlan, ProspectusStages
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
+from src.config import AppConfigs
 
 # Schema for creating a new prospectus
 class OnboardingNewProspectus(BaseModel):
@@ -27,6 +28,23 @@ class GenerateEmailActivationUrl(BaseModel):
     slug: constr(strip_whitespace=True, min_length=3, max_length=25) = ""
     requester_email: constr(strip_whitespace=True, min_length=10, max_length=50) = ""
 
+# Schema for resolving many prospectus at once
+class ProspectusLookup(BaseModel):
+    """
+    Identifiers of the prospectus to resolve in one request.
+    """
+    ids: List[UUID] = Field(min_length=1, max_length=AppConfigs.PROSPECTUS_LOOKUP_MAX_IDS)
+
+# Schema for the time spent in each onboarding stage
+class StageDwell(BaseModel):
+    """
+    Dwell-time percentiles of a stage, over the transitions out of it.
+    """
+    stage: str
+    transitions: int
+    p50_seconds: float
+    p95_seconds: float
+
 class OnboardingNewProspectusResponse(BaseModel):
     """
     Read-only schema for returning OnboardingNewProspectus details, including system-generated fields.
@@ -47,4 +65,13 @@ class IdentityActivationResponse(BaseModel):
     activation_link: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Schema for the tenant infrastructure of a prospectus
+class TenantInfrastructureResponse(BaseModel):
+    """
+    Whether the tenant schema or database of a prospectus is reachable.
+    """
+    id: UUID
+    slug: str
+    ready: bool
@@ -1,5 +1,6 @@
 import logging
 from fastapi import Depends
+from src.app.utils.Resilience import Breakers
 
 # Initialize logging
 logger = logging.getLogger(__name__)
@@ -17,14 +18,19 @@ class HealthCheckService:
     async def application_readiness_check(self):
         """Check the readiness of the application."""
         logger.info("Checking readiness of the application")
-        return True
+
+        # Report degraded dependencies without failing the probe: every pod shares them,
+        # so taking pods out of rotation would only turn degradation into an outage
+        dependencies = Breakers.snapshot()
+        degraded = any(state != "closed" for state in dependencies.values())
+        return {"status": "degraded" if degraded else "ready", "dependencies": dependencies}
 
     # Dependency Injection functions
     def liveness(self, liveness_check: bool = Depends(application_liveness_check)):
         """Inject liveness check dependency."""
         return liveness_check
 
-    def readiness(self, readiness_check: bool = Depends(application_readiness_check)):
+    def readiness(self, readiness_check: dict = Depends(application_readiness_check)):
         """Inject readiness check dependency."""
         return readiness_check
 
@@ -35,5 +41,5 @@ health_check_service = HealthCheckService()
 def liveness(liveness_check: bool = Depends(health_check_service.application_liveness_check)):
     return liveness_check
 
-def readiness(readiness_check: bool = Depends(health_check_service.application_readiness_check)):
+def readiness(readiness_check: dict = Depends(health_check_service.application_readiness_check)):
     return readiness_check
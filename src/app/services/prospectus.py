@@ -1,19 +1,74 @@
+import asyncio
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from uuid import UUID
+from datetime import datetime, timedelta
 from fastapi import HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
-from src.app.schema.Prospectus import OnboardingNewProspectus, OnboardingNewProspectusResponse, IdentityActivationResponse
+from src.app.schema.Prospectus import OnboardingNewProspectus, OnboardingNewProspectusResponse, IdentityActivationResponse, StageDwell, TenantInfrastructureResponse
 from src.app.model.Prospectus import Prospectus, ProspectusStages
 from src.app.repository.Prospectus_Repository import ProspectusRepository
 from src.app.utils.HMAC import HmacAuthenticator
-from src.app.utils.Redis import RedisClient
+from src.app.utils.Redis import RedisClient, client_for, tagged_key
 from src.app.utils.Mailer import EmailClient, EmailTemplates, EmailSender
+from src.app.utils.Tracing import traced
+from src.app.utils.HttpCache import Validator, ValidatorCache
+from src.app.utils.Events import AppEvents, sse_message
+from src.app.utils.DataLoader import DataLoader
+from src.app.utils.Singleflight import ReadThroughCache, Singleflight
+from src.app.utils import Db, TenantDb
 from src.config import AppConfigs
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
+# Validators of single prospectus, refreshed whenever the status is promoted
+ProspectusValidators = ValidatorCache("etag.tp", AppConfigs.PROSPECTUS_VALIDATOR_TTL_SECONDS)
+ValidatorFlights = Singleflight("etag.tp")
+
+# Serialized prospectus (plain data, never ORM objects), refreshed whenever the status is promoted
+ProspectusCache = ReadThroughCache(
+    "cache.tp",
+    AppConfigs.PROSPECTUS_CACHE_TTL_SECONDS,
+    beta=AppConfigs.CACHE_EARLY_REFRESH_BETA,
+    lock_seconds=AppConfigs.CACHE_LOCK_SECONDS,
+)
+
+# Activation tokens must not be evicted, so they live on the durable Redis instance when one is configured
+ActivationTokens = client_for("acl.tp.iv")
+
+async def forget_prospectus(ids: List[UUID]):
+    """Drops the cached data and validators of prospectus that no longer exist (e.g. archived)."""
+    await ProspectusCache.forget([str(id) for id in ids])
+    await ProspectusValidators.forget(ids)
+
+def activation_key(id: UUID) -> str:
+    """The Redis key holding the live activation token of a prospectus."""
+    return tagged_key("acl.tp.iv", id)
+
+def legacy_activation_key(id: UUID) -> str:
+    """The key of tokens stored before the hash-tagged layout, on the default instance."""
+    return f"acl.tp.iv-{id}"
+
+async def fetch_activation_token(id: UUID) -> Optional[str]:
+    """The live activation token of a prospectus, if any (see `REDIS_LEGACY_KEY_FALLBACK`)."""
+    token = await ActivationTokens.fetch(activation_key(id))
+    if token is None and AppConfigs.REDIS_LEGACY_KEY_FALLBACK:
+        token = await RedisClient.fetch(legacy_activation_key(id))
+    return token
+
+def activation_link(id: UUID, key: str) -> str:
+    """The identity verification link emailed for an activation token."""
+    return f"{AppConfigs.SSO_MFA_URL}/auth/identity-verification/{key}?utm_source=tp.iv&utm_scope=email&utm_id={id}"
+
+def activation_message(prospectus: Prospectus, link: str) -> str:
+    """The rendered Identity Activation email for a prospectus."""
+    return EmailTemplates.load("Identity_Activation").render(
+        LINK=link,
+        EMAIL=prospectus.requester_email,
+        NAME=f"{prospectus.requester_first_name} {prospectus.requester_last_name}",
+    )
+
 class ProspectusService:
     def __init__(self, db_session: Session):
         """
@@ -25,18 +80,27 @@ class ProspectusService:
         self.db_session = db_session
         self.prospectus_repository = ProspectusRepository(db_session)
 
+        # A service lives for one request, so repeated lookups of an id hit the database at most once
+        self.prospectus_loader: DataLoader[UUID, Prospectus] = DataLoader(
+            self._load_prospectus, max_batch_size=AppConfigs.PROSPECTUS_LOOKUP_MAX_IDS
+        )
+
+    async def _load_prospectus(self, ids: List[UUID]) -> Dict[UUID, Prospectus]:
+        return {prospectus.id: prospectus for prospectus in await self.prospectus_repository.get_prospectus_by_ids(ids)}
+
+    @traced("service.onboarding_new_prospectus")
     async def onboarding_new_prospectus(self, background_tasks: BackgroundTasks, prospectus: OnboardingNewProspectus ) -> OnboardingNewProspectusResponse:
         """
         Handles the onboarding of a new prospectus.
         """
         try:
             # Log the onboarding request
-            logger.info(f"Starting the onboarding process for new prospectus '{prospectus.title}'.")
+            logger.info("Starting the onboarding process for new prospectus '%s'.", prospectus.title)
 
             # Check if the prospectus slug and requester email id is unique
             check_duplicate_slug = await self.prospectus_repository.check_duplicate_prospectus(prospectus.slug, None)
             if check_duplicate_slug:
-                logger.error(f"Slug '{prospectus.slug}' is already in use.")
+                logger.error("Slug '%s' is already in use.", prospectus.slug)
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
                     detail=f"The slug '{prospectus.slug}' is already in use. Please choose a different slug."
@@ -45,7 +109,7 @@ class ProspectusService:
             # Validate the requester email
             check_duplicate_email = await self.prospectus_repository.check_duplicate_prospectus(None,prospectus.requester_email)
             if check_duplicate_email:
-                logger.error(f"Requester email '{prospectus.requester_email}' is already in use.")
+                logger.error("Requester email '%s' is already in use.", prospectus.requester_email)
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
                     detail=f"The requester email '{prospectus.requester_email}' is already in use. Please use a different email."
@@ -55,9 +119,9 @@ class ProspectusService:
             new_prospectus: Prospectus = await self.prospectus_repository.create_prospectus(prospectus)
 
             if new_prospectus:
-                background_tasks.add_task(self.promote_tenant_prospectus, id=new_prospectus.id)
+                background_tasks.add_task(self.promote_tenant_prospectus_in_background, id=new_prospectus.id)
             else:
-                logger.info(f"Skipping tenant prospectus promotion, Check the below details \n{new_prospectus}")
+                logger.info("Skipping tenant prospectus promotion, Check the below details \n%s", new_prospectus)
 
             # Map the created tenant to the response schema
             response = OnboardingNewProspectusResponse(
@@ -68,15 +132,16 @@ class ProspectusService:
             )
 
             # Log successful onboarding
-            logger.info(f"Prospectus '{new_prospectus.title}' successfully onboarded with ID {new_prospectus.id}.")
+            logger.info("Prospectus '%s' successfully onboarded with ID %s.", new_prospectus.title, new_prospectus.id)
 
             return response
 
         except Exception as e:
             # Log unexpected exceptions
-            logger.error(f"An unexpected error occurred during tenant onboarding: {str(e)}")
+            logger.error("An unexpected error occurred during tenant onboarding: %s", e)
             raise
 
+    @traced("service.list_prospectus")
     async def list_prospectus(self, page: int, limit: int) -> List[OnboardingNewProspectusResponse]:
         """
         Retrieve paginated list of Prospectus.
@@ -91,6 +156,25 @@ class ProspectusService:
         dataset = await self.prospectus_repository.get_prospectus(page, limit)
         return [OnboardingNewProspectusResponse.model_validate(item) for item in dataset]
 
+    @traced("service.stage_dwell")
+    async def stage_dwell(self, since_hours: Optional[int] = None) -> List[StageDwell]:
+        """
+        Retrieve the p50/p95 time spent in each stage, from the stage history.
+
+        Args:
+            since_hours (Optional[int]): Only count transitions of the last hours; all of them when None.
+
+        Returns:
+            List[StageDwell]: Dwell-time percentiles per stage.
+        """
+        since = datetime.utcnow() - timedelta(hours=since_hours) if since_hours else None
+        rows = await self.prospectus_repository.get_stage_dwell(since)
+        return [
+            StageDwell(stage=stage, transitions=transitions, p50_seconds=p50, p95_seconds=p95)
+            for stage, transitions, p50, p95 in rows
+        ]
+
+    @traced("service.get_prospectus")
     async def get_prospectus(self, id: UUID) -> Optional[OnboardingNewProspectusResponse]:
         """
         Retrieve paginated list of Prospectus.
@@ -102,12 +186,96 @@ class ProspectusService:
             List[OnboardingNewProspectusResponse]: Paginated prospectus data.
             :param id:
         """
-        return await self.prospectus_repository.get_prospectus_by_id(id)
+        data = await ProspectusCache.get(str(id), lambda: self._prospectus_data(id))
+        return OnboardingNewProspectusResponse.model_validate(data) if data is not None else None
+
+    def _shared_session(self) -> Session:
+        """
+        A short-lived session for a load shared by concurrent callers (`Singleflight`). The shared
+        task can outlive the request that started it, whose session is closed when its client goes
+        away, so it must not read through that session. The client is carried over for read-your-writes.
+        """
+        dbsession: Session = Db.SessionFactory()
+        dbsession.info["client"] = self.db_session.info.get("client")
+        return dbsession
+
+    async def _prospectus_data(self, id: UUID) -> Optional[dict]:
+        dbsession = self._shared_session()
+        try:
+            found = await ProspectusRepository(dbsession).get_prospectus_by_ids([id])
+            if not found:
+                return None
+            return OnboardingNewProspectusResponse.model_validate(found[0]).model_dump(mode="json")
+        finally:
+            dbsession.close()
+
+    @traced("service.lookup_prospectus")
+    async def lookup_prospectus(self, ids: List[UUID]) -> List[OnboardingNewProspectusResponse]:
+        """
+        Resolve many prospectus with a single query.
+
+        Args:
+            ids (List[UUID]): The identifiers to resolve; duplicates are resolved once.
+
+        Returns:
+            List[OnboardingNewProspectusResponse]: The prospectus found, in the order requested.
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        dataset = await self.prospectus_loader.load_many(unique_ids)
+        return [OnboardingNewProspectusResponse.model_validate(item) for item in dataset if item is not None]
+
+    @traced("service.prospectus_validator")
+    async def prospectus_validator(self, id: UUID) -> Optional[Validator]:
+        """
+        Retrieve the validator of a prospectus from the cache, falling back to a column-only query.
+
+        Args:
+            id (UUID): The unique identifier for the prospectus.
+
+        Returns:
+            Optional[Validator]: The prospectus validator, or None if the prospectus does not exist.
+        """
+        validator = await ProspectusValidators.fetch(id)
+        if validator is None:
+            # Concurrent misses of the same id share one query
+            validator = await ValidatorFlights.do(id, lambda: self._load_validator(id))
+        return validator
+
+    async def _load_validator(self, id: UUID) -> Optional[Validator]:
+        dbsession = self._shared_session()
+        try:
+            row = await ProspectusRepository(dbsession).get_prospectus_validator(id)
+        finally:
+            dbsession.close()
+        if row is None:
+            return None
+        validator = Validator.of([row])
+        await ProspectusValidators.store(id, validator)
+        return validator
+
+    @traced("service.list_prospectus_validator")
+    async def list_prospectus_validator(self, page: int, limit: int) -> Validator:
+        """
+        Derive the validator of a page of prospectus from their `(id, status, updated_at)` columns only.
+
+        Args:
+            page (int): The page number for pagination.
+            limit (int): The number of items per page.
+
+        Returns:
+            Validator: The validator of the page.
+        """
+        rows = await self.prospectus_repository.get_prospectus_validators(page, limit)
+        return Validator.of(rows, scope=f"{page}:{limit}")
 
+    @traced("service.promote_tenant_prospectus")
     async def promote_tenant_prospectus(self,id: UUID) -> OnboardingNewProspectusResponse:
         try:
+            # The transition is decided from this read, so it must not come from a lagging replica
+            Db.pin_primary(self.db_session)
+
             # Delegate the creation of the tenant to the repository
-            prospectus: Prospectus = await self.prospectus_repository.get_prospectus_by_id(id)
+            prospectus: Prospectus = await self.prospectus_loader.load(id)
 
             # Define the stage transitions
             transitions = {
@@ -123,6 +291,12 @@ class ProspectusService:
 
             # Update the prospectus status to the next stage
             updated_prospectus: Prospectus = await self.prospectus_repository.promote_prospectus_status(id, next_stage.value)
+            self.prospectus_loader.prime(id, updated_prospectus)
+            await ProspectusValidators.store(id, Validator.of([(updated_prospectus.id, updated_prospectus.status, updated_prospectus.updated_at)]))
+            await ProspectusCache.store(str(id), OnboardingNewProspectusResponse.model_validate(updated_prospectus).model_dump(mode="json"))
+
+            # Notify the event stream watchers of every pod
+            await AppEvents.publish(str(id), self.status_event(updated_prospectus))
 
             # Generate identity activation link for the prospectus
             if updated_prospectus.status == ProspectusStages.INIT_TENANT_ADMIN_EMAIL_ACTIVATION.value:
@@ -140,9 +314,73 @@ class ProspectusService:
 
         except Exception as e:
             # Log unexpected exceptions
-            logger.error(f"An unexpected error occurred during promoting tenant prospectus: {str(e)}")
+            logger.error("An unexpected error occurred during promoting tenant prospectus: %s", e)
             raise
 
+    @staticmethod
+    def status_event(prospectus: Prospectus) -> dict:
+        return {"id": prospectus.id, "status": prospectus.status, "updated_at": prospectus.updated_at}
+
+    @traced("service.watch_prospectus")
+    async def watch_prospectus(self, id: UUID) -> AsyncIterator[str]:
+        """
+        Opens a Server-Sent Events stream of the prospectus stage transitions.
+
+        Args:
+            id (UUID): The unique identifier for the prospectus.
+
+        Returns:
+            AsyncIterator[str]: SSE messages: the current status first, then every transition
+                until the terminal stage, with keep-alive comments in between; a single `gone`
+                event when the prospectus was deleted or archived before the stream started.
+
+        Raises:
+            HTTPException: If the prospectus does not exist.
+        """
+        exists = await self.prospectus_repository.get_prospectus_validator(id)
+        # Streams outlive the request, so no pooled connection is held while they are idle
+        self.db_session.close()
+        if exists is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid prospectus id.")
+        return self._prospectus_events(id)
+
+    async def _prospectus_events(self, id: UUID) -> AsyncIterator[str]:
+        terminal = ProspectusStages.INIT_TENANT_PROSPECTUS_INFRASTRUCTURE.value
+
+        async with AppEvents.subscribe(str(id)) as events:
+            # Read the snapshot only once subscribed, so no transition can fall in between,
+            # and from the primary: a lagging replica could miss a transition already published
+            Db.pin_primary(self.db_session)
+            prospectus: Optional[Prospectus] = await self.prospectus_repository.get_prospectus_by_id(id)
+            self.db_session.close()
+            yield f"retry: {int(AppConfigs.SSE_HEARTBEAT_SECONDS * 1000)}\n"
+            if prospectus is None:
+                # Deleted or archived since the existence check: tell the client to stop watching
+                yield sse_message({"id": id}, event="gone")
+                return
+            yield sse_message(self.status_event(prospectus), event="status", id=prospectus.status)
+
+            current = prospectus.status
+            while current != terminal:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=AppConfigs.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                current = event["status"]
+                yield sse_message(event, event="status", id=current)
+
+    async def promote_tenant_prospectus_in_background(self, id: UUID):
+        """
+        Background-task variant of `promote_tenant_prospectus`. The request session is already
+        closed when background tasks run, so the connection it reopens must be released here.
+        """
+        try:
+            await self.promote_tenant_prospectus(id)
+        finally:
+            self.db_session.close()
+
+    @traced("service.identity_activation")
     async def identity_activation(self, id: UUID) -> IdentityActivationResponse:
         """
         Activates identity by generating a secure token if the prospectus is in the correct stage.
@@ -157,7 +395,7 @@ class ProspectusService:
             HTTPException: If the prospectus is not in the expected stage or an error occurs.
         """
         # Retrieve the prospectus by ID
-        prospectus: Prospectus = await self.prospectus_repository.get_prospectus_by_id(id)
+        prospectus: Prospectus = await self.prospectus_loader.load(id)
 
         # Validate the prospectus
         if prospectus is None:
@@ -167,47 +405,41 @@ class ProspectusService:
         if prospectus.status == ProspectusStages.INIT_TENANT_ADMIN_EMAIL_ACTIVATION.value:
             # Generate and return the activation token
             key = await HmacAuthenticator().generate_token(id= prospectus.id, email=prospectus.requester_email, slug=prospectus.slug)
-            await RedisClient.add(f"acl.tp.iv-{prospectus.id}", key, AppConfigs.HMAC_TOKEN_EXPIRATION_SECONDS)
+            await ActivationTokens.add(activation_key(prospectus.id), key, AppConfigs.HMAC_TOKEN_EXPIRATION_SECONDS)
 
             # Structure the activation link
-            activation_link = f"{AppConfigs.SSO_MFA_URL}/auth/identity-verification/{key}?utm_source=tp.iv&utm_scope=email&utm_id={prospectus.id}"
+            link = activation_link(prospectus.id, key)
 
             # Send an Identity Activation email
-            template = EmailTemplates.load("Identity_Activation")
-
             emailprovider = await EmailClient().notify(
-                subject=template.Subject,
+                subject=EmailTemplates.load("Identity_Activation").Subject,
                 sender=EmailSender().NoReply,
                 recipient=prospectus.requester_email,
-                message=(lambda: (
-                    template.Content
-                    .replace("##LINK##", activation_link)
-                    .replace("##EMAIL##", prospectus.requester_email)
-                    .replace("##NAME##", f"{prospectus.requester_first_name} {prospectus.requester_last_name}")
-                ))(),
+                message=activation_message(prospectus, link),
             )
 
-            print(emailprovider)
+            logger.debug("Identity activation email: %s", emailprovider)
 
             response = IdentityActivationResponse(
                 id = prospectus.id,
                 slug = prospectus.slug,
                 title = prospectus.title,
                 status = prospectus.status,
-                activation_link = activation_link
+                activation_link = link
             )
 
-            logger.info(f"Identity activation link successfully generated for prospectus '{prospectus.title}' \n{activation_link}\n")
+            logger.info("Identity activation link successfully generated for prospectus '%s' \n%s\n", prospectus.title, link)
 
             return response
         else:
             # Raise an error if the status does not match the expected stage
-            print(f"Unexpected status: {prospectus.status}. Expected: {ProspectusStages.INIT_TENANT_ADMIN_EMAIL_ACTIVATION.value}")
+            logger.warning("Unexpected status: %s. Expected: %s", prospectus.status, ProspectusStages.INIT_TENANT_ADMIN_EMAIL_ACTIVATION.value)
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="The prospectus is not in the correct stage for activation. Please try again later."
             )
 
+    @traced("service.identity_verification")
     async def identity_verification(self, id: UUID, key: str) -> str:
         """
         Verifies identity by generating a secure token if the prospectus is in the correct stage.
@@ -223,10 +455,10 @@ class ProspectusService:
             HTTPException: If the prospectus is not in the expected stage or the key is invalid.
         """
         # Retrieve the prospectus by ID
-        prospectus = await self.prospectus_repository.get_prospectus_by_id(id)
+        prospectus = await self.prospectus_loader.load(id)
 
         # Validate the prospectus
-        if prospectus:
+        if prospectus is None:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Invalid prospectus id.")
 
         # Validate the current stage of the prospectus
@@ -237,7 +469,7 @@ class ProspectusService:
             )
 
         # Fetch the cached key for the given prospectus
-        partial_cached_key = await RedisClient.fetch(f"acl.tp.iv-{prospectus.id}")
+        partial_cached_key = await fetch_activation_token(prospectus.id)
 
         if partial_cached_key != key:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email activation link expired.")
@@ -245,3 +477,37 @@ class ProspectusService:
         # Verify the token and return a success message
         email = await HmacAuthenticator().verify_token(key)
         return f"Email {email} verified successfully!"
+
+    @traced("service.tenant_infrastructure")
+    async def tenant_infrastructure(self, id: UUID) -> TenantInfrastructureResponse:
+        """
+        Checks the tenant schema or database of a prospectus that reached the infrastructure stage.
+
+        Args:
+            id (UUID): The unique identifier for the prospectus.
+
+        Returns:
+            TenantInfrastructureResponse: Whether the tenant schema or database is reachable.
+
+        Raises:
+            HTTPException: If the prospectus is unknown, not in the infrastructure stage, or the
+            tenant connection budget is exhausted.
+        """
+        prospectus = await self.prospectus_loader.load(id)
+        if prospectus is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prospectus not found.")
+
+        if prospectus.status != ProspectusStages.INIT_TENANT_PROSPECTUS_INFRASTRUCTURE.value:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The prospectus has not reached the infrastructure stage yet."
+            )
+
+        # The tenant session blocks on the connection budget: keep it off the event loop
+        try:
+            ready = await asyncio.to_thread(TenantDb.tenant_ready, prospectus.slug)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        except TimeoutError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        return TenantInfrastructureResponse(id=prospectus.id, slug=prospectus.slug, ready=ready)
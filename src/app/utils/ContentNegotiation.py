@@ -0,0 +1,141 @@
+import json
+import msgpack
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+from uuid import UUID
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+MSGPACK = "application/msgpack"
+# Media types accepted for MessagePack request bodies
+MSGPACK_TYPES = frozenset({MSGPACK, "application/x-msgpack", "application/vnd.msgpack"})
+
+Model = TypeVar("Model", bound=BaseModel)
+
+def _encode(value: Any) -> Any:
+    # Called by msgpack for anything it cannot encode natively
+    if isinstance(value, UUID):
+        return value.bytes  # 16-byte bin instead of a 36-character string
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+def pack(content: Any) -> bytes:
+    """Encodes `content` (models, lists, dicts) as MessagePack; UUIDs become 16-byte binaries."""
+    return msgpack.packb(content, default=_encode, use_bin_type=True)
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return pack(content)
+
+@lru_cache(maxsize=256)
+def prefers_msgpack(accept: str) -> bool:
+    """
+    Whether an `Accept` header ranks MessagePack at least as high as JSON. JSON wins
+    whenever MessagePack is not listed, so browsers and `*/*` clients are unaffected.
+
+    Args:
+        accept (str): The raw `Accept` header; callers repeat the same few values, hence the cache.
+
+    Returns:
+        bool: True to answer with MessagePack.
+    """
+    msgpack_quality, json_quality = 0.0, 0.0
+    for item in accept.split(","):
+        media_type, _, parameters = item.partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in MSGPACK_TYPES:
+            msgpack_quality = max(msgpack_quality, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_quality = max(json_quality, quality)
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+def representation(request: Request) -> str:
+    """The representation `negotiate` answers `request` with: `msgpack`, or an empty string for JSON."""
+    return "msgpack" if prefers_msgpack(request.headers.get("accept", "")) else ""
+
+def negotiate(request: Request, response: Response, content: Any) -> Any:
+    """
+    Answers with MessagePack when the client prefers it; otherwise returns `content`
+    unchanged for the route's JSON response model.
+
+    Args:
+        request (Request): The request, for its `Accept` header.
+        response (Response): The route's response, whose headers (e.g. `ETag`) are kept.
+        content (Any): The route result; a ready response (e.g. a 304) is passed through.
+
+    Returns:
+        Any: A `MsgPackResponse`, or `content`.
+    """
+    response.headers["Vary"] = "Accept"
+    if isinstance(content, Response):
+        content.headers["Vary"] = "Accept"
+        return content
+    if not prefers_msgpack(request.headers.get("accept", "")):
+        return content
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return MsgPackResponse(content, status_code=response.status_code or 200, headers=headers)
+
+async def parse_body(request: Request, model: Type[Model]) -> Model:
+    """
+    Validates a JSON or MessagePack request body (by `Content-Type`) against `model`.
+
+    Raises:
+        RequestValidationError: If the body cannot be decoded or is invalid, as FastAPI does for JSON bodies.
+    """
+    raw = await request.body()
+    is_msgpack = request.headers.get("content-type", "").partition(";")[0].strip().lower() in MSGPACK_TYPES
+    try:
+        data = unpack(raw) if is_msgpack else json.loads(raw)
+    except (ValueError, TypeError, msgpack.UnpackException) as e:
+        raise RequestValidationError([{
+            "type": "msgpack_invalid" if is_msgpack else "json_invalid",
+            "loc": ("body",),
+            "msg": "MessagePack decode error" if is_msgpack else "JSON decode error",
+            "input": {},
+            "ctx": {"error": str(e)},
+        }])
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False, include_context=False)]
+        if is_msgpack:
+            # MessagePack bodies may hold binary values, which the JSON error response cannot echo
+            errors = [{key: value for key, value in error.items() if key != "input"} for error in errors]
+        raise RequestValidationError(errors, body=None if is_msgpack else data)
+
+def body(model: Type[Model]) -> Callable[[Request], Awaitable[Model]]:
+    """A dependency reading the request body as `model`, from JSON or MessagePack."""
+    async def dependency(request: Request) -> Model:
+        return await parse_body(request, model)
+    return dependency
+
+def request_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    """The OpenAPI `requestBody` of a route taking `body(model)`."""
+    schema = model.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}, MSGPACK: {"schema": schema}},
+        }
+    }
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class DataLoader(Generic[K, V]):
+    """
+    Batching, memoizing loader meant to live for a single request.
+
+    Keys requested while the event loop is busy with the current step are
+    collected and resolved by one `batch_load` call once it yields; a key that
+    was already requested is answered from the memo without another lookup.
+    Failed batches are not memoized, so a later call retries them.
+    """
+
+    def __init__(self, batch_load: Callable[[List[K]], Awaitable[Dict[K, V]]], max_batch_size: int = 100):
+        """
+        Args:
+            batch_load (Callable[[List[K]], Awaitable[Dict[K, V]]]): Resolves many keys at once;
+                keys missing from the returned mapping resolve to `None`.
+            max_batch_size (int): The most keys handed to one `batch_load` call.
+        """
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self._memo: Dict[K, asyncio.Future] = {}
+        self._pending: List[Tuple[K, asyncio.Future]] = []
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def load(self, key: K) -> Optional[V]:
+        return await self._future(key)
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self._future(key) for key in keys)))
+
+    def prime(self, key: K, value: Optional[V]):
+        """Stores a known value, replacing whatever was memoized (e.g. after a write)."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._memo[key] = future
+
+    def clear(self, key: K):
+        self._memo.pop(key, None)
+
+    def _future(self, key: K) -> asyncio.Future:
+        future = self._memo.get(key)
+        if future is None:
+            future = self._memo[key] = asyncio.get_running_loop().create_future()
+            self._pending.append((key, future))
+            if self._dispatcher is None:
+                # Runs once the current step yields, so keys requested together share a batch
+                self._dispatcher = asyncio.create_task(self._dispatch())
+        return future
+
+    async def _dispatch(self):
+        pending, self._pending, self._dispatcher = self._pending, [], None
+        for start in range(0, len(pending), self.max_batch_size):
+            batch = pending[start:start + self.max_batch_size]
+            try:
+                found = await self.batch_load([key for key, _ in batch])
+            except Exception as e:
+                for key, future in batch:
+                    if self._memo.get(key) is future:
+                        del self._memo[key]
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for key, future in batch:
+                if not future.done():
+                    future.set_result(found.get(key))
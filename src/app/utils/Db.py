@@ -1,22 +1,361 @@
+import math
+import time
+import asyncio
+import logging
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Any, Generator
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from typing import Any, Dict, Generator, Iterator, List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from src.config import AppConfigs
+from src.app.utils.Metrics import AppMetrics
+from src.app.utils.Resilience import Breakers
+
+# Initialize logging
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
-engine = create_engine(AppConfigs.DB_CONNECTION_STRING, echo=False)
+@dataclass
+class QueryStats:
+    """
+    Query counters collected for a single request (or an explicit measuring block).
+    """
+    count: int = 0
+    duration: float = 0.0  # Total time spent in the database, in seconds
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+# Stats of the request currently being served; `None` when nothing is measuring
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Response headers emitted in debug mode
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by `query_budget` when a block issues more queries than allowed."""
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Describe bound parameters by their types only, so slow-query logs never carry user data.
+
+    Args:
+        parameters (Any): The DBAPI parameters of the statement.
+        executemany (bool): Whether the statement was executed with a parameter list.
+
+    Returns:
+        Any: A structure mirroring the parameters with values replaced by type names.
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else None
+        return f"{len(parameters)} x {first}"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+# Connection failures and timeouts trip the breaker; they are recorded by the engine hooks below
+DatabaseBreaker = Breakers.register("database", trip_on=(OperationalError,))
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Timeout settings for an engine on `url`, so a degraded database fails fast instead of hanging workers.
+
+    Args:
+        url (str): The connection string of the engine.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for `create_engine`.
+    """
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    return {
+        "pool_timeout": AppConfigs.DB_POOL_TIMEOUT_SECONDS,
+        "connect_args": {
+            "connect_timeout": AppConfigs.DB_CONNECT_TIMEOUT_SECONDS,
+            "options": f"-c statement_timeout={AppConfigs.DB_STATEMENT_TIMEOUT_MS}",
+        },
+    }
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+    if DatabaseBreaker.state != DatabaseBreaker.CLOSED:
+        # Half-open: the first statement takes the single probe slot, the others are refused until it reports back
+        DatabaseBreaker.check()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    DatabaseBreaker.record_success()
+
+    # Attach the query to the request currently being measured
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    # Log statements above the configured threshold
+    if elapsed * 1000 >= AppConfigs.DB_SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "Slow query (%.1f ms): %s | parameters: %s",
+            elapsed * 1000, statement, parameter_shape(parameters, executemany)
+        )
+
+def _handle_error(exception_context):
+    # Failed statements never reach `after_cursor_execute`; drop their start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+    # Lost connections, connect failures and statement timeouts count against the database
+    if exception_context.is_disconnect or isinstance(exception_context.sqlalchemy_exception, OperationalError):
+        DatabaseBreaker.record_failure()
+
+def instrument(bind: Engine) -> Engine:
+    """
+    Registers the query counting and slow-query hooks on an engine.
+
+    Args:
+        bind (Engine): The SQLAlchemy engine to instrument.
+
+    Returns:
+        Engine: The same engine, for chaining.
+    """
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+    event.listen(bind, "handle_error", _handle_error)
+    return bind
+
+engine = instrument(create_engine(AppConfigs.DB_CONNECTION_STRING, echo=False, **engine_options(AppConfigs.DB_CONNECTION_STRING)))
+
+replica_lag = AppMetrics.gauge("db_replica_lag_seconds", "Replication lag of each read replica (inf when unreachable).", ["replica"])
+replica_fallbacks = AppMetrics.counter("db_replica_fallback_total", "Read-only statements sent to the primary instead of a replica.", ["reason"])
+
+class Replica:
+    """A read replica engine and its last measured replication lag."""
+
+    def __init__(self, name: str, bind: Engine):
+        self.name = name
+        self.engine = bind
+        self.lag: float = 0.0
+
+class ReplicaRouter:
+    """
+    Picks the engine for read-only statements: a replica whose lag is within
+    `DB_REPLICA_MAX_LAG_SECONDS`, unless the client wrote recently, in which case
+    the primary serves it for `DB_READ_YOUR_WRITES_SECONDS`.
+    """
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+    MAX_TRACKED_CLIENTS = 10_000
+
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self._round_robin = itertools.count()
+        self._recent_writes: Dict[str, float] = {}
+
+    def record_write(self, client: Optional[str]):
+        if not client or not self.replicas:
+            return
+        now = time.monotonic()
+        if len(self._recent_writes) >= self.MAX_TRACKED_CLIENTS:
+            # Forget clients whose read-your-writes window has closed
+            horizon = now - AppConfigs.DB_READ_YOUR_WRITES_SECONDS
+            self._recent_writes = {key: at for key, at in self._recent_writes.items() if at > horizon}
+        self._recent_writes[client] = now
+
+    def wrote_recently(self, client: Optional[str]) -> bool:
+        written_at = self._recent_writes.get(client) if client else None
+        return written_at is not None and time.monotonic() - written_at < AppConfigs.DB_READ_YOUR_WRITES_SECONDS
+
+    def choose(self) -> Optional[Engine]:
+        healthy = [replica for replica in self.replicas if replica.lag <= AppConfigs.DB_REPLICA_MAX_LAG_SECONDS]
+        if not healthy:
+            replica_fallbacks.inc(reason="lag")
+            return None
+        return healthy[next(self._round_robin) % len(healthy)].engine
 
-def session() -> Generator[Session, None, None]:
+    def refresh_lag(self):
+        """Measures the lag of every replica; unreachable replicas get infinite lag."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    if connection.dialect.name == "postgresql":
+                        replica.lag = float(connection.execute(self.LAG_QUERY).scalar() or 0.0)
+                    else:
+                        replica.lag = 0.0
+            except Exception as e:
+                logger.warning("Replica '%s' is unreachable: %s", replica.name, e)
+                replica.lag = math.inf
+            replica_lag.set(replica.lag, replica=replica.name)
 
-    dbsession: Session = scoped_session(
-        sessionmaker(autoflush=False, autocommit=False, bind=engine)
-    )()
+    async def monitor(self):
+        """Refreshes replica lag forever; run as a background task from the lifespan."""
+        while True:
+            await asyncio.to_thread(self.refresh_lag)
+            await asyncio.sleep(AppConfigs.DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS)
+
+replica_router = ReplicaRouter([
+    Replica(str(index), instrument(create_engine(url.strip(), echo=False, **engine_options(url.strip()))))
+    for index, url in enumerate(AppConfigs.DB_REPLICA_CONNECTION_STRINGS.split(","))
+    if url.strip()
+])
+
+class RoutingSession(Session):
+    """
+    Session that sends statements issued inside `replica_reads` to a replica and
+    everything else (including flushes) to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if replica_router.replicas and self.info.get("replica_reads") and not self._flushing:
+            if self.info.get("pin_primary"):
+                replica_fallbacks.inc(reason="pinned")
+            elif replica_router.wrote_recently(self.info.get("client")):
+                replica_fallbacks.inc(reason="read_your_writes")
+            else:
+                replica = replica_router.choose()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _record_write(dbsession: Session, flush_context):
+    # Later reads of this session, and of this client for a while, must see the write
+    dbsession.info["pin_primary"] = True
+    replica_router.record_write(dbsession.info.get("client"))
+
+SessionFactory = sessionmaker(class_=RoutingSession, autoflush=False, autocommit=False, bind=engine)
+
+@contextmanager
+def replica_reads(dbsession: Session) -> Iterator[Session]:
+    """
+    Marks the statements issued inside the block as read-only, so they may be served by a replica.
+
+    Args:
+        dbsession (Session): The request session.
+    """
+    previous = dbsession.info.get("replica_reads", False)
+    dbsession.info["replica_reads"] = True
+    try:
+        yield dbsession
+    finally:
+        dbsession.info["replica_reads"] = previous
+
+def pin_primary(dbsession: Session) -> Session:
+    """
+    Sends every later statement of the session to the primary, e.g. before a read-modify-write.
+
+    Args:
+        dbsession (Session): The request session.
+    """
+    dbsession.info["pin_primary"] = True
+    return dbsession
+
+def warmup() -> None:
+    """
+    Opens the pooled connections ahead of the first request. Runs from the application
+    lifespan, never at import time. The schema is managed by the migrations; missing tables
+    are only created here when `DB_CREATE_TABLES` is set, for local development.
+    """
+    if AppConfigs.DB_CREATE_TABLES:
+        Base.metadata.create_all(engine)
+
+    # Pre-connect every pool in parallel, then hand the connections back
+    binds = [engine] + [replica.engine for replica in replica_router.replicas]
+    sizes = [bind.pool.size() if isinstance(bind.pool, QueuePool) else 1 for bind in binds]
+    with ThreadPoolExecutor(max_workers=sum(sizes)) as executor:
+        connections = list(executor.map(lambda bind: bind.connect(), [bind for bind, size in zip(binds, sizes) for _ in range(size)]))
+    for connection in connections:
+        connection.close()
+
+    if replica_router.replicas:
+        replica_router.refresh_lag()
+
+def after_fork() -> None:
+    """
+    Drops the pooled connections inherited from the parent process (e.g. a preloading
+    server master) without closing them, so the child opens its own and never shares a socket.
+    """
+    for bind in [engine] + [replica.engine for replica in replica_router.replicas]:
+        bind.dispose(close=False)
+
+def session(request: Request = None) -> Generator[Session, None, None]:
+
+    # Fail fast while the database breaker is open (raises CircuitOpenError, answered with 503).
+    # Opening a session is not the probe: a request served from a cache may never run a query,
+    # so the probe is taken by the first statement executed (see `_before_cursor_execute`)
+    DatabaseBreaker.check_open()
+    dbsession: Session = SessionFactory()
+
+    # Identify the client for the read-your-writes window
+    if request is not None and request.client is not None:
+        dbsession.info["client"] = request.client.host
     try:
         yield dbsession
     except Exception:
         dbsession.rollback()
         raise
     finally:
-        dbsession.close()
\ No newline at end of file
+        dbsession.close()
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block") -> Iterator[QueryStats]:
+    """
+    Test helper that fails when the wrapped block issues more than `max_queries` queries.
+
+    Example:
+        with Db.query_budget(4, "onboarding"):
+            await ProspectusService(db_session).onboarding_new_prospectus(tasks, payload)
+
+    Args:
+        max_queries (int): The maximum number of queries the block may issue.
+        label (str): A name for the block, used in the failure message.
+
+    Raises:
+        QueryBudgetExceeded: If the block issued more queries than allowed.
+    """
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"'{label}' issued {stats.count} queries ({stats.duration_ms:.1f} ms), budget is {max_queries}."
+        )
+
+def assert_query_budget(response: Any, max_queries: int) -> None:
+    """
+    Test helper that fails when an endpoint response reports more queries than allowed.
+    The application must run with `DEBUG` enabled so the query headers are emitted.
+
+    Args:
+        response (Any): A response object exposing `headers` (e.g. from `TestClient`).
+        max_queries (int): The query budget of the endpoint.
+
+    Raises:
+        QueryBudgetExceeded: If the endpoint exceeded its query budget.
+    """
+    count = response.headers.get(QUERY_COUNT_HEADER)
+    if count is None:
+        raise QueryBudgetExceeded(f"Response carries no '{QUERY_COUNT_HEADER}' header; is DEBUG enabled?")
+    if int(count) > max_queries:
+        raise QueryBudgetExceeded(
+            f"Endpoint issued {count} queries ({response.headers.get(QUERY_TIME_HEADER)} ms), budget is {max_queries}."
+        )
@@ -0,0 +1,108 @@
+import json
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set
+from src.config import AppConfigs
+from src.app.utils.Redis import RedisClient
+from src.app.utils.Metrics import AppMetrics
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+event_subscribers = AppMetrics.gauge("event_subscribers", "Event stream subscribers connected to this pod.")
+events_delivered = AppMetrics.counter("events_delivered_total", "Events handed to local subscribers.")
+events_dropped = AppMetrics.counter("events_dropped_total", "Events dropped because a subscriber fell behind.")
+
+class EventHub:
+    """
+    Fans events published on one Redis pub/sub channel out to the local subscribers of each topic.
+
+    Every pod holds a single Redis subscription, whatever the number of connected
+    clients; a subscriber is only an in-memory queue, so idle watchers cost no
+    Redis or database work. Each queue keeps the latest `queue_size` events and
+    drops the oldest when a slow client falls behind.
+    """
+
+    def __init__(self, channel: str, queue_size: int = 16):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def publish(self, topic: str, event: dict):
+        """Publishes an event to every pod; failures are logged, never raised."""
+        try:
+            await RedisClient.publish(self.channel, json.dumps({"topic": topic, "event": event}, default=str))
+        except Exception as e:
+            logger.warning("Could not publish event on '%s': %s", topic, e)
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str) -> AsyncIterator[asyncio.Queue]:
+        """Registers a local subscriber queue for `topic` for the duration of the context."""
+        subscriber = asyncio.Queue(maxsize=self.queue_size)
+        self._topics.setdefault(topic, set()).add(subscriber)
+        event_subscribers.inc()
+        try:
+            yield subscriber
+        finally:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._topics[topic]
+            event_subscribers.dec()
+
+    def dispatch(self, raw: str):
+        message = json.loads(raw)
+        for subscriber in self._topics.get(message["topic"], ()):
+            if subscriber.full():
+                subscriber.get_nowait()
+                events_dropped.inc()
+            subscriber.put_nowait(message["event"])
+            events_delivered.inc()
+
+    async def listen(self):
+        """Holds this pod's Redis subscription forever; run as a background task from the lifespan."""
+        delay = 1.0
+        while True:
+            pubsub = None
+            try:
+                pubsub = RedisClient.client.pubsub(ignore_subscribe_messages=True)
+                await asyncio.to_thread(pubsub.subscribe, self.channel)
+                delay = 1.0
+                while True:
+                    message = await asyncio.to_thread(pubsub.get_message, timeout=1.0)
+                    if message is not None and message["type"] == "message":
+                        self.dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Event subscription on '%s' lost, retrying in %.0fs: %s", self.channel, delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+
+# Create a shared EventHub instance
+AppEvents = EventHub(AppConfigs.EVENTS_CHANNEL)
+
+def sse_message(data: dict, event: str = None, id: str = None) -> str:
+    """
+    Formats one Server-Sent Events message.
+
+    Args:
+        data (dict): The payload, sent as JSON.
+        event (str): The event type.
+        id (str): The event id, echoed back by browsers in `Last-Event-ID` on reconnect.
+
+    Returns:
+        str: The encoded message.
+    """
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
@@ -10,14 +10,19 @@ from fastapi import HTTPException, status
 
 from src.app.model.Prospectus import Prospectus
 from src.config import AppConfigs
+from src.app.utils.Tracing import traced
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
+# Length of the raw HMAC-SHA256 digest ending every token
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
 class HmacAuthenticator:
     def __init__(self):
         pass
 
+    @traced("hmac.generate_token")
     async def generate_token(self, id:UUID, email: str, slug: str) -> str:
         """
         Generate a secure, time-bound, URL-safe token.
@@ -48,12 +53,14 @@ class HmacAuthenticator:
 
         return token
 
+    @traced("hmac.verify_token")
     async def verify_token(self, key: str) -> str:
         """Verify the token's integrity and expiration."""
         try:
             # Decode the token and split into message and signature
             decoded = base64.urlsafe_b64decode(key.encode())
-            message, signature = decoded.rsplit(b".", 1)
+            # The raw digest is fixed-length and may itself contain b".": split it off by size
+            message, signature = decoded[:-SIGNATURE_SIZE - 1], decoded[-SIGNATURE_SIZE:]
 
             # Ensure the secret key is encoded to bytes
             secret_key = AppConfigs.HMAC_SECRET_KEY.encode()
@@ -76,5 +83,5 @@ class HmacAuthenticator:
             return email
         except binascii.Error as e:
             # Catch base64 decoding errors
-            print(f"Error during decoding: {str(e)}")
+            logger.warning("Error during decoding: %s", e)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid identity activation key.")
@@ -0,0 +1,152 @@
+import json
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from fastapi import Request, Response, status
+from src.app.utils.Redis import RedisClient, tagged_key
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# (id, status, updated_at) of a row, the parts its validator is derived from
+ValidatorParts = Tuple[UUID, str, Optional[datetime]]
+
+def _as_utc(moment: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+@dataclass(frozen=True)
+class Validator:
+    """A strong ETag and the Last-Modified time of a representation."""
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    @classmethod
+    def of(cls, rows: Iterable[ValidatorParts], scope: str = "") -> "Validator":
+        """
+        Derives the validator of one or more rows.
+
+        Args:
+            rows (Iterable[ValidatorParts]): The `(id, status, updated_at)` of every row in the representation.
+            scope (str): Anything else the representation depends on, e.g. the page.
+
+        Returns:
+            Validator: A strong ETag over all rows and the latest `updated_at`.
+        """
+        digest = hashlib.sha256(scope.encode("utf-8"))
+        last_modified = None
+        for id, status_, updated_at in rows:
+            digest.update(f"|{id}:{status_}:{updated_at.isoformat() if updated_at else ''}".encode("utf-8"))
+            if updated_at is not None:
+                updated_at = _as_utc(updated_at)
+                last_modified = updated_at if last_modified is None else max(last_modified, updated_at)
+        return cls(etag=f'"{digest.hexdigest()[:32]}"', last_modified=last_modified)
+
+    def variant(self, representation: str) -> "Validator":
+        """
+        The validator of another representation of the same rows, e.g. `msgpack`. A strong
+        ETag promises byte-identical bodies, so each representation needs its own.
+
+        Args:
+            representation (str): The representation's suffix; empty for the default one.
+        """
+        if not representation:
+            return self
+        return Validator(etag=f'{self.etag[:-1]}-{representation}"', last_modified=self.last_modified)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        # no-cache: clients may store the body but must revalidate it on every poll
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def dumps(self) -> str:
+        return json.dumps({"etag": self.etag, "last_modified": self.last_modified.isoformat() if self.last_modified else None})
+
+    @classmethod
+    def loads(cls, raw: str) -> "Validator":
+        data = json.loads(raw)
+        last_modified = datetime.fromisoformat(data["last_modified"]) if data["last_modified"] else None
+        return cls(etag=data["etag"], last_modified=last_modified)
+
+def is_not_modified(request: Request, validator: Validator) -> bool:
+    """
+    Evaluates `If-None-Match` and `If-Modified-Since` for a GET (RFC 9110, section 13.2.2).
+
+    Returns:
+        bool: True when the client's copy is current and a 304 should be sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return validator.etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and validator.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second precision
+        return validator.last_modified.replace(microsecond=0) <= _as_utc(since)
+    return False
+
+def conditional(request: Request, response: Response, validator: Optional[Validator],
+                representation: str = "") -> Optional[Response]:
+    """
+    Answers a conditional GET.
+
+    Args:
+        representation (str): The representation being answered with, see `Validator.variant`.
+
+    Returns:
+        Optional[Response]: A 304 response when the client's copy is current; otherwise `None`,
+            after the validator headers have been set on `response`.
+    """
+    if validator is None:
+        return None
+    validator = validator.variant(representation)
+    if is_not_modified(request, validator):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator.headers)
+    response.headers.update(validator.headers)
+    return None
+
+class ValidatorCache:
+    """Per-entity validators kept in Redis, so polling clients can be answered without a row load."""
+
+    def __init__(self, namespace: str, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, id: UUID) -> str:
+        return tagged_key(self.namespace, id)
+
+    async def fetch(self, id: UUID) -> Optional[Validator]:
+        try:
+            raw = await RedisClient.fetch(self._key(id))
+            return Validator.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning("Validator cache unavailable: %s", e)
+            return None
+
+    async def store(self, id: UUID, validator: Validator):
+        try:
+            await RedisClient.add(self._key(id), validator.dumps(), self.ttl)
+        except Exception as e:
+            logger.warning("Could not cache validator for '%s': %s", id, e)
+
+    async def forget(self, ids: List[UUID]):
+        """Drops the validators of entities that no longer exist."""
+        try:
+            await RedisClient.remove_many([self._key(id) for id in ids])
+        except Exception as e:
+            logger.warning("Could not drop %d cached validators: %s", len(ids), e)
@@ -0,0 +1,153 @@
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from src.config import AppConfigs
+from src.app.utils.Redis import client_for
+from src.app.utils.Metrics import AppMetrics
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Records must outlive LRU pressure, so they live on the durable Redis instance when one is configured
+IdempotencyStore = client_for("idem")
+
+idempotency_requests = AppMetrics.counter(
+    "idempotency_requests_total", "Requests carrying an Idempotency-Key by outcome.", ["route", "result"]
+)
+
+def fingerprint(payload: Any) -> str:
+    """
+    Hashes a request payload so a reused key with a different body can be told apart.
+
+    Args:
+        payload (Any): The JSON-compatible request payload.
+
+    Returns:
+        str: The hex SHA-256 digest of the canonical JSON encoding.
+    """
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def _replay(record: dict) -> JSONResponse:
+    headers = dict(record.get("headers") or {})
+    headers[REPLAYED_HEADER] = "true"
+    return JSONResponse(content=record["body"], status_code=record["status_code"], headers=headers)
+
+async def _store(redis_key: str, record: dict):
+    try:
+        await IdempotencyStore.add(redis_key, json.dumps(record), AppConfigs.IDEMPOTENCY_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Could not store idempotent response for '%s': %s", redis_key, e)
+
+async def _release(redis_key: str):
+    try:
+        await IdempotencyStore.remove(redis_key)
+    except Exception as e:
+        logger.warning("Could not release idempotency marker '%s': %s", redis_key, e)
+
+async def idempotent(
+        route: str,
+        key: Optional[str],
+        payload: Any,
+        handler: Callable[[], Awaitable[Any]],
+        status_code: int = status.HTTP_200_OK,
+) -> Any:
+    """
+    Runs `handler` at most once per `Idempotency-Key` and replays its outcome for retries.
+
+    The first request claims the key with an in-flight marker (SET NX). Concurrent
+    duplicates poll the marker until the stored response appears, then replay it.
+    Successful responses and client errors are stored for `IDEMPOTENCY_TTL_SECONDS`;
+    server errors release the key so the client can retry. Without Redis the
+    handler simply runs.
+
+    Args:
+        route (str): The route name, scoping the key.
+        key (Optional[str]): The `Idempotency-Key` header value; `None` disables the guard.
+        payload (Any): The request body, fingerprinted to detect key reuse.
+        handler (Callable[[], Awaitable[Any]]): Produces the response on first execution.
+        status_code (int): The route's success status code, used for replays.
+
+    Returns:
+        Any: The handler result, or a `JSONResponse` replaying the stored outcome.
+
+    Raises:
+        HTTPException: 400 for an invalid key, 422 when the key was used with a different
+            body, 409 when the original request is still in progress after `IDEMPOTENCY_WAIT_SECONDS`.
+    """
+    if key is None:
+        return await handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The {IDEMPOTENCY_HEADER} header must be between 1 and {MAX_KEY_LENGTH} characters."
+        )
+
+    redis_key = f"idem:{route}:{key}"
+    digest = fingerprint(payload)
+    marker = json.dumps({"state": "in_flight", "fingerprint": digest})
+    deadline = time.monotonic() + AppConfigs.IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.025
+
+    try:
+        while not await IdempotencyStore.add_if_absent(redis_key, marker, AppConfigs.IDEMPOTENCY_LOCK_SECONDS):
+            raw = await IdempotencyStore.fetch(redis_key)
+            if raw is None:
+                # The marker expired or was released in between; try to claim it again
+                continue
+
+            record = json.loads(raw)
+            if record["fingerprint"] != digest:
+                idempotency_requests.inc(route=route, result="mismatch")
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"The {IDEMPOTENCY_HEADER} has already been used with a different request body."
+                )
+            if record["state"] == "done":
+                idempotency_requests.inc(route=route, result="replayed")
+                return _replay(record)
+            if time.monotonic() >= deadline:
+                idempotency_requests.inc(route=route, result="in_progress")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"A request with this {IDEMPOTENCY_HEADER} is still being processed. Please retry later."
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning("Idempotency store unavailable, processing request without it: %s", e)
+        idempotency_requests.inc(route=route, result="bypassed")
+        return await handler()
+
+    idempotency_requests.inc(route=route, result="executed")
+    try:
+        result = await handler()
+    except HTTPException as e:
+        if e.status_code < status.HTTP_500_INTERNAL_SERVER_ERROR:
+            await _store(redis_key, {
+                "state": "done", "fingerprint": digest, "status_code": e.status_code,
+                "body": {"detail": jsonable_encoder(e.detail)}, "headers": e.headers,
+            })
+        else:
+            await _release(redis_key)
+        raise
+    except BaseException:
+        await _release(redis_key)
+        raise
+
+    await _store(redis_key, {
+        "state": "done", "fingerprint": digest, "status_code": status_code, "body": jsonable_encoder(result),
+    })
+    return result
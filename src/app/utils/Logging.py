@@ -0,0 +1,149 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from src.config import AppConfigs
+from src.app.utils.Tracing import current_span
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_RECORD_ATTRIBUTES = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of the records below WARNING for the loggers listed in
+    `rates` (the longest matching logger name prefix wins); warnings and errors
+    are always kept. Kept records carry their `sample_rate` so counts can be scaled back.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(sorted(rates.items(), key=lambda item: len(item[0]), reverse=True))
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        if name not in self._resolved:
+            self._resolved[name] = next(
+                (rate for prefix, rate in self.rates.items() if name == prefix or name.startswith(prefix + ".")), None
+            )
+        return self._resolved[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+class ContextFilter(logging.Filter):
+    """Tags records with the trace of the request that emitted them, while still on the request's task."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = current_span.get()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Renders the message and traceback on the calling thread, as the stock `prepare`
+    does, so `%`-style arguments (ORM instances included) are never touched from the
+    listener thread after the caller moved on. Unlike the stock `prepare`, the traceback
+    is kept apart from the message, so the JSON formatter still emits it as its own field.
+    """
+    _formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_fork_hook_registered = False
+
+def _after_fork() -> None:
+    # The listener thread does not survive fork(), and records still queued in the
+    # parent would be written twice: start over with a new queue and listener
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure()
+
+def configure() -> None:
+    """
+    Routes every log record through an in-memory queue to a listener thread that
+    formats and writes it (JSON or text per `LOG_FORMAT`), so logging never blocks
+    the event loop on I/O. Uvicorn's loggers are routed the same way.
+    """
+    global _listener, _fork_hook_registered
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(
+        JsonFormatter() if AppConfigs.LOG_FORMAT == "json"
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(SamplingFilter(AppConfigs.LOG_SAMPLING))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(AppConfigs.LOG_LEVEL.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers[:] = []
+        server_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+    if not _fork_hook_registered:
+        os.register_at_fork(after_in_child=_after_fork)
+        _fork_hook_registered = True
+
+def shutdown() -> None:
+    """Writes out the records still queued and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
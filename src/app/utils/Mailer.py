@@ -1,18 +1,59 @@
+import re
 import ssl
+import asyncio
 import logging
 import smtplib
+import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Union
+from typing import Iterator, List, Tuple, Union
 from email.message import EmailMessage
 from fastapi import BackgroundTasks
 from src.config import AppConfigs
+from src.app.utils.Tracing import traced
+from src.app.utils.Resilience import Breakers
+from src.app.utils.Metrics import AppMetrics
 from dataclasses import dataclass
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Placeholders look like ##NAME##
+_PLACEHOLDER = re.compile(r"##([A-Z_]+)##")
+
+# Outcomes are recorded by `EmailClient.dispatch_email`; rejected messages or recipients do not count
+SmtpBreaker = Breakers.register("smtp")
+
+# smtplib errors meaning the server could not be reached or dropped the session; the others are its answers
+SMTP_TRANSPORT_ERRORS = (smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected)
+
+mail_deferred = AppMetrics.gauge("mail_deferred_messages", "Emails held until the SMTP server is reachable again.")
+mail_dropped = AppMetrics.counter("mail_deferred_dropped_total", "Deferred emails dropped because the queue was full.")
 
 @dataclass
 class EmailTemplate:
     Subject: str
     Content: str
 
+    def __post_init__(self):
+        # Split once so rendering is a single join; odd segments are placeholder names
+        self._segments = _PLACEHOLDER.split(self.Content)
+
+    def render(self, **placeholders: str) -> str:
+        """
+        Substitutes the `##NAME##` placeholders of the content.
+
+        Args:
+            **placeholders (str): Values keyed by placeholder name, e.g. `LINK=...`.
+
+        Returns:
+            str: The rendered content; unknown placeholders are left as they are.
+        """
+        segments = list(self._segments)
+        for index in range(1, len(segments), 2):
+            name = segments[index]
+            segments[index] = placeholders.get(name, f"##{name}##")
+        return "".join(segments)
+
 class EmailSender:
     def __init__(self):
         pass
@@ -26,56 +67,155 @@ class EmailClient:
         self.username = AppConfigs.SMTP_USER
         self.password = AppConfigs.SMTP_PASSWORD
         self.smtp_server = AppConfigs.SMTP_SERVER
+        self.security = AppConfigs.SMTP_SECURITY
         self.logger = logging.getLogger(__name__)
 
+    @traced("smtp.dispatch_email")
     def dispatch_email(self, recipients: List[str], msg: EmailMessage):
-        """Send an email immediately."""
-        try:
-            if self.port == 465:
-                # SSL connection
-                context = ssl.create_default_context()
-                with smtplib.SMTP_SSL(self.smtp_server, self.port, context=context) as server:
-                    server.login(self.username, self.password)
-                    server.send_message(msg, to_addrs=recipients)
-            elif self.port == 587:
-                # STARTTLS connection
-                with smtplib.SMTP(self.smtp_server, self.port) as server:
+        """Send an email immediately, or defer it while the SMTP breaker is open."""
+        if not SmtpBreaker.allow():
+            DeferredMail.defer(recipients, msg)
+            return {"status": "queued", "message": "SMTP server unavailable; email queued for delivery."}
+        return self._send(recipients, msg)
+
+    @contextmanager
+    def _connection(self) -> Iterator[smtplib.SMTP]:
+        """An authenticated SMTP session; raises ValueError when the connection security cannot be resolved."""
+        # Resolve the connection security; "auto" derives it from the well-known ports
+        security = self.security if self.security != "auto" else {465: "ssl", 587: "starttls"}.get(self.port)
+        timeout = AppConfigs.SMTP_TIMEOUT_SECONDS
+
+        if security == "ssl":
+            # SSL connection
+            context = ssl.create_default_context()
+            with smtplib.SMTP_SSL(self.smtp_server, self.port, context=context, timeout=timeout) as server:
+                server.login(self.username, self.password)
+                yield server
+        elif security in ("starttls", "none"):
+            # STARTTLS connection (plain only for local relays)
+            with smtplib.SMTP(self.smtp_server, self.port, timeout=timeout) as server:
+                if security == "starttls":
                     server.starttls()
-                    server.login(self.username, self.password)
-                    server.send_message(msg, to_addrs=recipients)
-            else:
-                error_message = f"Invalid port: {self.port}. Use 465 for SSL or 587 for STARTTLS."
-                self.logger.error(error_message)
-                return {"status": "error", "message": error_message}
+                server.login(self.username, self.password)
+                yield server
+        else:
+            raise ValueError(f"Invalid port: {self.port}. Use 465 for SSL or 587 for STARTTLS.")
 
+    def _send(self, recipients: List[str], msg: EmailMessage):
+        try:
+            with self._connection() as server:
+                server.send_message(msg, to_addrs=recipients)
+
+            SmtpBreaker.record_success()
             self.logger.info("Email sent successfully!")
             return {"status": "success", "message": "Email sent successfully!"}
+        except SMTP_TRANSPORT_ERRORS as smtp_error:
+            return self._defer_after_failure(recipients, msg, smtp_error)
         except smtplib.SMTPException as smtp_error:
+            # The server answered (refused the message, lacks an extension); it is reachable and a retry would not help
+            SmtpBreaker.record_success()
             error_message = f"SMTP error occurred on server {self.smtp_server}:{self.port} - {smtp_error}"
             self.logger.error(error_message)
             return {"status": "error", "message": error_message}
+        except OSError as e:
+            # Timeouts, refused connections and dropped sessions (smtplib errors are OSErrors too)
+            return self._defer_after_failure(recipients, msg, e)
+        except ValueError as e:
+            self.logger.error(str(e))
+            return {"status": "error", "message": str(e)}
         except Exception as e:
             error_message = f"Unexpected error: {e}"
             self.logger.error(error_message)
             return {"status": "error", "message": error_message}
 
-    async def notify(
+    @traced("smtp.dispatch_many")
+    def dispatch_many(self, batch: List[Tuple[List[str], EmailMessage]], defer: bool = True) -> List[str]:
+        """
+        Send many emails over a single SMTP session, e.g. from a batch job.
+
+        Emails the server refuses are reported as errors. When the server is
+        unreachable, the emails not sent yet are deferred like `dispatch_email`
+        does, or left to the caller with `defer=False`.
+
+        Args:
+            batch (List[Tuple[List[str], EmailMessage]]): `(recipients, message)` pairs.
+            defer (bool): Whether to queue the unsent emails for retry.
+
+        Returns:
+            List[str]: The outcome of each email, in order: `success`, `error`, `queued` or `unsent`.
+        """
+        outcomes: List[str] = []
+        unsent = "queued" if defer else "unsent"
+        if not SmtpBreaker.allow():
+            if defer:
+                for recipients, msg in batch:
+                    DeferredMail.defer(recipients, msg)
+            return [unsent] * len(batch)
+
+        try:
+            with self._connection() as server:
+                for recipients, msg in batch:
+                    try:
+                        server.send_message(msg, to_addrs=recipients)
+                        outcomes.append("success")
+                    except SMTP_TRANSPORT_ERRORS:
+                        raise
+                    except smtplib.SMTPException as smtp_error:
+                        outcomes.append("error")
+                        self.logger.error("SMTP server %s:%s refused an email to %s - %s", self.smtp_server, self.port, recipients, smtp_error)
+            SmtpBreaker.record_success()
+        except SMTP_TRANSPORT_ERRORS as e:
+            self._unsent(batch, outcomes, defer, e)
+        except smtplib.SMTPException as smtp_error:
+            # Refused the session itself (e.g. authentication); the server is reachable
+            SmtpBreaker.record_success()
+            self.logger.error("SMTP error occurred on server %s:%s - %s", self.smtp_server, self.port, smtp_error)
+            outcomes += ["error"] * (len(batch) - len(outcomes))
+        except OSError as e:
+            self._unsent(batch, outcomes, defer, e)
+        except ValueError as e:
+            self.logger.error(str(e))
+            outcomes += ["error"] * (len(batch) - len(outcomes))
+        return outcomes
+
+    def _unsent(self, batch: List[Tuple[List[str], EmailMessage]], outcomes: List[str], defer: bool, error: OSError):
+        # The server is unreachable: the rest of the batch is deferred, or left to the caller
+        SmtpBreaker.record_failure()
+        self.logger.error("SMTP server %s:%s unavailable, %d emails not sent - %s", self.smtp_server, self.port, len(batch) - len(outcomes), error)
+        if defer:
+            for recipients, msg in batch[len(outcomes):]:
+                DeferredMail.defer(recipients, msg)
+        outcomes += ["queued" if defer else "unsent"] * (len(batch) - len(outcomes))
+
+    def _defer_after_failure(self, recipients: List[str], msg: EmailMessage, error: Exception):
+        SmtpBreaker.record_failure()
+        DeferredMail.defer(recipients, msg)
+        error_message = f"SMTP server {self.smtp_server}:{self.port} unavailable, email queued for retry - {error}"
+        self.logger.error(error_message)
+        return {"status": "queued", "message": error_message}
+
+    def compose(
         self,
         sender: str,
         subject: str,
         message: str,
         recipient: Union[str, List[str]],
-        background_tasks : BackgroundTasks = None,
         html_content: bool = True,
         cc: Union[str, List[str]] = None,
         bcc: Union[str, List[str]] = None,
         attachments: List[Path] = None,
-    ):
-        """Schedule an email to be sent in the background."""
+    ) -> Tuple[List[str], EmailMessage]:
+        """
+        Build an email without sending it.
+
+        Returns:
+            Tuple[List[str], EmailMessage]: Every recipient (including `cc` and `bcc`) and the message.
+
+        Raises:
+            ValueError: If a required field is missing or an attachment does not exist.
+        """
         if not all([subject, sender, recipient, message]):
-            error_message = "Subject, sender, recipient, and message are required."
-            self.logger.error(error_message)
-            return {"status": "error", "message": error_message}
+            raise ValueError("Subject, sender, recipient, and message are required.")
 
         # Create the email message
         msg = EmailMessage()
@@ -93,20 +233,38 @@ class EmailClient:
         if attachments:
             for attachment in attachments:
                 if not attachment.exists() or not attachment.is_file():
-                    error_message = f"Attachment not found: {attachment}"
-                    self.logger.error(error_message)
-                    return {"status": "error", "message": error_message}
+                    raise ValueError(f"Attachment not found: {attachment}")
                 with attachment.open('rb') as file:
                     file_data = file.read()
                     file_name = attachment.name
                     msg.add_attachment(file_data, maintype='application', subtype='octet-stream', filename=file_name)
 
         # Determine all recipients including `bcc`
-        recipients = [recipient] if isinstance(recipient, str) else recipient
+        recipients = [recipient] if isinstance(recipient, str) else list(recipient)
         if cc:
             recipients += [cc] if isinstance(cc, str) else cc
         if bcc:
             recipients += [bcc] if isinstance(bcc, str) else bcc
+        return recipients, msg
+
+    async def notify(
+        self,
+        sender: str,
+        subject: str,
+        message: str,
+        recipient: Union[str, List[str]],
+        background_tasks : BackgroundTasks = None,
+        html_content: bool = True,
+        cc: Union[str, List[str]] = None,
+        bcc: Union[str, List[str]] = None,
+        attachments: List[Path] = None,
+    ):
+        """Schedule an email to be sent in the background."""
+        try:
+            recipients, msg = self.compose(sender, subject, message, recipient, html_content, cc, bcc, attachments)
+        except ValueError as e:
+            self.logger.error(str(e))
+            return {"status": "error", "message": str(e)}
 
         # Trigger email sending in the background
         if background_tasks is not None:
@@ -116,9 +274,64 @@ class EmailClient:
             self.dispatch_email(recipients, msg)
             return "Email send request dispatched for processing."
 
+class MailQueue:
+    """
+    Emails held in memory while the SMTP server is unreachable, retried once the
+    SMTP breaker lets a probe through. Beyond `max_messages` the oldest are dropped.
+    """
+
+    def __init__(self, max_messages: int):
+        self._messages: "deque[Tuple[List[str], EmailMessage]]" = deque(maxlen=max_messages)
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def defer(self, recipients: List[str], msg: EmailMessage):
+        with self._lock:
+            if len(self._messages) == self._messages.maxlen:
+                mail_dropped.inc()
+            self._messages.append((recipients, msg))
+            mail_deferred.set(len(self._messages))
+
+    def flush(self) -> int:
+        """
+        Sends the deferred emails until the queue is empty or the SMTP server fails again.
+
+        Returns:
+            int: The number of emails delivered.
+        """
+        client, delivered = EmailClient(), 0
+        while self._messages and SmtpBreaker.allow():
+            with self._lock:
+                if not self._messages:
+                    break
+                recipients, msg = self._messages.popleft()
+                mail_deferred.set(len(self._messages))
+            result = client._send(recipients, msg)["status"]
+            if result == "queued":
+                # The server failed again: the message is back in the queue and the breaker is open
+                break
+            delivered += result == "success"
+        if delivered:
+            self.logger.info("Delivered %d deferred emails, %d still queued.", delivered, len(self._messages))
+        return delivered
+
+    async def monitor(self):
+        """Retries the deferred emails forever; run as a background task from the lifespan."""
+        while True:
+            await asyncio.sleep(AppConfigs.MAIL_QUEUE_RETRY_SECONDS)
+            if self._messages:
+                await asyncio.to_thread(self.flush)
+
+# Create a shared MailQueue instance
+DeferredMail = MailQueue(AppConfigs.MAIL_QUEUE_MAX_MESSAGES)
+
 class EmailTemplates:
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def load(template_name):
         template = EmailTemplates._TemplateDataset.get(template_name)
         if template:
@@ -128,6 +341,12 @@ class EmailTemplates:
             )
         return None
 
+    @staticmethod
+    def compile():
+        """Loads and pre-splits every template, so the first email pays no parsing cost."""
+        for template_name in EmailTemplates._TemplateDataset:
+            EmailTemplates.load(template_name)
+
 
     _TemplateDataset = {
         "Identity_Activation": {
@@ -0,0 +1,155 @@
+"""
+Helpers for migrations that run against a live database.
+
+`migrations/env.py` runs each revision in its own transaction with
+MIGRATION_LOCK_TIMEOUT_MS and MIGRATION_STATEMENT_TIMEOUT_MS set on PostgreSQL,
+so a DDL statement queued behind a long transaction fails fast instead of
+blocking every query on the table behind it. Index builds and backfills,
+which would hold their locks for a long time, go through the helpers below:
+
+    from src.app.utils import Migrations
+
+    def upgrade() -> None:
+        op.add_column('Prospectus', sa.Column('region', sa.String(), nullable=True))
+        Migrations.create_index_concurrently('ix_Prospectus_region', 'Prospectus', ['region'])
+        prospectus = sa.table('Prospectus', sa.column('id'), sa.column('region'))
+        Migrations.backfill(prospectus, {'region': 'eu'}, prospectus.c.region.is_(None))
+"""
+import time
+import logging
+import contextlib
+from typing import Any, Dict, List, Optional
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.sql import ColumnElement
+from src.config import AppConfigs
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+def _postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+def _outside_transaction():
+    # Each statement commits on its own on PostgreSQL; other databases (SQLite in development) run in the migration's transaction
+    return op.get_context().autocommit_block() if _postgresql() else contextlib.nullcontext()
+
+def _invalid_index(name: str) -> bool:
+    # A CONCURRENTLY build that failed leaves an INVALID index behind, which IF NOT EXISTS would keep
+    return bool(op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": f'"{name}"'},
+    ).scalar())
+
+def create_index_concurrently(name: str, table: str, columns: List[str], unique: bool = False, **kwargs: Any):
+    """
+    Builds an index without blocking writes to the table (PostgreSQL `CREATE INDEX CONCURRENTLY`,
+    outside the migration's transaction and without a statement timeout). Re-running it after a
+    failed build drops the invalid index and starts over; elsewhere it is a plain `create_index`.
+
+    Args:
+        name (str): The index name.
+        table (str): The table name.
+        columns (List[str]): The indexed columns or expressions.
+        unique (bool): Whether to build a unique index.
+        **kwargs: Passed to `op.create_index`, e.g. `postgresql_where`.
+    """
+    if not _postgresql():
+        op.create_index(name, table, columns, unique=unique, **kwargs)
+        return
+
+    with op.get_context().autocommit_block():
+        if not op.get_context().as_sql and _invalid_index(name):
+            logger.warning("Dropping the invalid index '%s' left by an earlier build.", name)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.execute("SET statement_timeout = 0")
+        started = time.monotonic()
+        try:
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+        finally:
+            # The session outlives a failed build; later statements keep their timeout
+            op.execute(f"SET statement_timeout = {AppConfigs.MIGRATION_STATEMENT_TIMEOUT_MS}")
+    if not op.get_context().as_sql:
+        logger.info("Index '%s' on '%s' built in %.1fs.", name, table, time.monotonic() - started)
+
+def drop_index_concurrently(name: str, table: str):
+    """
+    Drops an index without blocking reads and writes on the table (PostgreSQL `DROP INDEX CONCURRENTLY`).
+
+    Args:
+        name (str): The index name.
+        table (str): The table name.
+    """
+    if not _postgresql():
+        op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+def backfill(
+    table: sa.TableClause,
+    values: Dict[str, Any],
+    where: ColumnElement,
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+) -> int:
+    """
+    Updates the rows matching `where` in batches of `batch_size`, each committed on its own on
+    PostgreSQL (so row locks are held for one batch only) and followed by a `pause` that leaves the
+    database room for live traffic. Progress is logged after every batch.
+
+    The backfill resumes where it stopped when the migration is re-run, provided `where`
+    excludes rows already updated (e.g. `column IS NULL` when filling a new column).
+
+    Args:
+        table (sa.TableClause): The table, e.g. `sa.table('Prospectus', sa.column('id'), sa.column('region'))`.
+        values (Dict[str, Any]): Column -> new value (or SQL expression).
+        where (ColumnElement): The rows still to update.
+        key (str): A unique, indexed column to walk the table by.
+        batch_size (int): Rows per batch; defaults to MIGRATION_BACKFILL_BATCH_SIZE.
+        pause (float): Seconds between batches; defaults to MIGRATION_BACKFILL_PAUSE_SECONDS.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    if op.get_context().as_sql:
+        # No result sets in a generated SQL script: emit the update as one statement
+        op.execute(sa.update(table).where(where).values(values))
+        return 0
+
+    batch_size = batch_size or AppConfigs.MIGRATION_BACKFILL_BATCH_SIZE
+    pause = AppConfigs.MIGRATION_BACKFILL_PAUSE_SECONDS if pause is None else pause
+    column = table.c[key]
+    bind = op.get_bind()
+
+    with _outside_transaction():
+        total = bind.execute(sa.select(sa.func.count()).select_from(table).where(where)).scalar()
+        logger.info("Backfilling %d rows of '%s' in batches of %d.", total, table.name, batch_size)
+
+        done, last, started = 0, None, time.monotonic()
+        while True:
+            # Not correlated to the UPDATE's own table: the subquery picks the next batch by itself
+            batch = sa.select(column).where(where).order_by(column).limit(batch_size).correlate(None)
+            if last is not None:
+                batch = batch.where(column > last)
+            updated = bind.execute(
+                sa.update(table).where(column.in_(batch.scalar_subquery())).values(values).returning(column)
+            ).scalars().all()
+            if not updated:
+                break
+
+            done, last = done + len(updated), max(updated)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            remaining = max(total - done, 0)
+            logger.info(
+                "Backfilled %d/%d rows of '%s' (%.0f rows/s, about %.0fs left).",
+                done, total, table.name, done / elapsed, remaining * elapsed / done,
+            )
+            if len(updated) < batch_size:
+                break
+            time.sleep(pause)
+
+    logger.info("Backfill of '%s' done: %d rows in %.1fs.", table.name, done, time.monotonic() - started)
+    return done
@@ -0,0 +1,233 @@
+"""
+On-demand request profiling: profilers, signed triggers and profile storage.
+
+Operators sign a short-lived trigger for the `X-Debug-Profile` header with:
+    python -m src.app.utils.Profiling sign --ttl 600
+"""
+import os
+import sys
+import hmac
+import time
+import uuid
+import base64
+import asyncio
+import hashlib
+import marshal
+import cProfile
+import argparse
+import threading
+from collections import Counter
+from typing import List, Optional, Tuple
+from src.config import AppConfigs
+from src.app.utils.Redis import RedisClient, tagged_key
+from src.app.utils.Metrics import AppMetrics
+
+PROFILE_HEADER = "X-Debug-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+profiles_captured = AppMetrics.counter("profiles_captured_total", "Requests profiled, by trigger.", ["trigger"])
+
+def enabled() -> bool:
+    """Whether any request can be profiled (a `PROFILE_SECRET` or a non-zero `PROFILE_SAMPLE_RATE`)."""
+    return bool(AppConfigs.PROFILE_SECRET) or AppConfigs.PROFILE_SAMPLE_RATE > 0
+
+def sign(expires: int, secret: str = None) -> str:
+    """
+    The `X-Debug-Profile` value that triggers profiling until `expires` (Unix time).
+
+    Args:
+        expires (int): When the trigger stops being accepted.
+        secret (str): Defaults to `PROFILE_SECRET`.
+
+    Returns:
+        str: `<expires>.<hex HMAC-SHA256>`.
+    """
+    secret = AppConfigs.PROFILE_SECRET if secret is None else secret
+    signature = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+def verify(value: str) -> bool:
+    """Whether a header value is a valid, unexpired trigger; always False without a `PROFILE_SECRET`."""
+    if not AppConfigs.PROFILE_SECRET:
+        return False
+    expires, _, _ = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(value, sign(int(expires)))
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (the event loop's) every `interval` seconds from
+    a background thread, for at most `max_seconds`. The result is in the collapsed
+    stack format (`frame;frame;frame count` per line) read by flamegraph.pl and speedscope.
+    """
+    kind, extension = "collapsed", "collapsed.txt"
+
+    def __init__(self, interval: float, max_seconds: float):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.target = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _sample(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stopped.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> bytes:
+        self._stopped.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()).encode()
+
+class DeterministicProfiler:
+    """Every call on the event loop thread through cProfile; the result is a pstats dump (snakeviz, flameprof)."""
+    kind, extension = "pstats", "prof"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self) -> bytes:
+        self.profile.disable()
+        # The same bytes Profile.dump_stats writes, so `pstats.Stats(path)` reads them back
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+def profiler(mode: str):
+    """A new, unstarted profiler for `PROFILE_MODE`."""
+    if mode == "deterministic":
+        return DeterministicProfiler()
+    return SamplingProfiler(AppConfigs.PROFILE_SAMPLE_INTERVAL_SECONDS, AppConfigs.PROFILE_MAX_SECONDS)
+
+class ProfileStore:
+    """
+    Keeps captured profiles in `PROFILE_DIR` (`local`) or in Redis (`redis`, readable
+    from any pod), with an index of the latest ones. Either way a profile is kept for
+    `PROFILE_TTL_SECONDS` at most, and only the latest `INDEX_SIZE` are kept.
+    """
+    INDEX_KEY = "profile.index"
+    INDEX_SIZE = 100
+
+    def __init__(self, backend: str, directory: str, ttl: int):
+        self.backend = backend
+        self.directory = directory
+        self.ttl = ttl
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def _path(self, id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{id}.{extension}")
+
+    def _write(self, id: str, extension: str, data: bytes, label: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(id, extension), "wb") as file:
+            file.write(data)
+        with open(os.path.join(self.directory, "index.txt"), "a", encoding="utf-8") as file:
+            file.write(f"{id} {label}\n")
+        self._prune()
+
+    def _prune(self):
+        # Deletes the profiles beyond the latest INDEX_SIZE or older than the TTL, and their index lines
+        index = os.path.join(self.directory, "index.txt")
+        with open(index, encoding="utf-8") as file:
+            entries = file.readlines()
+        latest = {entry.split(" ", 1)[0] for entry in entries[-self.INDEX_SIZE:]}
+        expired_before = time.time() - self.ttl
+
+        kept = set()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name == "index.txt" or not os.path.isfile(path):
+                continue
+            id = name.split(".", 1)[0]
+            if id in latest and os.path.getmtime(path) >= expired_before:
+                kept.add(id)
+            else:
+                os.remove(path)
+
+        remaining = [entry for entry in entries if entry.split(" ", 1)[0] in kept]
+        if len(remaining) != len(entries):
+            with open(f"{index}.tmp", "w", encoding="utf-8") as file:
+                file.writelines(remaining)
+            os.replace(f"{index}.tmp", index)
+
+    async def save(self, id: str, kind: str, extension: str, data: bytes, label: str):
+        """
+        Stores a profile.
+
+        Args:
+            id (str): The id returned to the client in `X-Profile-Id`.
+            kind (str): `collapsed` or `pstats`.
+            extension (str): The file extension the profile is served with.
+            data (bytes): The profile.
+            label (str): What was profiled, e.g. `GET /api/v1/prospectus 12.5ms`.
+        """
+        if self.backend == "redis":
+            await RedisClient.add(tagged_key("profile", id), f"{kind}:{extension}:{base64.b64encode(data).decode()}", self.ttl)
+            await RedisClient.list_push(self.INDEX_KEY, f"{id} {label}", self.INDEX_SIZE, self.ttl)
+        else:
+            await asyncio.to_thread(self._write, id, extension, data, label)
+
+    async def load(self, id: str) -> Optional[Tuple[str, str, bytes]]:
+        """
+        Returns:
+            Optional[Tuple[str, str, bytes]]: `(kind, extension, data)`, or None if unknown or expired.
+        """
+        if self.backend == "redis":
+            raw = await RedisClient.fetch(tagged_key("profile", id))
+            if raw is None:
+                return None
+            kind, extension, data = raw.split(":", 2)
+            return kind, extension, base64.b64decode(data)
+
+        for candidate in (SamplingProfiler, DeterministicProfiler):
+            path = self._path(id, candidate.extension)
+            if os.path.isfile(path):
+                with open(path, "rb") as file:
+                    return candidate.kind, candidate.extension, file.read()
+        return None
+
+    async def latest(self) -> List[str]:
+        """`<id> <label>` of the latest profiles, newest first."""
+        if self.backend == "redis":
+            return await RedisClient.list_range(self.INDEX_KEY, self.INDEX_SIZE)
+        try:
+            with open(os.path.join(self.directory, "index.txt"), encoding="utf-8") as file:
+                return [line.rstrip("\n") for line in file][-self.INDEX_SIZE:][::-1]
+        except FileNotFoundError:
+            return []
+
+# Create a shared ProfileStore instance
+Profiles = ProfileStore(AppConfigs.PROFILE_STORE, AppConfigs.PROFILE_DIR, AppConfigs.PROFILE_TTL_SECONDS)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    sign_parser = commands.add_parser("sign", help=f"Print a {PROFILE_HEADER} header value.")
+    sign_parser.add_argument("--ttl", type=int, default=600, help="Seconds the trigger stays valid.")
+    args = parser.parse_args(argv)
+
+    if not AppConfigs.PROFILE_SECRET:
+        print("PROFILE_SECRET is not set.", file=sys.stderr)
+        return 1
+    print(f"{PROFILE_HEADER}: {sign(int(time.time()) + args.ttl)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
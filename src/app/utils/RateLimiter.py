@@ -0,0 +1,208 @@
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+from fastapi import HTTPException, Request, status
+from src.config import AppConfigs
+from src.app.utils.Redis import RedisClient
+from src.app.utils.Metrics import AppMetrics
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+rate_limit_decisions = AppMetrics.counter(
+    "rate_limit_decisions_total", "Rate limit decisions per route.", ["route", "result"]
+)
+
+# Sliding-window counter: the previous fixed window is weighted by how much of it still
+# overlaps the sliding window. Both keys share a hash tag, so the script also runs on Redis Cluster.
+# KEYS[1] = current window, KEYS[2] = previous window
+# ARGV[1] = limit, ARGV[2] = window seconds, ARGV[3] = elapsed fraction of the current window
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local weighted = previous * (1 - tonumber(ARGV[3])) + current
+if weighted >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]) * 2)
+return 1
+"""
+
+# Takes back one hit counted in a window, when another key of the same request denied it
+# KEYS[1] = the window the hit was counted in
+UNDO_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') > 0 then
+    return redis.call('DECR', KEYS[1])
+end
+return 0
+"""
+
+def parse_limit(spec: str) -> Tuple[int, int]:
+    """
+    Parses a limit written as "<requests>/<seconds>", e.g. "5/60".
+
+    Returns:
+        Tuple[int, int]: The request limit and the window length in seconds.
+    """
+    requests, seconds = spec.split("/", 1)
+    return int(requests), int(seconds)
+
+class TokenBucket:
+    """Process-local token bucket refilled continuously at `rate` tokens per second."""
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def give_back(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+class RateLimiter:
+    """
+    Distributed sliding-window rate limiter.
+
+    A local token bucket sized to the same limit runs first: when a single pod
+    alone has seen more than the global limit for a key, the request is shed
+    without a Redis round trip. Otherwise the global decision is made atomically
+    in Redis. When Redis is unavailable the limiter fails open.
+    """
+    MAX_LOCAL_BUCKETS = 50_000
+
+    def __init__(self):
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _local_bucket(self, key: str, limit: int, window: int) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(limit, limit / window)
+                if len(self._buckets) > self.MAX_LOCAL_BUCKETS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    async def hit(self, route: str, identity: str, limit: int, window: int, now: Optional[float] = None) -> Optional[int]:
+        """
+        Counts one request of `identity` against the route limit.
+
+        Args:
+            route (str): The route, as in `RATE_LIMITS`.
+            identity (str): Who is counted, e.g. `ip=10.0.0.1`.
+            limit (int): Requests allowed per window.
+            window (int): The window length in seconds.
+            now (Optional[float]): The request time (Unix time); defaults to the current time.
+
+        Returns:
+            Optional[int]: `None` when allowed, otherwise the seconds to wait before retrying.
+        """
+        key = f"rl:{{{route}:{identity}}}"
+        now = time.time() if now is None else now
+        index = int(now // window)
+        retry_after = max(1, math.ceil((index + 1) * window - now))
+
+        if not self._local_bucket(key, limit, window).take():
+            rate_limit_decisions.inc(route=route, result="local_shed")
+            return retry_after
+
+        try:
+            allowed = await RedisClient.evaluate(
+                SLIDING_WINDOW_SCRIPT,
+                keys=[f"{key}:{index}", f"{key}:{index - 1}"],
+                args=[limit, window, (now % window) / window],
+            )
+        except Exception as e:
+            logger.warning("Rate limiter unavailable, allowing request: %s", e)
+            rate_limit_decisions.inc(route=route, result="redis_error")
+            return None
+
+        if not allowed:
+            rate_limit_decisions.inc(route=route, result="denied")
+            return retry_after
+
+        rate_limit_decisions.inc(route=route, result="allowed")
+        return None
+
+    async def undo(self, route: str, identity: str, limit: int, window: int, now: float):
+        """Takes back an allowed `hit` made at `now`, e.g. when another key of the request denied it."""
+        key = f"rl:{{{route}:{identity}}}"
+        self._local_bucket(key, limit, window).give_back()
+        try:
+            await RedisClient.evaluate(UNDO_SCRIPT, keys=[f"{key}:{int(now // window)}"], args=[])
+        except Exception as e:
+            logger.warning("Rate limiter unavailable, hit of '%s' not taken back: %s", key, e)
+
+# Create a shared RateLimiter instance
+AppRateLimiter = RateLimiter()
+
+class RateLimit:
+    """
+    FastAPI dependency enforcing `RATE_LIMITS[route]` on every listed key. A request
+    denied by one key is taken back from the keys that had allowed it.
+
+    Keys:
+        "ip"            the client address (from X-Forwarded-For when sent by a FORWARDED_ALLOW_IPS proxy)
+        "path:<name>"   a path parameter, e.g. "path:id"
+        "body:<field>"  a field of the JSON body, e.g. "body:requester_email"
+    """
+
+    def __init__(self, route: str, keys: Sequence[str] = ("ip",)):
+        self.route = route
+        self.keys = tuple(keys)
+
+    @staticmethod
+    async def _identity(request: Request, key: str) -> Optional[str]:
+        if key == "ip":
+            return request.client.host if request.client else None
+        source, _, name = key.partition(":")
+        if source == "path":
+            return request.path_params.get(name)
+        if source == "body":
+            try:
+                value = (await request.json()).get(name)
+            except (ValueError, AttributeError):
+                # Malformed bodies are rejected by validation later on
+                return None
+            return str(value).strip().lower() if value else None
+        raise ValueError(f"Unknown rate limit key: '{key}'.")
+
+    async def __call__(self, request: Request):
+        spec = AppConfigs.RATE_LIMITS.get(self.route)
+        if not AppConfigs.RATE_LIMIT_ENABLED or not spec:
+            return
+
+        limit, window = parse_limit(spec)
+        now, counted = time.time(), []
+        for key in self.keys:
+            identity = await self._identity(request, key)
+            if identity is None:
+                continue
+            identity = f"{key}={identity}"
+            retry_after = await AppRateLimiter.hit(self.route, identity, limit, window, now)
+            if retry_after is not None:
+                # A denied request must not spend the budget of the keys that allowed it
+                for allowed in counted:
+                    await AppRateLimiter.undo(self.route, allowed, limit, window, now)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests. Please try again later.",
+                    headers={"Retry-After": str(retry_after)},
+                )
+            counted.append(identity)
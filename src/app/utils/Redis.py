@@ -1,37 +1,258 @@
 import redis
+import logging
+from typing import Dict, List, Optional, Tuple
+from redis.cluster import RedisCluster
+from redis.exceptions import ClusterDownError, RedisClusterException
+from redis.sentinel import Sentinel
 from src.config import AppConfigs
+from src.app.utils.Tracing import traced
+from src.app.utils.Resilience import Breakers
+
+# Connection failures, timeouts and a cluster without quorum trip the breaker; command errors do not
+TRIP_ON = (redis.ConnectionError, redis.TimeoutError, ClusterDownError)
+RedisBreaker = Breakers.register("redis", trip_on=TRIP_ON)
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Deletes a key only while it still holds the caller's value, so a newer writer's value survives
+COMPARE_AND_DELETE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def tagged_key(namespace: str, id, *parts) -> str:
+    """
+    Builds `<namespace>:{<id>}[:<part>...]`. Redis Cluster only hashes the part in
+    braces, so every key of one entity lands on one slot and multi-key commands or
+    scripts over them stay valid.
+
+    Args:
+        namespace (str): The key family, e.g. `acl.tp.iv`; also selects the instance (see `client_for`).
+        id: The entity the key belongs to.
+        *parts: Optional suffixes, e.g. `lock`.
+
+    Returns:
+        str: The key.
+    """
+    return ":".join((namespace, f"{{{id}}}") + tuple(str(part) for part in parts))
+
+def _addresses(value: str) -> List[Tuple[str, int]]:
+    # "host:port,host:port" -> [(host, port), ...]
+    return [(host, int(port)) for host, port in (item.strip().rsplit(":", 1) for item in value.split(",") if item.strip())]
 
 class RedisClientConnector:
-    def __init__(self):
+    """
+    A Redis instance, read from the `<prefix>_*` settings. `<prefix>_MODE` selects the
+    topology: `standalone` (HOST/PORT), `cluster` (HOST/PORT of any seed node, the
+    others are discovered) or `sentinel` (SENTINELS, SENTINEL_SERVICE; the current
+    master is resolved and followed across failovers).
+    """
+
+    def __init__(self, name: str = "default", prefix: str = "REDIS"):
+        self.name = name
+        self.prefix = prefix
         self.client = None
+        self.cluster = False
+        self.scripts = {}
+        self.breaker = RedisBreaker if name == "default" else Breakers.register(f"redis.{name}", trip_on=TRIP_ON)
+
+    def _setting(self, field: str):
+        return getattr(AppConfigs, f"{self.prefix}_{field}")
+
+    @property
+    def configured(self) -> bool:
+        return bool(self._setting("HOST") or self._setting("SENTINELS"))
 
     def connect(self):
         """Initialize the Redis connection."""
+        mode = self._setting("MODE")
+        options = dict(
+            username=self._setting("USERNAME") or None,
+            password=self._setting("PASSWORD") or None,
+            decode_responses=True,
+            socket_timeout=AppConfigs.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=AppConfigs.REDIS_CONNECT_TIMEOUT_SECONDS,
+        )
         try:
-            self.client = redis.Redis(
-                host=AppConfigs.REDIS_HOST,
-                port=AppConfigs.REDIS_PORT,
-                password=AppConfigs.REDIS_PASSWORD,
-                username=AppConfigs.REDIS_USERNAME,
-                decode_responses=True,
-            )
+            if mode == "cluster":
+                self.client = RedisCluster(host=self._setting("HOST"), port=int(self._setting("PORT")), **options)
+            elif mode == "sentinel":
+                sentinel = Sentinel(
+                    _addresses(self._setting("SENTINELS")),
+                    socket_timeout=AppConfigs.REDIS_SOCKET_TIMEOUT_SECONDS,
+                    socket_connect_timeout=AppConfigs.REDIS_CONNECT_TIMEOUT_SECONDS,
+                )
+                self.client = sentinel.master_for(self._setting("SENTINEL_SERVICE"), **options)
+            else:
+                self.client = redis.Redis(host=self._setting("HOST"), port=int(self._setting("PORT")), **options)
+            self.cluster = mode == "cluster"
             self.client.ping()  # Check connection
-            print("Redis connected successfully.")
-        except redis.ConnectionError as e:
-            print("Failed to connect to Redis:", e)
+            logger.info("Redis '%s' (%s) connected successfully.", self.name, mode)
+        except (redis.ConnectionError, RedisClusterException) as e:
+            logger.error("Failed to connect to Redis '%s': %s", self.name, e)
             raise e
 
+    @traced("redis.add")
     async def add(self, key: str, value: str, expire: int = None):
         """Set a key-value pair in Redis."""
-        self.client.set(name=key, value=value, ex=expire)
+        with self.breaker.guard():
+            self.client.set(name=key, value=value, ex=expire)
+
+    @traced("redis.add_if_absent")
+    async def add_if_absent(self, key: str, value: str, expire: int = None) -> bool:
+        """Set a key-value pair only if the key does not exist yet (SET NX)."""
+        with self.breaker.guard():
+            return bool(self.client.set(name=key, value=value, ex=expire, nx=True))
 
+    @traced("redis.fetch")
     async def fetch(self, key: str):
         """Get a value from Redis by key."""
-        return self.client.get(name=key)
+        with self.breaker.guard():
+            return self.client.get(name=key)
+
+    @traced("redis.add_many")
+    async def add_many(self, mapping: Dict[str, str], expire: int = None):
+        """Set many key-value pairs with the same expiry in one round trip (pipelined SET)."""
+        with self.breaker.guard():
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipeline.set(name=key, value=value, ex=expire)
+            pipeline.execute()
+
+    @traced("redis.add_many_if_absent")
+    async def add_many_if_absent(self, mapping: Dict[str, str], expire: int = None) -> List[bool]:
+        """Set many key-value pairs, each only if its key does not exist yet (pipelined SET NX); returns which were set."""
+        if not mapping:
+            return []
+        with self.breaker.guard():
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipeline.set(name=key, value=value, ex=expire, nx=True)
+            return [bool(result) for result in pipeline.execute()]
+
+    @traced("redis.fetch_many")
+    async def fetch_many(self, keys: List[str]) -> List[Optional[str]]:
+        """Get many values in one round trip, in the order of `keys` (None for missing keys)."""
+        if not keys:
+            return []
+        with self.breaker.guard():
+            # Keys of different entities hash to different slots; the cluster client splits the read per node
+            return self.client.mget_nonatomic(keys) if self.cluster else self.client.mget(keys)
 
+    @traced("redis.remove")
     async def remove(self, key: str):
         """Delete a key from Redis."""
-        self.client.delete(key)
+        with self.breaker.guard():
+            self.client.delete(key)
+
+    @traced("redis.remove_many")
+    async def remove_many(self, keys: List[str]) -> int:
+        """Delete many keys in one round trip (pipelined DEL, one per key so it also runs on a cluster)."""
+        if not keys:
+            return 0
+        with self.breaker.guard():
+            pipeline = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.delete(key)
+            return sum(pipeline.execute())
+
+    @traced("redis.remove_if_equal")
+    async def remove_if_equal(self, key: str, value: str) -> bool:
+        """Delete a key only while it still holds `value` (compare-and-delete)."""
+        with self.breaker.guard():
+            return bool(self._script(COMPARE_AND_DELETE)(keys=[key], args=[value]))
+
+    @traced("redis.remove_many_if_equal")
+    async def remove_many_if_equal(self, mapping: Dict[str, str]) -> int:
+        """Delete many keys, each only while it still holds its value in `mapping`, in one round trip."""
+        if not mapping:
+            return 0
+        script = self._script(COMPARE_AND_DELETE)
+        with self.breaker.guard():
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                script(keys=[key], args=[value], client=pipeline)
+            return sum(pipeline.execute())
+
+    @traced("redis.publish")
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message on a pub/sub channel."""
+        with self.breaker.guard():
+            return self.client.publish(channel, message)
+
+    @traced("redis.stream_publish")
+    async def stream_publish(self, stream: str, entries: List[Dict[str, str]], maxlen: int = None) -> List[str]:
+        """Append entries to a stream in order (XADD, pipelined in one round trip)."""
+        with self.breaker.guard():
+            pipeline = self.client.pipeline(transaction=False)
+            for fields in entries:
+                pipeline.xadd(stream, fields, maxlen=maxlen, approximate=True)
+            return pipeline.execute()
+
+    @traced("redis.stream_groups")
+    async def stream_groups(self, stream: str) -> List[dict]:
+        """Describe the consumer groups of a stream (XINFO GROUPS); empty when the stream does not exist."""
+        with self.breaker.guard():
+            try:
+                return self.client.xinfo_groups(stream)
+            except redis.ResponseError:
+                return []
+
+    @traced("redis.list_push")
+    async def list_push(self, key: str, value: str, size: int, expire: int = None):
+        """Prepend a value to a list capped at `size` entries (LPUSH, LTRIM and EXPIRE in one round trip)."""
+        with self.breaker.guard():
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.lpush(key, value)
+            pipeline.ltrim(key, 0, size - 1)
+            if expire:
+                pipeline.expire(key, expire)
+            pipeline.execute()
+
+    @traced("redis.list_range")
+    async def list_range(self, key: str, count: int) -> List[str]:
+        """The first `count` entries of a list (LRANGE)."""
+        with self.breaker.guard():
+            return self.client.lrange(key, 0, count - 1)
+
+    @traced("redis.evaluate")
+    async def evaluate(self, script: str, keys: List[str], args: List):
+        """Run a Lua script atomically (EVALSHA, loading the script on first use)."""
+        registered = self._script(script)
+        with self.breaker.guard():
+            return registered(keys=keys, args=args)
+
+    def _script(self, script: str):
+        # Registered once per client; a reconnect (or a stand-in client) registers it again
+        registered = self.scripts.get(script)
+        if registered is None or registered.registered_client is not self.client:
+            registered = self.scripts[script] = self.client.register_script(script)
+        return registered
+
+# Create the shared RedisService instances: caches and counters on the default one, keys
+# that must never be evicted on the durable one (when REDIS_DURABLE_* is configured)
+RedisClient = RedisClientConnector("default", "REDIS")
+DurableRedisClient = RedisClientConnector("durable", "REDIS_DURABLE")
+
+def client_for(namespace: str) -> RedisClientConnector:
+    """
+    The instance holding a key namespace, per `REDIS_NAMESPACE_INSTANCES`.
+
+    Args:
+        namespace (str): The key family, e.g. `acl.tp.iv`.
+
+    Returns:
+        RedisClientConnector: The durable instance when the namespace is mapped to it and it is configured, else the default one.
+    """
+    if AppConfigs.REDIS_NAMESPACE_INSTANCES.get(namespace) == "durable" and DurableRedisClient.configured:
+        return DurableRedisClient
+    return RedisClient
 
-# Create a shared RedisService instance
-RedisClient = RedisClientConnector()
+def connect_all():
+    """Connects every configured instance."""
+    RedisClient.connect()
+    if DurableRedisClient.configured:
+        DurableRedisClient.connect()
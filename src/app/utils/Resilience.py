@@ -0,0 +1,153 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple, Type
+from src.config import AppConfigs
+from src.app.utils.Metrics import AppMetrics
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+breaker_state = AppMetrics.gauge("circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open).", ["dependency"])
+breaker_transitions = AppMetrics.counter("circuit_breaker_transitions_total", "Circuit breaker state changes.", ["dependency", "state"])
+breaker_rejections = AppMetrics.counter("circuit_breaker_rejections_total", "Calls refused while a breaker was open.", ["dependency"])
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, dependency: str, retry_after: float):
+        super().__init__(f"The {dependency} dependency is unavailable. Please retry later.")
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls pass; `failure_threshold` failures in a row open the breaker.
+    Open: calls are refused for `reset_timeout` seconds, so a degraded dependency
+    costs nothing instead of a timeout per request.
+    Half-open: a single probe call is let through; its success closes the breaker,
+    its failure opens it again. A probe that never reports back is replaced after
+    another `reset_timeout`.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, trip_on: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trip_on = trip_on
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self._lock = threading.Lock()
+        breaker_state.set(0, dependency=name)
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logger.warning("Circuit breaker '%s' is now %s.", self.name, state)
+            self.state = state
+            breaker_state.set(self._STATE_VALUES[state], dependency=self.name)
+            breaker_transitions.inc(dependency=self.name, state=state)
+
+    @property
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; in half-open state only the probe is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN)
+                self.probe_started = 0.0
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and now - self.probe_started >= self.reset_timeout:
+                self.probe_started = now
+                return True
+        breaker_rejections.inc(dependency=self.name)
+        return False
+
+    def record_success(self):
+        if self.state == self.CLOSED and not self.failures:
+            # Hot path: nothing to reset
+            return
+        with self._lock:
+            self.failures = 0
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def check(self):
+        """
+        Raises:
+            CircuitOpenError: If the breaker refuses the call.
+        """
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after)
+
+    def check_open(self):
+        """
+        Refuses only while the breaker is open. Unlike `check`, it does not take the half-open
+        probe slot: the caller must still `check` right before it reaches the dependency, so only
+        one call probes it.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN)
+                self.probe_started = 0.0
+            if self.state != self.OPEN:
+                return
+        breaker_rejections.inc(dependency=self.name)
+        raise CircuitOpenError(self.name, self.retry_after)
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Refuses the block while open and records its outcome; only `trip_on` errors count as failures."""
+        self.check()
+        try:
+            yield
+        except self.trip_on:
+            self.record_failure()
+            raise
+        except Exception:
+            # The dependency answered; the error belongs to the caller
+            self.record_success()
+            raise
+        self.record_success()
+
+class BreakerRegistry:
+    """The circuit breakers of this process, keyed by dependency name."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def register(self, name: str, trip_on: Tuple[Type[BaseException], ...] = (Exception,)) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=AppConfigs.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=AppConfigs.BREAKER_RESET_TIMEOUT_SECONDS,
+                trip_on=trip_on,
+            )
+        return breaker
+
+    def snapshot(self) -> Dict[str, str]:
+        return {name: breaker.state for name, breaker in self._breakers.items()}
+
+# Create a shared BreakerRegistry instance
+Breakers = BreakerRegistry()
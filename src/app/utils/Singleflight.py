@@ -0,0 +1,158 @@
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from src.app.utils.Redis import RedisClient, tagged_key
+from src.app.utils.Metrics import AppMetrics
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+singleflight_shared = AppMetrics.counter("singleflight_shared_total", "Loads answered by an identical call already in flight.", ["group"])
+cache_lookups = AppMetrics.counter("read_through_cache_total", "Read-through cache lookups by outcome.", ["cache", "result"])
+
+class Singleflight:
+    """
+    Coalesces identical in-flight loads within this process: while a load for a
+    key runs, every other caller of that key awaits the same result instead of
+    starting its own. The load runs in its own task, so a caller that goes away
+    does not cancel it for the others.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(load())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            singleflight_shared.inc(group=self.group)
+        return await asyncio.shield(task)
+
+class ReadThroughCache:
+    """
+    Redis read-through cache of plain (JSON-serializable) data with stampede protection.
+
+    - Per process, concurrent misses of a key are coalesced by a `Singleflight`.
+    - Across pods, the first to miss takes a short Redis lock (`lock_seconds`, 0 to
+      disable) and the others wait for its value instead of querying as well.
+    - Probabilistic early expiration (XFetch): each read may refresh an entry shortly
+      before it expires, with a probability growing as expiry nears and scaled by how
+      long the value took to compute (`beta`), so hot keys are rebuilt by a single
+      caller while the old value is still served.
+
+    Redis failures degrade to calling the loader directly.
+    """
+
+    def __init__(self, namespace: str, ttl: int, beta: float = 1.0, lock_seconds: float = 0.0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.beta = beta
+        self.lock_seconds = lock_seconds
+        self.flights = Singleflight(namespace)
+
+    def _key(self, key: str, *parts: str) -> str:
+        # The value and its lock share a hash tag, so they live on one cluster slot
+        return tagged_key(self.namespace, key, *parts)
+
+    async def get(self, key: str, load: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """
+        Returns the cached value of `key`, loading and caching it on a miss.
+
+        Args:
+            key (str): The cache key, within the namespace.
+            load (Callable[[], Awaitable[Optional[Any]]]): Produces the value; `None` is returned but not cached.
+
+        Returns:
+            Optional[Any]: The value.
+        """
+        entry = await self._read(key)
+        if entry is not None:
+            # XFetch: refresh early with probability exp(-(expiry - now) / (delta * beta))
+            if time.time() - entry["delta"] * self.beta * math.log(1.0 - random.random()) < entry["expiry"]:
+                cache_lookups.inc(cache=self.namespace, result="hit")
+                return entry["value"]
+            cache_lookups.inc(cache=self.namespace, result="early_refresh")
+            return await self.flights.do(key, lambda: self._refresh(key, load, fallback=entry))
+
+        cache_lookups.inc(cache=self.namespace, result="miss")
+        return await self.flights.do(key, lambda: self._refresh(key, load))
+
+    async def store(self, key: str, value: Any, delta: float = 0.0):
+        """Writes a fresh value, e.g. right after the underlying data changed."""
+        entry = {"value": value, "delta": delta, "expiry": time.time() + self.ttl}
+        try:
+            await RedisClient.add(self._key(key), json.dumps(entry, default=str), self.ttl)
+        except Exception as e:
+            logger.warning("Could not cache '%s': %s", self._key(key), e)
+
+    async def forget(self, keys: List[str]):
+        """Drops cached values, e.g. of entities that no longer exist."""
+        try:
+            await RedisClient.remove_many([self._key(key) for key in keys])
+        except Exception as e:
+            logger.warning("Could not drop %d entries of cache '%s': %s", len(keys), self.namespace, e)
+
+    async def _read(self, key: str) -> Optional[dict]:
+        try:
+            raw = await RedisClient.fetch(self._key(key))
+        except Exception as e:
+            logger.warning("Cache '%s' unavailable, loading directly: %s", self.namespace, e)
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _acquire(self, key: str) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: The token holding the lock, an empty string when loading without
+                the lock (disabled or Redis unavailable), or `None` when another caller holds it.
+        """
+        if not self.lock_seconds:
+            return ""
+        token = uuid.uuid4().hex
+        try:
+            if await RedisClient.add_if_absent(self._key(key, "lock"), token, max(1, math.ceil(self.lock_seconds))):
+                return token
+            return None
+        except Exception:
+            return ""
+
+    async def _release(self, key: str, token: str):
+        try:
+            # A slow load may outlive the lock; leave a lock another caller took since alone
+            await RedisClient.remove_if_equal(self._key(key, "lock"), token)
+        except Exception:
+            pass
+
+    async def _refresh(self, key: str, load: Callable[[], Awaitable[Optional[Any]]], fallback: Optional[dict] = None) -> Optional[Any]:
+        token = await self._acquire(key)
+        if token is None:
+            if fallback is not None:
+                # Another pod is already refreshing; the current value is still valid
+                return fallback["value"]
+            # Another pod is loading a cold key; wait for its value rather than query as well
+            deadline, delay = time.monotonic() + self.lock_seconds, 0.01
+            while time.monotonic() < deadline:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.2)
+                entry = await self._read(key)
+                if entry is not None:
+                    cache_lookups.inc(cache=self.namespace, result="waited")
+                    return entry["value"]
+
+        try:
+            started = time.perf_counter()
+            value = await load()
+            if value is not None:
+                await self.store(key, value, delta=time.perf_counter() - started)
+            return value
+        finally:
+            if token:
+                await self._release(key, token)
@@ -0,0 +1,213 @@
+import re
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from src.config import AppConfigs
+from src.app.utils import Db
+from src.app.utils.Metrics import AppMetrics
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+tenant_engines = AppMetrics.gauge("tenant_db_engines", "Tenant engines currently cached.")
+tenant_sessions = AppMetrics.gauge("tenant_db_sessions_in_use", "Tenant sessions currently open.")
+tenant_evictions = AppMetrics.counter("tenant_db_engine_evictions_total", "Tenant engines disposed.", ["reason"])
+
+# Slugs become schema or database names, so only a safe alphabet is accepted
+_SLUG = re.compile(r"^[a-z0-9][a-z0-9-]{2,24}$")
+
+def tenant_identifier(slug: str) -> str:
+    """
+    Maps a prospectus slug to its schema or database name.
+
+    Args:
+        slug (str): The prospectus slug.
+
+    Returns:
+        str: The identifier built from `TENANT_DB_NAME_TEMPLATE`.
+
+    Raises:
+        ValueError: If the slug is not a valid tenant identifier.
+    """
+    if not _SLUG.match(slug):
+        raise ValueError(f"Invalid tenant slug: '{slug}'.")
+    return AppConfigs.TENANT_DB_NAME_TEMPLATE.format(slug=slug.replace("-", "_"))
+
+class TenantEngine:
+    """A cached tenant engine, when it was last handed out and how many callers hold it."""
+
+    def __init__(self, bind: Engine, owns_pool: bool):
+        self.engine = bind
+        self.owns_pool = owns_pool
+        self.last_used = time.monotonic()
+        self.leases = 0
+
+    @property
+    def in_use(self) -> bool:
+        return self.leases > 0 or (self.owns_pool and self.engine.pool.checkedout() > 0)
+
+    def dispose(self):
+        if self.owns_pool:
+            self.engine.dispose()
+
+class TenantEngineCache:
+    """
+    LRU-bounded cache of tenant engines.
+
+    In "schema" isolation every tenant shares the primary pool through a
+    `schema_translate_map`, so no connection pool is ever created per tenant.
+    In "database" isolation each tenant gets a small pool of its own; the least
+    recently used engines are disposed beyond `TENANT_DB_MAX_ENGINES`, and idle
+    ones are reaped after `TENANT_DB_IDLE_SECONDS`.
+    """
+
+    def __init__(self, max_engines: int, idle_seconds: float):
+        self.max_engines = max_engines
+        self.idle_seconds = idle_seconds
+        self._engines: "OrderedDict[str, TenantEngine]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create(self, identifier: str) -> TenantEngine:
+        if AppConfigs.TENANT_DB_ISOLATION == "database":
+            url = make_url(AppConfigs.DB_CONNECTION_STRING).set(database=identifier)
+            bind = create_engine(
+                url, echo=False,
+                pool_size=AppConfigs.TENANT_DB_POOL_SIZE,
+                max_overflow=AppConfigs.TENANT_DB_MAX_OVERFLOW,
+                pool_recycle=AppConfigs.TENANT_DB_IDLE_SECONDS,
+                pool_pre_ping=True,
+                **Db.engine_options(AppConfigs.DB_CONNECTION_STRING),
+            )
+            return TenantEngine(Db.instrument(bind), owns_pool=True)
+        return TenantEngine(Db.engine.execution_options(schema_translate_map={None: identifier}), owns_pool=False)
+
+    @contextmanager
+    def lease(self, slug: str) -> Iterator[Engine]:
+        """
+        The tenant's engine, pinned until the block exits so no eviction disposes it under the caller.
+
+        Args:
+            slug (str): The prospectus slug identifying the tenant.
+
+        Raises:
+            ValueError: If the slug is not a valid tenant identifier.
+        """
+        identifier = tenant_identifier(slug)
+        with self._lock:
+            entry = self._engines.get(identifier)
+            if entry is None:
+                entry = self._engines[identifier] = self._create(identifier)
+            else:
+                self._engines.move_to_end(identifier)
+            entry.leases += 1
+            entry.last_used = time.monotonic()
+            self._evict_over_capacity()
+            tenant_engines.set(len(self._engines))
+        try:
+            yield entry.engine
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                entry.last_used = time.monotonic()
+                # Engines skipped while leased are evicted once released
+                self._evict_over_capacity()
+                tenant_engines.set(len(self._engines))
+
+    def _evict_over_capacity(self):
+        # Oldest first; leased engines and those with checked-out connections are skipped and retried later
+        for identifier in list(self._engines):
+            if len(self._engines) <= self.max_engines:
+                break
+            entry = self._engines[identifier]
+            if not entry.in_use:
+                del self._engines[identifier]
+                entry.dispose()
+                tenant_evictions.inc(reason="capacity")
+
+    def reap(self):
+        """Disposes engines that have not been used for `idle_seconds`."""
+        horizon = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for identifier, entry in list(self._engines.items()):
+                if entry.last_used < horizon and not entry.in_use:
+                    del self._engines[identifier]
+                    entry.dispose()
+                    tenant_evictions.inc(reason="idle")
+            tenant_engines.set(len(self._engines))
+
+    async def monitor(self):
+        """Reaps idle engines forever; run as a background task from the lifespan."""
+        while True:
+            await asyncio.sleep(max(self.idle_seconds / 2, 1))
+            await asyncio.to_thread(self.reap)
+
+    def dispose_all(self):
+        with self._lock:
+            for entry in self._engines.values():
+                entry.dispose()
+            self._engines.clear()
+            tenant_engines.set(0)
+
+TenantEngines = TenantEngineCache(AppConfigs.TENANT_DB_MAX_ENGINES, AppConfigs.TENANT_DB_IDLE_SECONDS)
+
+# Caps the tenant sessions open at once across every tenant of this pod
+_connection_budget = threading.BoundedSemaphore(AppConfigs.TENANT_DB_CONNECTION_BUDGET)
+
+@contextmanager
+def open_tenant_session(slug: str, timeout: Optional[float] = None) -> Iterator[Session]:
+    """
+    Opens a session on the tenant's schema or database within the global connection budget.
+
+    Args:
+        slug (str): The prospectus slug identifying the tenant.
+        timeout (Optional[float]): Seconds to wait for budget; defaults to `TENANT_DB_CHECKOUT_TIMEOUT_SECONDS`.
+
+    Raises:
+        ValueError: If the slug is not a valid tenant identifier.
+        TimeoutError: If the connection budget stays exhausted for `timeout` seconds.
+    """
+    with TenantEngines.lease(slug) as bind:
+        if not _connection_budget.acquire(timeout=timeout or AppConfigs.TENANT_DB_CHECKOUT_TIMEOUT_SECONDS):
+            raise TimeoutError("Tenant database connection budget exhausted.")
+
+        tenant_sessions.inc()
+        dbsession = Session(bind=bind, autoflush=False)
+        try:
+            yield dbsession
+        except Exception:
+            dbsession.rollback()
+            raise
+        finally:
+            dbsession.close()
+            tenant_sessions.dec()
+            _connection_budget.release()
+
+def tenant_ready(slug: str) -> bool:
+    """
+    Whether the tenant's schema exists (or, in "database" isolation, its database answers).
+
+    Args:
+        slug (str): The prospectus slug identifying the tenant.
+
+    Raises:
+        ValueError: If the slug is not a valid tenant identifier.
+        TimeoutError: If the connection budget stays exhausted.
+    """
+    with open_tenant_session(slug) as dbsession:
+        try:
+            connection = dbsession.connection()
+            if AppConfigs.TENANT_DB_ISOLATION == "database":
+                connection.execute(text("SELECT 1"))
+                return True
+            return inspect(connection).has_schema(tenant_identifier(slug))
+        except OperationalError as e:
+            logger.warning("Tenant '%s' is unreachable: %s", slug, e)
+            return False
@@ -0,0 +1,341 @@
+import os
+import sys
+import json
+import time
+import queue
+import random
+import logging
+import functools
+import threading
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+import requests
+from src.config import AppConfigs
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Span:
+    """
+    A single timed stage of a trace.
+    """
+    trace_id: str
+    span_id: str
+    name: str
+    parent_id: Optional[str] = None
+    start_time_ns: int = field(default_factory=time.time_ns)
+    end_time_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_time_ns or time.time_ns()) - self.start_time_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+# Span currently active in this request; `None` when the request is not sampled
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class ConsoleSpanExporter:
+    """
+    Writes finished spans as JSON lines to stdout or to a local file, for testing.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._stream: TextIO = open(path, "a", encoding="utf-8") if path else sys.stdout
+
+    def export(self, spans: List[Span]):
+        self._stream.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans))
+        self._stream.flush()
+
+    def shutdown(self):
+        if self.path:
+            self._stream.close()
+
+class OtlpHttpSpanExporter:
+    """
+    Sends finished spans to an OpenTelemetry collector using the OTLP/HTTP JSON encoding.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.endpoint = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns),
+            "attributes": [self._attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    def export(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [self._span(span) for span in spans]}],
+            }]
+        }
+        response = self.http.post(self.endpoint, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+    def shutdown(self):
+        self.http.close()
+
+class BatchSpanProcessor:
+    """
+    Buffers finished spans and exports them in batches from a daemon thread,
+    so exporting never blocks the request path.
+    """
+
+    def __init__(self, exporter, max_batch_size: int = 256, flush_interval: float = 2.0, max_queue_size: int = 8192):
+        self.exporter = exporter
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._start()
+        global _active_processor
+        _active_processor = self
+
+    def _start(self):
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=self.max_queue_size)
+        self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._worker.start()
+
+    def on_end(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # Drop spans rather than slow down requests
+            pass
+
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning("Failed to export %d spans: %s", len(batch), e)
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                span = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+                if span is None:
+                    break
+                batch.append(span)
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.max_batch_size or (batch and time.monotonic() >= deadline):
+                self._export(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+        if batch:
+            self._export(batch)
+
+    def shutdown(self):
+        global _active_processor
+        if _active_processor is self:
+            _active_processor = None
+        self._queue.put(None)
+        self._worker.join(timeout=self.flush_interval + 5)
+        self.exporter.shutdown()
+
+# The processor spans are exported through; `None` until one is built
+_active_processor: Optional[BatchSpanProcessor] = None
+
+def _restart_after_fork():
+    # The exporter thread does not survive fork(): give the child process its own
+    if _active_processor is not None:
+        _active_processor._start()
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+class Tracer:
+    """
+    Creates sampled traces and their child spans. Sampling is decided once per
+    trace; when a trace is not sampled every span helper is a no-op. An incoming
+    `traceparent` always supplies the trace id, but its sampled flag only decides
+    sampling when `trust_parent_sampled` is set; otherwise the local rate does.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, processor: Optional[BatchSpanProcessor] = None,
+                 trust_parent_sampled: bool = False):
+        self.sample_rate = sample_rate
+        self.processor = processor
+        self.trust_parent_sampled = trust_parent_sampled
+
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None and self.sample_rate > 0
+
+    @staticmethod
+    def _new_id(bits: int) -> str:
+        return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+    def _end(self, span: Span):
+        span.end_time_ns = time.time_ns()
+        self.processor.on_end(span)
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Starts the root span of a trace, honoring an incoming W3C `traceparent` header.
+
+        Args:
+            name (str): The name of the root span.
+            traceparent (Optional[str]): The incoming `traceparent` header, if any.
+            **attributes: Attributes recorded on the root span.
+
+        Yields:
+            Optional[Span]: The root span, or `None` when the trace is not sampled.
+        """
+        trace_id, parent_id, sampled = None, None, None
+        if traceparent:
+            parts = traceparent.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                trace_id, parent_id = parts[1], parts[2]
+                if self.trust_parent_sampled:
+                    sampled = parts[3] == "01"
+
+        # Any client can send `-01`: without trusted callers it must not bypass the local rate
+        if sampled is None:
+            sampled = self.enabled and random.random() < self.sample_rate
+
+        if not (sampled and self.processor is not None):
+            yield None
+            return
+
+        root = Span(trace_id=trace_id or self._new_id(128), span_id=self._new_id(64), name=name,
+                    parent_id=parent_id, attributes=attributes)
+        token = current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = repr(e)
+            raise
+        finally:
+            current_span.reset(token)
+            self._end(root)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Records a child span of the active span; a no-op when the request is not sampled.
+
+        Args:
+            name (str): The name of the span, e.g. `repository.get_prospectus_by_id`.
+            **attributes: Attributes recorded on the span.
+
+        Yields:
+            Optional[Span]: The new span, or `None` when the request is not sampled.
+        """
+        parent = current_span.get()
+        if parent is None:
+            yield None
+            return
+
+        child = Span(trace_id=parent.trace_id, span_id=self._new_id(64), name=name,
+                     parent_id=parent.span_id, attributes=attributes)
+        token = current_span.set(child)
+        try:
+            yield child
+        except BaseException as e:
+            child.error = repr(e)
+            raise
+        finally:
+            current_span.reset(token)
+            self._end(child)
+
+    def shutdown(self):
+        if self.processor is not None:
+            self.processor.shutdown()
+
+def build_tracer() -> Tracer:
+    """
+    Builds the shared tracer from the `TRACE_*` settings.
+    """
+    exporters = {
+        "console": lambda: ConsoleSpanExporter(),
+        "file": lambda: ConsoleSpanExporter(AppConfigs.TRACE_EXPORT_PATH),
+        "otlp": lambda: OtlpHttpSpanExporter(AppConfigs.TRACE_OTLP_ENDPOINT, AppConfigs.PIPELINE),
+    }
+    exporter = exporters.get(AppConfigs.TRACE_EXPORTER.lower())
+    if exporter is None or AppConfigs.TRACE_SAMPLE_RATE <= 0:
+        return Tracer(sample_rate=0.0)
+    return Tracer(sample_rate=AppConfigs.TRACE_SAMPLE_RATE, processor=BatchSpanProcessor(exporter()),
+                  trust_parent_sampled=AppConfigs.TRACE_TRUST_PARENT_SAMPLED)
+
+# Create a shared Tracer instance
+AppTracer = build_tracer()
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator recording a span around every call of a sync or async function.
+
+    Args:
+        name (Optional[str]): The span name; defaults to the function's qualified name.
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with AppTracer.span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_span.get() is None:
+                return func(*args, **kwargs)
+            with AppTracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,125 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Table, insert
+from src.app.utils import Db
+from src.app.utils.Metrics import AppMetrics
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+buffered_rows = AppMetrics.gauge("write_behind_buffered_rows", "Rows waiting in a write-behind buffer.", ["table"])
+flushed_rows = AppMetrics.counter("write_behind_flushed_rows_total", "Rows written by write-behind flushes.", ["table"])
+dropped_rows = AppMetrics.counter("write_behind_dropped_rows_total", "Rows dropped because a write-behind buffer was full.", ["table"])
+flush_seconds = AppMetrics.histogram("write_behind_flush_seconds", "Duration of one write-behind flush.", ["table"])
+
+class WriteBehindBuffer:
+    """
+    Buffers rows in memory and writes them with multi-row INSERTs, off the request path.
+
+    A flush starts as soon as `flush_rows` rows are buffered, and at least every
+    `flush_interval` seconds through `monitor`. Rows of a failed flush are put back
+    and retried; beyond `max_rows` the oldest are dropped. Buffered rows are lost if
+    the process dies, so this only suits data that tolerates an occasional gap.
+
+    Args:
+        table (Table): The table the rows are inserted into.
+        flush_rows (int): Rows per INSERT statement, and the size that triggers a flush.
+        flush_interval (float): Maximum seconds a row waits before being written.
+        max_rows (int): Maximum rows held while the database is unavailable.
+    """
+
+    def __init__(self, table: Table, flush_rows: int, flush_interval: float, max_rows: int):
+        self.table = table
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._rows: "deque[Dict[str, Any]]" = deque(maxlen=max_rows)
+        self._lock = threading.Lock()
+        self._flushing: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append(self, row: Dict[str, Any]):
+        """Buffers a row; never touches the database on the caller's path."""
+        with self._lock:
+            if len(self._rows) == self._rows.maxlen:
+                dropped_rows.inc(table=self.table.name)
+            self._rows.append(row)
+            buffered_rows.set(len(self._rows), table=self.table.name)
+        if len(self._rows) >= self.flush_rows:
+            try:
+                self._schedule()
+            except RuntimeError:
+                # No event loop (e.g. a script); the next `flush` call writes the rows
+                pass
+
+    def _schedule(self) -> asyncio.Task:
+        # At most one flush in flight per buffer
+        if self._flushing is None:
+            self._flushing = asyncio.get_running_loop().create_task(asyncio.to_thread(self.flush))
+            self._flushing.add_done_callback(self._flushed)
+        return self._flushing
+
+    def _flushed(self, task: asyncio.Task):
+        self._flushing = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Write-behind flush of '%s' failed: %s", self.table.name, task.exception())
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            batch = [self._rows.popleft() for _ in range(min(self.flush_rows, len(self._rows)))]
+            buffered_rows.set(len(self._rows), table=self.table.name)
+        return batch
+
+    def _restore(self, batch: List[Dict[str, Any]]):
+        with self._lock:
+            # Put the batch back in front, keeping as many of its newest rows as there is room for
+            room = self._rows.maxlen - len(self._rows)
+            if room < len(batch):
+                dropped_rows.inc(len(batch) - room, table=self.table.name)
+            self._rows.extendleft(reversed(batch[max(0, len(batch) - room):] if room else []))
+            buffered_rows.set(len(self._rows), table=self.table.name)
+
+    def flush(self) -> int:
+        """
+        Writes the buffered rows, `flush_rows` per INSERT statement.
+
+        Returns:
+            int: The number of rows written.
+        """
+        written = 0
+        while self._rows and Db.DatabaseBreaker.allow():
+            batch = self._take()
+            if not batch:
+                break
+            started = time.perf_counter()
+            try:
+                with Db.engine.begin() as connection:
+                    # A single INSERT ... VALUES (...), (...) statement per batch
+                    connection.execute(insert(self.table).values(batch))
+            except Exception as e:
+                self._restore(batch)
+                logger.warning("Could not write %d rows to '%s', keeping them buffered: %s", len(batch), self.table.name, e)
+                break
+            flush_seconds.observe(time.perf_counter() - started, table=self.table.name)
+            flushed_rows.inc(len(batch), table=self.table.name)
+            written += len(batch)
+        return written
+
+    async def monitor(self):
+        """Flushes the buffer every `flush_interval` seconds; run as a background task from the lifespan."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._rows:
+                await asyncio.shield(self._schedule())
+
+    async def drain(self):
+        """Waits for the flush in flight, then writes what is left; called once at shutdown."""
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        if self._rows:
+            await asyncio.to_thread(self.flush)
@@ -0,0 +1,166 @@
+"""
+Stale activation sweeper.
+
+Prospectus waiting in the email activation stage whose activation token expired
+are stuck until the link is requested again. This job finds them page by page
+(`(status, updated_at)` index, keyset pagination), skips the ones that still hold
+a live token (one MGET per page), signs new tokens, stores them with one
+pipelined SET NX (a link a user requested meanwhile wins) and emails the links
+over a single SMTP session per batch, paced to `SWEEPER_EMAILS_PER_MINUTE`.
+Meant to run periodically (e.g. hourly cron).
+
+Only prospectus that entered the stage within `SWEEPER_MAX_AGE_HOURS` are
+reminded, so an abandoned signup gets a bounded number of emails.
+
+Usage:
+    python -m src.app.workers.activation_sweeper --dry-run
+    python -m src.app.workers.activation_sweeper --max-emails 200
+"""
+import sys
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from src.config import AppConfigs
+from src.app.utils import Db, Logging
+from src.app.utils.HMAC import HmacAuthenticator
+from src.app.utils import Redis
+from src.app.utils.Redis import RedisClient
+from src.app.utils.Mailer import EmailClient, EmailSender, EmailTemplates
+from src.app.model.Prospectus import Prospectus
+from src.app.repository.Prospectus_Repository import ProspectusRepository
+from src.app.services.prospectus import ActivationTokens, activation_key, legacy_activation_key, activation_link, activation_message
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+class ActivationSweeper:
+    """
+    Re-sends activation links to prospectus whose token expired.
+
+    Args:
+        batch_size (int): Prospectus per page, token pipeline and SMTP session.
+        emails_per_minute (int): Sending rate limit.
+        max_emails (int): Maximum emails per run.
+        dry_run (bool): Only report the prospectus that would be reminded.
+    """
+
+    def __init__(self, batch_size: int, emails_per_minute: int, max_emails: int, dry_run: bool = False):
+        self.batch_size = batch_size
+        self.emails_per_minute = emails_per_minute
+        self.max_emails = max_emails
+        self.dry_run = dry_run
+        self.mailer = EmailClient()
+
+    async def _remind(self, stale: List[Prospectus]) -> List[str]:
+        authenticator = HmacAuthenticator()
+        tokens = {
+            prospectus.id: await authenticator.generate_token(id=prospectus.id, email=prospectus.requester_email, slug=prospectus.slug)
+            for prospectus in stale
+        }
+        # SET NX: a user who requested a link since the MGET keeps the token they were just emailed
+        stored = await ActivationTokens.add_many_if_absent(
+            {activation_key(prospectus.id): tokens[prospectus.id] for prospectus in stale},
+            AppConfigs.HMAC_TOKEN_EXPIRATION_SECONDS,
+        )
+        reminded = [prospectus for prospectus, added in zip(stale, stored) if added]
+
+        subject = EmailTemplates.load("Identity_Activation").Subject
+        batch = [
+            self.mailer.compose(
+                sender=EmailSender.NoReply,
+                subject=subject,
+                recipient=prospectus.requester_email,
+                message=activation_message(prospectus, activation_link(prospectus.id, tokens[prospectus.id])),
+            )
+            for prospectus in reminded
+        ]
+        outcomes = await asyncio.to_thread(self.mailer.dispatch_many, batch, False) if batch else []
+
+        # Emails that did not go out must not leave a token behind, or the next run would skip them;
+        # only our own token is deleted, never one a user requested in the meantime
+        await ActivationTokens.remove_many_if_equal({
+            activation_key(prospectus.id): tokens[prospectus.id]
+            for prospectus, outcome in zip(reminded, outcomes) if outcome != "success"
+        })
+
+        results = dict(zip((prospectus.id for prospectus in reminded), outcomes))
+        return [results.get(prospectus.id, "skipped") for prospectus in stale]
+
+    async def sweep(self, dbsession: Session) -> Dict[str, int]:
+        """
+        Runs one sweep.
+
+        Returns:
+            Dict[str, int]: Prospectus counts: `stale`, then the email outcomes (or `would_send` in dry-run mode);
+            `skipped` counts those whose link a user requested while the sweep ran.
+        """
+        repository = ProspectusRepository(dbsession)
+        now = datetime.utcnow()
+        entered_before = now - timedelta(seconds=AppConfigs.HMAC_TOKEN_EXPIRATION_SECONDS)
+        entered_after = now - timedelta(hours=AppConfigs.SWEEPER_MAX_AGE_HOURS)
+        totals: Dict[str, int] = {"stale": 0}
+        cursor, sent = None, 0
+
+        while sent < self.max_emails:
+            page = await repository.get_stale_activations(entered_before, entered_after, cursor, self.batch_size)
+            if not page:
+                break
+            cursor = (page[-1].updated_at, page[-1].id)
+
+            # A live token means a link was sent recently (by a user request or an earlier sweep)
+            tokens = await ActivationTokens.fetch_many([activation_key(prospectus.id) for prospectus in page])
+            if AppConfigs.REDIS_LEGACY_KEY_FALLBACK:
+                legacy = await RedisClient.fetch_many([legacy_activation_key(prospectus.id) for prospectus in page])
+                tokens = [token or legacy_token for token, legacy_token in zip(tokens, legacy)]
+            stale = [prospectus for prospectus, token in zip(page, tokens) if token is None][:self.max_emails - sent]
+            totals["stale"] += len(stale)
+            if not stale:
+                continue
+
+            if self.dry_run:
+                for prospectus in stale:
+                    logger.info("Would re-send the activation link of prospectus %s (in stage since %s).", prospectus.id, prospectus.updated_at)
+                totals["would_send"] = totals.get("would_send", 0) + len(stale)
+                sent += len(stale)
+                continue
+
+            outcomes = await self._remind(stale)
+            for outcome in outcomes:
+                totals[outcome] = totals.get(outcome, 0) + 1
+            emailed = len(outcomes) - outcomes.count("skipped")
+            sent += emailed
+            if "unsent" in outcomes:
+                logger.warning("SMTP server unavailable, stopping the sweep.")
+                break
+
+            # Rate limit: spread the batches so the run never exceeds the configured pace
+            await asyncio.sleep(emailed * 60.0 / self.emails_per_minute)
+
+        return totals
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only report the prospectus that would be reminded.")
+    parser.add_argument("--batch-size", type=int, default=AppConfigs.SWEEPER_BATCH_SIZE, help="Prospectus per batch.")
+    parser.add_argument("--emails-per-minute", type=int, default=AppConfigs.SWEEPER_EMAILS_PER_MINUTE, help="Sending rate limit.")
+    parser.add_argument("--max-emails", type=int, default=AppConfigs.SWEEPER_MAX_EMAILS, help="Maximum emails per run.")
+    args = parser.parse_args(argv)
+
+    Logging.configure()
+    Redis.connect_all()
+    EmailTemplates.compile()
+    sweeper = ActivationSweeper(args.batch_size, args.emails_per_minute, args.max_emails, dry_run=args.dry_run)
+
+    dbsession: Session = Db.SessionFactory()
+    try:
+        totals = asyncio.run(sweeper.sweep(dbsession))
+    finally:
+        dbsession.close()
+    logger.info("Activation sweep finished: %s", totals)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
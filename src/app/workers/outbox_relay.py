@@ -0,0 +1,211 @@
+"""
+Transactional outbox relay.
+
+`promote_prospectus_status` writes a `ProspectusOutbox` row in the same
+transaction as the status change. This process publishes those rows, oldest
+first, to a Redis stream and marks them published. A row is only marked after
+its XADD succeeded, so delivery is at-least-once: a crash between the two
+republishes the batch, and consumers deduplicate on the `outbox_id` field.
+
+Rows are claimed with `FOR UPDATE SKIP LOCKED`, so a second relay never
+publishes a row twice concurrently. Ids are assigned on insert, not on commit:
+a transaction that commits late publishes after rows with higher ids, so the
+stream is not in commit order across prospectus. The transitions of one
+prospectus are committed one after another, so with a single relay they are
+published in order: the stream is ordered per `aggregate_id` only.
+
+Usage:
+    python -m src.app.workers.outbox_relay --metrics-port 9102
+"""
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from src.config import AppConfigs
+from src.app.utils import Db, Logging
+from src.app.utils import Redis
+from src.app.utils.Metrics import AppMetrics
+from src.app.model.ProspectusOutbox import ProspectusOutbox
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+outbox_published = AppMetrics.counter("outbox_published_total", "Outbox rows published to the stream.", ["stream"])
+outbox_batch_seconds = AppMetrics.histogram("outbox_relay_batch_seconds", "Time to claim, publish and mark one batch.", ["stream"])
+outbox_pending = AppMetrics.gauge("outbox_pending_rows", "Outbox rows not yet published.", ["stream"])
+outbox_oldest = AppMetrics.gauge("outbox_oldest_unpublished_seconds", "Age of the oldest unpublished outbox row.", ["stream"])
+stream_lag = AppMetrics.gauge("outbox_stream_consumer_lag", "Stream entries not yet delivered to a consumer group.", ["stream", "group"])
+stream_pending = AppMetrics.gauge("outbox_stream_consumer_pending", "Stream entries delivered to a consumer group but not acknowledged.", ["stream", "group"])
+
+class OutboxRelay:
+    """
+    Publishes unpublished outbox rows to a Redis stream in batches, in id order.
+
+    Args:
+        stream (str): The Redis stream to append to.
+        batch_size (int): Rows claimed per transaction.
+        maxlen (int): Approximate cap on the stream length.
+    """
+
+    def __init__(self, stream: str, batch_size: int, maxlen: int):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.maxlen = maxlen
+        # Stream entries must not be evicted before the consumers read them
+        self.redis = Redis.client_for("stream.tp")
+
+    def _claim(self, dbsession: Session) -> List[ProspectusOutbox]:
+        return list(dbsession.scalars(
+            select(ProspectusOutbox)
+            .where(ProspectusOutbox.published_at.is_(None))
+            .order_by(ProspectusOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ))
+
+    async def relay_once(self) -> int:
+        """
+        Publishes one batch and marks it published.
+
+        Returns:
+            int: The number of rows published.
+        """
+        started = time.perf_counter()
+        dbsession: Session = Db.SessionFactory()
+        try:
+            rows = await asyncio.to_thread(self._claim, dbsession)
+            if not rows:
+                await asyncio.to_thread(dbsession.rollback)
+                return 0
+
+            await self.redis.stream_publish(self.stream, [
+                {
+                    "outbox_id": str(row.id),
+                    "aggregate_id": str(row.aggregate_id),
+                    "event_type": row.event_type,
+                    "payload": json.dumps(row.payload, default=str),
+                }
+                for row in rows
+            ], maxlen=self.maxlen)
+
+            # The row locks are held until here, so no other relay publishes this batch meanwhile
+            published_at = datetime.utcnow()
+            for row in rows:
+                row.published_at = published_at
+            await asyncio.to_thread(dbsession.commit)
+        except Exception:
+            await asyncio.to_thread(dbsession.rollback)
+            raise
+        finally:
+            await asyncio.to_thread(dbsession.close)
+
+        outbox_published.inc(len(rows), stream=self.stream)
+        outbox_batch_seconds.observe(time.perf_counter() - started, stream=self.stream)
+        return len(rows)
+
+    def _backlog(self):
+        with Db.SessionFactory() as dbsession:
+            pending, oldest = dbsession.execute(
+                select(func.count(ProspectusOutbox.id), func.min(ProspectusOutbox.created_at))
+                .where(ProspectusOutbox.published_at.is_(None))
+            ).one()
+        outbox_pending.set(pending, stream=self.stream)
+        outbox_oldest.set((datetime.utcnow() - oldest).total_seconds() if oldest else 0.0, stream=self.stream)
+
+    def _purge(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(hours=AppConfigs.OUTBOX_RETENTION_HOURS)
+        with Db.SessionFactory() as dbsession:
+            purged = dbsession.execute(
+                delete(ProspectusOutbox).where(ProspectusOutbox.published_at < cutoff)
+            ).rowcount
+            dbsession.commit()
+        return purged
+
+    async def observe(self):
+        """Refreshes the backlog and consumer-group lag gauges, and purges rows past retention."""
+        await asyncio.to_thread(self._backlog)
+        for group in await self.redis.stream_groups(self.stream):
+            # `lag` is reported by Redis 7+; older servers only expose the pending count
+            if group.get("lag") is not None:
+                stream_lag.set(group["lag"], stream=self.stream, group=group["name"])
+            stream_pending.set(group.get("pending", 0), stream=self.stream, group=group["name"])
+        purged = await asyncio.to_thread(self._purge)
+        if purged:
+            logger.info("Purged %d published outbox rows.", purged)
+
+    async def run(self, observe_interval: float = 15.0):
+        """Relays forever; full batches are followed immediately by the next one, otherwise the relay polls."""
+        delay, observed = 1.0, 0.0
+        while True:
+            try:
+                published = await self.relay_once()
+                delay = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Outbox relay to '%s' failed, retrying in %.0fs: %s", self.stream, delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            if time.monotonic() - observed >= observe_interval:
+                observed = time.monotonic()
+                try:
+                    await self.observe()
+                except Exception as e:
+                    logger.warning("Could not refresh outbox metrics: %s", e)
+
+            if published < self.batch_size:
+                await asyncio.sleep(AppConfigs.OUTBOX_POLL_INTERVAL_SECONDS)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = AppMetrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(port: int):
+    """Serves the Prometheus metrics of this process on `port` from a daemon thread."""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Publish a single batch and exit.")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics on this port (0 disables).")
+    args = parser.parse_args(argv)
+
+    Logging.configure()
+    Redis.connect_all()
+    relay = OutboxRelay(AppConfigs.OUTBOX_STREAM, AppConfigs.OUTBOX_BATCH_SIZE, AppConfigs.OUTBOX_STREAM_MAXLEN)
+
+    if args.once:
+        published = asyncio.run(relay.relay_once())
+        logger.info("Published %d outbox rows to '%s'.", published, relay.stream)
+        return 0
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    logger.info("Relaying outbox rows to '%s'.", relay.stream)
+    try:
+        asyncio.run(relay.run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
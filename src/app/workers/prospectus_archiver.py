@@ -0,0 +1,190 @@
+"""
+Prospectus archiver.
+
+Moves soft-deleted prospectus, and prospectus untouched for long (finished
+after `ARCHIVE_FINISHED_AFTER_DAYS`, abandoned mid-onboarding after
+`ARCHIVE_ABANDONED_AFTER_DAYS`), from the hot `Prospectus` table into the
+`ProspectusArchive` table, range-partitioned by `created_at`. Each batch is
+copied and deleted in one short transaction, rows being claimed with
+`FOR UPDATE SKIP LOCKED`, so the job runs alongside live traffic; the cached
+data and validators of the moved prospectus are dropped right after. Meant to
+run periodically (e.g. a nightly cron).
+
+Usage:
+    python -m src.app.workers.prospectus_archiver --dry-run
+    python -m src.app.workers.prospectus_archiver --max-batches 100
+"""
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from sqlalchemy import DateTime, and_, delete, func, insert, literal, or_, select, text
+from sqlalchemy.engine import Connection
+from src.config import AppConfigs
+from src.app.utils import Db, Logging, Redis
+from src.app.model.Prospectus import Prospectus, ProspectusStages
+from src.app.model.ProspectusArchive import ProspectusArchive, partition_ddl
+from src.app.services.prospectus import forget_prospectus
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+class ProspectusArchiver:
+    """
+    Moves archivable prospectus to the archive table in batches.
+
+    Args:
+        batch_size (int): Prospectus moved per transaction.
+        pause (float): Seconds to wait between batches.
+    """
+
+    def __init__(self, batch_size: int, pause: float):
+        self.batch_size = batch_size
+        self.pause = pause
+        self._partitions: Set[int] = set()
+
+    @staticmethod
+    def untouched_since(before: datetime):
+        """
+        The condition selecting prospectus last changed before `before`. Rows never updated fall
+        back to their creation time, and rows with neither timestamp count as untouched.
+        """
+        return or_(
+            Prospectus.updated_at < before,
+            and_(
+                Prospectus.updated_at.is_(None),
+                or_(Prospectus.created_at.is_(None), Prospectus.created_at < before),
+            ),
+        )
+
+    @classmethod
+    def archivable(cls, now: datetime):
+        """The condition selecting the prospectus to archive at `now`."""
+        terminal = ProspectusStages.INIT_TENANT_PROSPECTUS_INFRASTRUCTURE.value
+        return or_(
+            Prospectus.is_delete.is_(True),
+            and_(
+                Prospectus.status == terminal,
+                cls.untouched_since(now - timedelta(days=AppConfigs.ARCHIVE_FINISHED_AFTER_DAYS)),
+            ),
+            and_(
+                Prospectus.status != terminal,
+                cls.untouched_since(now - timedelta(days=AppConfigs.ARCHIVE_ABANDONED_AFTER_DAYS)),
+            ),
+        )
+
+    @staticmethod
+    def partition_key(now: datetime):
+        """The archive's `created_at`: rows written before it was set fall back to `updated_at`, then `now`."""
+        return func.coalesce(Prospectus.created_at, Prospectus.updated_at, literal(now, DateTime))
+
+    def count(self) -> int:
+        """
+        Returns:
+            int: The number of prospectus a run would archive now.
+        """
+        with Db.engine.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(Prospectus).where(self.archivable(datetime.utcnow()))
+            ).scalar()
+
+    def _ensure_partitions(self, years: Set[int]):
+        # Created in their own transaction, before rows of that year would land in the default partition
+        if Db.engine.dialect.name != "postgresql":
+            return
+        for year in sorted(years - self._partitions):
+            try:
+                with Db.engine.begin() as connection:
+                    connection.execute(text(partition_ddl(year)))
+            except Exception as e:
+                logger.warning("Could not create the %d archive partition, rows go to the default one: %s", year, e)
+            self._partitions.add(year)
+
+    def _move(self, connection: Connection, ids: List, archived_at: datetime):
+        # `created_at` is nullable here but part of the archive's primary key
+        columns = [
+            self.partition_key(archived_at) if column.name == "created_at" else column
+            for column in Prospectus.__table__.columns
+        ]
+        connection.execute(
+            insert(ProspectusArchive.__table__).from_select(
+                [column.name for column in Prospectus.__table__.columns] + ["archived_at"],
+                select(*columns, literal(archived_at, DateTime)).where(Prospectus.id.in_(ids)),
+            )
+        )
+        connection.execute(delete(Prospectus).where(Prospectus.id.in_(ids)))
+
+    def archive_batch(self) -> int:
+        """
+        Moves one batch of archivable prospectus.
+
+        Returns:
+            int: The number of prospectus moved.
+        """
+        now = datetime.utcnow()
+        batch = (
+            select(Prospectus.id, self.partition_key(now))
+            .where(self.archivable(now))
+            .order_by(Prospectus.updated_at)
+            .limit(self.batch_size)
+        )
+
+        # Peek first so the partitions exist before the claiming transaction inserts
+        with Db.engine.connect() as connection:
+            self._ensure_partitions({created_at.year for _, created_at in connection.execute(batch)})
+
+        with Db.engine.begin() as connection:
+            rows = connection.execute(batch.with_for_update(skip_locked=True)).all()
+            if rows:
+                self._move(connection, [id for id, _ in rows], now)
+
+        # After the commit: a read racing the move could otherwise cache the row again
+        if rows:
+            asyncio.run(forget_prospectus([id for id, _ in rows]))
+        return len(rows)
+
+    def run(self, max_batches: Optional[int] = None) -> int:
+        """
+        Archives batch after batch until nothing is left (or `max_batches` were moved).
+
+        Returns:
+            int: The number of prospectus moved.
+        """
+        moved, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            count = self.archive_batch()
+            moved += count
+            batches += 1
+            if count:
+                logger.info("Archived %d prospectus (%d so far).", count, moved)
+            if count < self.batch_size:
+                break
+            time.sleep(self.pause)
+        return moved
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many prospectus would be archived.")
+    parser.add_argument("--batch-size", type=int, default=AppConfigs.ARCHIVE_BATCH_SIZE, help="Prospectus moved per transaction.")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches.")
+    args = parser.parse_args(argv)
+
+    Logging.configure()
+    try:
+        Redis.connect_all()
+    except Exception as e:
+        logger.warning("Redis unavailable, cached prospectus expire on their own: %s", e)
+    archiver = ProspectusArchiver(args.batch_size, AppConfigs.ARCHIVE_BATCH_PAUSE_SECONDS)
+
+    if args.dry_run:
+        logger.info("%d prospectus would be archived.", archiver.count())
+        return 0
+
+    logger.info("Archived %d prospectus in total.", archiver.run(args.max_batches))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,41 @@
-from typing import ClassVar
+from typing import ClassVar, Dict, List, Tuple
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
-
 
 class Configs(BaseSettings):
     # General settings
     ENV: str = os.getenv("ENV", "Local")
+    DEBUG: bool = False
+
+    # Logging settings (LOG_FORMAT: json | text; LOG_SAMPLING: fraction of sub-WARNING records kept per logger)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_SAMPLING: Dict[str, float] = {
+        "src.app.repository": 0.1,
+        "uvicorn.access": 0.1,
+    }
 
     # Server configurations
     HOST: str = "0.0.0.0"
     PORT: int = 8000
 
+    # Server process settings (`python -m src.server`; WEB_CONCURRENCY: 0 starts one worker per available CPU).
+    # Workers are recycled after SERVER_MAX_REQUESTS (+ up to the jitter) requests; on SIGTERM they get
+    # SERVER_GRACEFUL_TIMEOUT_SECONDS, of which the last SERVER_SHUTDOWN_FLUSH_SECONDS are kept for the lifespan shutdown
+    WEB_CONCURRENCY: int = 0
+    # Addresses of the ingress/load balancers whose X-Forwarded-For is trusted (comma-separated, CIDRs allowed, "*" for any).
+    # The client address (rate limits, read-your-writes) is taken from the first hop they did not add; uvicorn reads the same variable
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 65  # Above the load balancer's idle timeout (60s by default on most), or it races connection reuse
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_SHUTDOWN_FLUSH_SECONDS: int = 10
+
     # Application instance configurations
     NAMESPACE: str = "IHCE.Engage"
     PIPELINE: str = "IdentityManagement.Service"
@@ -48,6 +69,30 @@ class Configs(BaseSettings):
     REDIS_PORT: str = os.getenv("REDIS_PORT", "11916")
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "FIqJ3HuO4zL3kJr0uCZfAeSqsklNZcFC")
     REDIS_USERNAME: str = os.getenv("REDIS_USERNAME", "default")
+    REDIS_MODE: str = os.getenv("REDIS_MODE", "standalone")  # standalone | cluster | sentinel
+    REDIS_SENTINELS: str = os.getenv("REDIS_SENTINELS", "")  # host:port,host:port (sentinel mode)
+    REDIS_SENTINEL_SERVICE: str = os.getenv("REDIS_SENTINEL_SERVICE", "mymaster")
+
+    # Durable Redis instance (noeviction), for keys an LRU policy must never drop; unused while unset
+    REDIS_DURABLE_MODE: str = os.getenv("REDIS_DURABLE_MODE", "standalone")
+    REDIS_DURABLE_HOST: str = os.getenv("REDIS_DURABLE_HOST", "")
+    REDIS_DURABLE_PORT: str = os.getenv("REDIS_DURABLE_PORT", "6379")
+    REDIS_DURABLE_PASSWORD: str = os.getenv("REDIS_DURABLE_PASSWORD", "")
+    REDIS_DURABLE_USERNAME: str = os.getenv("REDIS_DURABLE_USERNAME", "")
+    REDIS_DURABLE_SENTINELS: str = os.getenv("REDIS_DURABLE_SENTINELS", "")
+    REDIS_DURABLE_SENTINEL_SERVICE: str = os.getenv("REDIS_DURABLE_SENTINEL_SERVICE", "mymaster")
+
+    # Key namespace -> instance ("default" or "durable")
+    REDIS_NAMESPACE_INSTANCES: Dict[str, str] = {
+        "acl.tp.iv": "durable",  # Activation tokens
+        "idem": "durable",  # Idempotency records
+        "stream.tp": "durable",  # Outbox stream
+    }
+    # Also read activation tokens stored under the pre-hash-tag key layout (`acl.tp.iv-<id>`) until they expire
+    REDIS_LEGACY_KEY_FALLBACK: bool = True
+
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 1.0
 
     # Authentication settings
     HMAC_SECRET_KEY: str = os.getenv("HMAC_SECRET_KEY", "TheInvincible_rANVAN2dot0")
@@ -66,15 +111,136 @@ class Configs(BaseSettings):
     # Database URI
     DB_CONTEXT: str = "{db_engine}://{user}:{password}@{host}:{port}/{database}"
 
-    # Dynamically generate DB_CONNECTION_STRING using the DB_CONTEXT format
-    DB_CONNECTION_STRING: str = DB_CONTEXT.format(
-        db_engine=DB_DIALECT,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT,
-        database=DB_NAME,
-    )
+    # Generated from the DB_* settings using the DB_CONTEXT format unless set explicitly
+    DB_CONNECTION_STRING: str = ""
+
+    # Database timeouts (the statement timeout is applied on PostgreSQL only)
+    DB_CONNECT_TIMEOUT_SECONDS: int = 5
+    DB_STATEMENT_TIMEOUT_MS: int = 5000
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+
+    # Development only: create missing tables at startup instead of running `alembic upgrade head`.
+    # Never enable with several workers or against a database the migrations manage
+    DB_CREATE_TABLES: bool = False
+
+    # Online migration settings (see src/app/utils/Migrations.py; the timeouts are applied on PostgreSQL only)
+    MIGRATION_LOCK_TIMEOUT_MS: int = 3000
+    MIGRATION_STATEMENT_TIMEOUT_MS: int = 60000
+    MIGRATION_BACKFILL_BATCH_SIZE: int = 1000
+    MIGRATION_BACKFILL_PAUSE_SECONDS: float = 0.2
+
+    # Read replica settings (comma-separated connection strings; empty sends everything to the primary)
+    DB_REPLICA_CONNECTION_STRINGS: str = os.getenv("DB_REPLICA_CONNECTION_STRINGS", "")
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10.0
+    DB_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5.0
+
+    # Per-tenant database settings (TENANT_DB_ISOLATION: schema | database)
+    TENANT_DB_ISOLATION: str = os.getenv("TENANT_DB_ISOLATION", "schema")
+    TENANT_DB_NAME_TEMPLATE: str = os.getenv("TENANT_DB_NAME_TEMPLATE", "tenant_{slug}")
+    TENANT_DB_MAX_ENGINES: int = 64
+    TENANT_DB_POOL_SIZE: int = 2
+    TENANT_DB_MAX_OVERFLOW: int = 2
+    TENANT_DB_IDLE_SECONDS: int = 300
+    TENANT_DB_CONNECTION_BUDGET: int = 200
+    TENANT_DB_CHECKOUT_TIMEOUT_SECONDS: float = 5.0
+
+    # Query instrumentation settings
+    DB_SLOW_QUERY_THRESHOLD_MS: int = 200
+
+    # Tracing settings (TRACE_EXPORTER: none | console | file | otlp)
+    TRACE_SAMPLE_RATE: float = 0.0
+    # Follow the sampled flag of an incoming traceparent; only when every caller is a trusted internal service
+    TRACE_TRUST_PARENT_SAMPLED: bool = False
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+    TRACE_OTLP_ENDPOINT: str = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318")
+
+    # Profiling settings (PROFILE_MODE: sampling | deterministic; PROFILE_STORE: local | redis).
+    # Requests are profiled when they carry a signed X-Debug-Profile header (needs PROFILE_SECRET)
+    # or are sampled at PROFILE_SAMPLE_RATE; with neither the middleware is not installed
+    PROFILE_SECRET: str = os.getenv("PROFILE_SECRET", "")
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_MODE: str = os.getenv("PROFILE_MODE", "sampling")
+    PROFILE_SAMPLE_INTERVAL_SECONDS: float = 0.001
+    PROFILE_MAX_SECONDS: float = 30.0
+    PROFILE_STORE: str = os.getenv("PROFILE_STORE", "local")
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_TTL_SECONDS: int = 24 * 60 * 60
+
+    # Rate limit settings ("<requests>/<seconds>" per route; RATE_LIMITS may be given as JSON)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, str] = {
+        "create_tenant_prospectus": "5/60",
+        "identity_activation": "5/300",
+        "identity_verification": "10/300",
+    }
+
+    # Circuit breaker settings (shared by the Redis, SMTP and database breakers)
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_TIMEOUT_SECONDS: float = 30.0
+
+    # Deferred mail settings (messages held while the SMTP breaker is open)
+    MAIL_QUEUE_MAX_MESSAGES: int = 1000
+    MAIL_QUEUE_RETRY_SECONDS: float = 15.0
+
+    # Admission control settings (ADMISSION_LIMITS: concurrent requests per route name)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_DEFAULT_CONCURRENCY: int = 64
+    ADMISSION_LIMITS: Dict[str, int] = {
+        "create_tenant_prospectus": 16,
+        "identity_activation": 16,
+        "promote_tenant_prospectus": 16,
+    }
+    ADMISSION_QUEUE_SIZE: int = 64
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_EXEMPT_PATH_PREFIXES: Tuple[str, ...] = ("/health",)
+    ADMISSION_EXEMPT_ROUTES: List[str] = ["tenant_prospectus_events"]
+
+    # Idempotency-Key settings
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60  # Stored responses are replayed for 1 day
+    IDEMPOTENCY_LOCK_SECONDS: int = 30
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+
+    # Batch lookup settings
+    PROSPECTUS_LOOKUP_MAX_IDS: int = 100
+
+    # Read-through cache settings (CACHE_LOCK_SECONDS: 0 disables the cross-pod lock)
+    PROSPECTUS_CACHE_TTL_SECONDS: int = 60
+    CACHE_EARLY_REFRESH_BETA: float = 1.0
+    CACHE_LOCK_SECONDS: float = 2.0
+
+    # Conditional GET settings
+    PROSPECTUS_VALIDATOR_TTL_SECONDS: int = 5 * 60
+
+    # Event stream settings
+    EVENTS_CHANNEL: str = os.getenv("EVENTS_CHANNEL", "events.tp")
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+
+    # Transactional outbox relay settings
+    OUTBOX_STREAM: str = os.getenv("OUTBOX_STREAM", "stream.tp.stages")
+    OUTBOX_STREAM_MAXLEN: int = 100_000  # Approximate cap on the stream length (XADD MAXLEN ~)
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 0.5
+    OUTBOX_RETENTION_HOURS: int = 24  # Published rows are purged after this long
+
+    # Stage history write-behind settings
+    STAGE_HISTORY_FLUSH_ROWS: int = 200  # Rows per multi-row INSERT; a full batch flushes immediately
+    STAGE_HISTORY_FLUSH_SECONDS: float = 1.0
+    STAGE_HISTORY_MAX_ROWS: int = 10_000  # Held while the database is unavailable, oldest dropped beyond
+
+    # Archival settings (prospectus moved from the hot table to the partitioned archive)
+    ARCHIVE_FINISHED_AFTER_DAYS: int = 30  # Prospectus in the terminal stage, untouched this long
+    ARCHIVE_ABANDONED_AFTER_DAYS: int = 180  # Prospectus in any other stage, untouched this long
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.1  # Between batches, to leave room for replication and vacuum
+
+    # Stale activation sweeper settings
+    SWEEPER_MAX_AGE_HOURS: int = 72  # Links are re-sent while the prospectus entered activation less than this ago
+    SWEEPER_BATCH_SIZE: int = 100  # Prospectus per query, token pipeline and SMTP session
+    SWEEPER_EMAILS_PER_MINUTE: int = 120
+    SWEEPER_MAX_EMAILS: int = 1000  # Per run
 
     SSO_MFA_URL: str = os.getenv("SSO_MFA_URL","https://onboarding.infinityhubs.in")
 
@@ -83,6 +249,8 @@ class Configs(BaseSettings):
     SMTP_SERVER: str = os.getenv("SMTP_SERVER", "smtp.zeptomail.in")
     SMTP_PORT: int = os.getenv("SMTP_PORT", 587)
     SMTP_USER: str = os.getenv("SMTP_USER", "emailapikey")
+    SMTP_SECURITY: str = os.getenv("SMTP_SECURITY", "auto")  # auto | ssl | starttls | none
+    SMTP_TIMEOUT_SECONDS: float = 10.0
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "PHtE6r1eQe6+iDQr8xRU7KTrQpT1MIx6+u5jKlNOsd1LX6QFTE1drd0swWezo0sqUaFDQf+Zndpqt7PJseyDcW7oMm9OWWqyqK3sx/VYSPOZsbq6x00Zt1odf0zaU4Drc9du3CzQu9nYNA==")
 
     # Query settings
@@ -90,9 +258,26 @@ class Configs(BaseSettings):
     PAGE_SIZE: int = 20
     ORDERING: str = "-id"
 
-    # Pydantic settings
+    @model_validator(mode="after")
+    def build_connection_string(self) -> "Configs":
+        # Dynamically generate DB_CONNECTION_STRING using the DB_CONTEXT format
+        if not self.DB_CONNECTION_STRING:
+            self.DB_CONNECTION_STRING = self.DB_CONTEXT.format(
+                db_engine=self.DB_DIALECT,
+                user=self.DB_USER,
+                password=self.DB_PASSWORD,
+                host=self.DB_HOST,
+                port=self.DB_PORT,
+                database=self.DB_NAME,
+            )
+        return self
+
+    # Pydantic settings (the .env file is read by the settings class; os.environ is left untouched)
     class Config:
         case_sensitive = True
+        env_file = ".env"
+        env_file_encoding = "utf-8"
+        extra = "ignore"
 
 
 # Create an instance of the Configs class to access settings
@@ -1,14 +1,22 @@
+import asyncio
 import logging
 from fastapi import FastAPI
 from src.config import AppConfigs
 from contextlib import asynccontextmanager
 from src.app.routes import startup, health_check, api_routes
-from src.app.utils import Redis
+from src.app.utils import Redis, Db, TenantDb, Logging
+from src.app.utils.Events import AppEvents
+from src.app.utils.Mailer import EmailTemplates, DeferredMail
+from src.app.utils.Resilience import CircuitOpenError
+from src.app.repository.Prospectus_Repository import StageHistoryBuffer
+from src.app.middleware import QueryMetricsMiddleware, TracingMiddleware, AdmissionControlMiddleware, ProfilingMiddleware
+from src.app.utils import Profiling
+from src.app.utils.Tracing import AppTracer
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queued, written as JSON by a background thread)
+Logging.configure()
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +33,7 @@ def application() -> FastAPI:
         docs_url=AppConfigs.API_DOC_URL,
         version=AppConfigs.PROJECT_VERSION,
         description=AppConfigs.PROJECT_DESCRIPTION,
+        lifespan=lifespan_manager,
     )
 
 
@@ -53,33 +62,82 @@ async def lifespan_manager(_app: FastAPI):
         _app (FastAPI): The FastAPI application instance.
     """
     # Startup logic
-    logger.info(f"Application {AppConfigs.APP_IDENTIFIER} is starting.")
+    logger.info("Application %s is starting.", AppConfigs.APP_IDENTIFIER)
     _app.state.startup_message = f"[{AppConfigs.NAMESPACE}:{AppConfigs.PIPELINE}] is starting..."
 
+    # Warm up in parallel: Redis connection, database pool, email templates and the OpenAPI schema
+    await asyncio.gather(
+        asyncio.to_thread(Redis.connect_all),
+        asyncio.to_thread(Db.warmup),
+        asyncio.to_thread(EmailTemplates.compile),
+        asyncio.to_thread(_app.openapi),
+    )
+
+    # Track read replica lag in the background
+    replica_monitor = asyncio.create_task(Db.replica_router.monitor()) if Db.replica_router.replicas else None
+
+    # Reap idle tenant engines in the background
+    tenant_reaper = asyncio.create_task(TenantDb.TenantEngines.monitor())
+
+    # Hold this pod's single event subscription, fanned out to the stream watchers
+    event_listener = asyncio.create_task(AppEvents.listen())
+
+    # Retry emails deferred while the SMTP server was unreachable
+    mail_retrier = asyncio.create_task(DeferredMail.monitor())
+
+    # Write the buffered stage history in multi-row batches
+    history_writer = asyncio.create_task(StageHistoryBuffer.monitor())
+
     yield
 
     # Shutdown logic
+    if replica_monitor is not None:
+        replica_monitor.cancel()
+    tenant_reaper.cancel()
+    event_listener.cancel()
+    mail_retrier.cancel()
+    history_writer.cancel()
+    await StageHistoryBuffer.drain()
+    if len(StageHistoryBuffer):
+        logger.warning("%d stage history rows were not written before shutdown.", len(StageHistoryBuffer))
+    if len(DeferredMail):
+        await asyncio.to_thread(DeferredMail.flush)
+        if len(DeferredMail):
+            logger.warning("%d deferred emails were not delivered before shutdown.", len(DeferredMail))
+    TenantDb.TenantEngines.dispose_all()
     _app.state.shutdown_message = f"[{AppConfigs.NAMESPACE}:{AppConfigs.PIPELINE}] is shutting down..."
+    AppTracer.shutdown()
     logger.info("Application shutting down...")
 
 
-# Function to create and configure the FastAPI application with Redis and routers
+# Function to create and configure the FastAPI application with routers and middleware
 def create_application() -> FastAPI:
     """
     Creates and configures the FastAPI application, including the routers and
-    external service connections (like Redis).
+    middleware. External service connections (like Redis) are opened by the
+    lifespan manager, so importing the application performs no I/O.
 
     Returns:
         FastAPI: The fully configured FastAPI application.
     """
     builder = application()
 
-    # Initialize Redis client connection
-    Redis.RedisClient.connect()
-
     # Include routers for the application
     include_application_routers(builder)
 
+    # Count queries and database time per request
+    builder.add_middleware(QueryMetricsMiddleware)
+
+    # Profile requests on demand; not installed at all unless a secret or sampling rate is configured
+    if Profiling.enabled():
+        builder.add_middleware(ProfilingMiddleware)
+
+    # Shed excess load per route before any database or SMTP work starts
+    builder.add_middleware(AdmissionControlMiddleware)
+
+    # Open the root span of sampled requests (outermost, so it covers every stage)
+    builder.add_middleware(TracingMiddleware)
+
     return builder
 
 
@@ -107,3 +165,23 @@ async def validation_exception_handler(request, exc):
             "body": exc.body
         },
     )
+
+
+# Exception handler to fail fast while a dependency's circuit breaker is open
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_exception_handler(request, exc):
+    """
+    Answers requests that need a dependency whose circuit breaker is open.
+
+    Args:
+        request: The request object that caused the exception.
+        exc: The CircuitOpenError that was raised.
+
+    Returns:
+        JSONResponse: A 503 response with a Retry-After header.
+    """
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
@@ -0,0 +1,133 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+The application is imported once in the master (`preload_app`), so the workers
+share its code pages, and forked into WEB_CONCURRENCY workers (one per available
+CPU when 0). Each worker drops the database connections it inherited; the log
+listener and span exporter threads restart themselves after fork.
+
+Workers are recycled after SERVER_MAX_REQUESTS requests, jittered so they do not
+all restart at once. On SIGTERM a worker stops accepting connections and waits
+for in-flight requests and their BackgroundTasks. It then runs the lifespan
+shutdown, which writes the buffered stage history and sends the deferred emails,
+before SERVER_GRACEFUL_TIMEOUT_SECONDS runs out.
+
+Behind an ingress, set FORWARDED_ALLOW_IPS to its addresses: the client address
+is then read from X-Forwarded-For, otherwise every client shares the ingress's
+address and, with it, one rate limit bucket.
+
+For development, `uvicorn src.main:app --reload` is still the quickest loop.
+
+Usage:
+    python -m src.server
+    python -m src.server --workers 4 --bind 0.0.0.0:8000
+"""
+import os
+import sys
+import math
+import logging
+import argparse
+from typing import List, Optional
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+from src.config import AppConfigs
+from src.app.utils import Db, Logging
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+def available_cpus() -> int:
+    """
+    The CPUs this process may use: its affinity mask, capped by a cgroup v2 CPU quota
+    (a container's `cpus:` limit), which `os.cpu_count()` does not see.
+
+    Returns:
+        int: At least 1.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+class Worker(UvicornWorker):
+    """
+    A uvicorn worker that stops waiting for in-flight requests SERVER_SHUTDOWN_FLUSH_SECONDS
+    before gunicorn's graceful timeout, so the lifespan shutdown still runs before the worker is killed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - AppConfigs.SERVER_SHUTDOWN_FLUSH_SECONDS)
+
+def post_fork(server, worker):
+    """Runs in each new worker, before it serves anything."""
+    Db.after_fork()
+    logger.info("Worker %s started.", worker.pid)
+
+def worker_exit(server, worker):
+    """Runs in each worker as it exits, after the lifespan shutdown."""
+    logger.info("Worker %s stopped.", worker.pid)
+    # Write out the records still queued before the process ends
+    Logging.shutdown()
+
+class Server(BaseApplication):
+    """Gunicorn configured from AppConfigs instead of a config file or its command line."""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from src.main import app
+        return app
+
+def options(workers: int = 0, bind: str = None) -> dict:
+    """
+    The gunicorn settings.
+
+    Args:
+        workers (int): Worker processes; 0 uses WEB_CONCURRENCY, and one per available CPU when that is 0 too.
+        bind (str): `host:port`; defaults to HOST and PORT.
+
+    Returns:
+        dict: Gunicorn setting name -> value.
+    """
+    return {
+        "bind": bind or f"{AppConfigs.HOST}:{AppConfigs.PORT}",
+        "workers": workers or AppConfigs.WEB_CONCURRENCY or available_cpus(),
+        "worker_class": Worker,
+        "preload_app": True,
+        "backlog": AppConfigs.SERVER_BACKLOG,
+        "keepalive": AppConfigs.SERVER_KEEPALIVE_SECONDS,
+        "timeout": AppConfigs.SERVER_TIMEOUT_SECONDS,
+        "graceful_timeout": AppConfigs.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "max_requests": AppConfigs.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": AppConfigs.SERVER_MAX_REQUESTS_JITTER,
+        "forwarded_allow_ips": AppConfigs.FORWARDED_ALLOW_IPS,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: WEB_CONCURRENCY, else one per CPU).")
+    parser.add_argument("--bind", default=None, help="host:port to listen on (default: HOST:PORT).")
+    args = parser.parse_args(argv)
+
+    Logging.configure()
+    settings = options(args.workers, args.bind)
+    logger.info("Starting %d workers on %s.", settings["workers"], settings["bind"])
+    Server(settings).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
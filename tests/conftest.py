@@ -0,0 +1,38 @@
+"""
+Boots `src.main:app` against the benchmark stand-ins (a temporary SQLite
+database, fakeredis and an in-process SMTP sink), so the tests need no
+external services. The environment is set before anything under `src` is
+imported, because the settings and the engine are built at import time.
+"""
+import os
+import uuid
+import pytest
+from benchmarks import standins
+
+smtp = standins.FakeSmtpServer().start()
+standins.configure_environment(smtp_port=smtp.port)
+# Emit the query count headers read by Db.assert_query_budget
+os.environ["DEBUG"] = "true"
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    standins.install_redis()
+    from src.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def onboarding_payload() -> dict:
+    suffix = uuid.uuid4().hex[:8]
+    return {
+        "title": f"Acme {suffix}", "slug": f"acme-{suffix}", "subscription": "TRAIL",
+        "requester_first_name": "Ada", "requester_last_name": "Lovelace",
+        "requester_email": f"ada-{suffix}@example.com", "requester_designation": "Founder",
+    }
+
+@pytest.fixture
+def prospectus(client, onboarding_payload) -> dict:
+    response = client.post("/api/v1/tenant-prospectus", json=onboarding_payload)
+    assert response.status_code == 201, response.text
+    return response.json()
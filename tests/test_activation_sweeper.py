@@ -0,0 +1,101 @@
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from src.app.utils import Db
+from src.app.utils.Redis import RedisClient
+from src.app.model.Prospectus import Prospectus, ProspectusStages
+from src.app.services.prospectus import ActivationTokens, activation_key
+from src.app.workers.activation_sweeper import ActivationSweeper
+
+@pytest.fixture
+def stale(client):
+    """Two prospectus that entered the activation stage two days ago and hold no token."""
+    ids = []
+    for _ in range(2):
+        suffix = uuid.uuid4().hex[:8]
+        response = client.post("/api/v1/tenant-prospectus", json={
+            "title": f"Stale {suffix}", "slug": f"stale-{suffix}", "subscription": "TRAIL",
+            "requester_first_name": "Ada", "requester_last_name": "Lovelace",
+            "requester_email": f"ada-{suffix}@example.com", "requester_designation": "Founder",
+        })
+        assert response.status_code == 201, response.text
+        ids.append(uuid.UUID(response.json()["id"]))
+
+    entered = datetime.utcnow() - timedelta(days=2)
+    with Db.engine.begin() as connection:
+        for offset, id in enumerate(ids):
+            connection.execute(update(Prospectus).where(Prospectus.id == id).values(
+                status=ProspectusStages.INIT_TENANT_ADMIN_EMAIL_ACTIVATION.value,
+                updated_at=entered + timedelta(seconds=offset),
+            ))
+    RedisClient.client.delete(*[activation_key(id) for id in ids])
+    yield ids
+
+    # Out of the sweeper's reach for the next tests
+    with Db.engine.begin() as connection:
+        connection.execute(update(Prospectus).where(Prospectus.id.in_(ids)).values(
+            status=ProspectusStages.INIT_TENANT_PROSPECTUS_INFRASTRUCTURE.value,
+        ))
+
+def sweep(sweeper: ActivationSweeper) -> dict:
+    dbsession = Db.SessionFactory()
+    try:
+        return asyncio.run(sweeper.sweep(dbsession))
+    finally:
+        dbsession.close()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    durations = []
+
+    async def sleep(seconds):
+        durations.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return durations
+
+def test_dry_run_sends_and_stores_nothing(stale, sleeps):
+    totals = sweep(ActivationSweeper(batch_size=10, emails_per_minute=60, max_emails=10, dry_run=True))
+
+    assert totals == {"stale": 2, "would_send": 2}
+    assert RedisClient.client.exists(*[activation_key(id) for id in stale]) == 0
+
+def test_live_tokens_are_skipped(stale, sleeps):
+    RedisClient.client.set(activation_key(stale[0]), "live")
+    totals = sweep(ActivationSweeper(batch_size=10, emails_per_minute=60, max_emails=10))
+
+    assert totals == {"stale": 1, "success": 1}
+    assert RedisClient.client.get(activation_key(stale[0])) == "live"
+    assert RedisClient.client.get(activation_key(stale[1])) is not None
+
+def test_link_requested_during_the_sweep_is_kept(stale, sleeps, monkeypatch):
+    fetch_many = ActivationTokens.fetch_many
+
+    async def fetch_then_request(keys):
+        tokens = await fetch_many(keys)
+        # The user asks for a new link between the sweeper's read and its write
+        RedisClient.client.set(activation_key(stale[0]), "requested")
+        return tokens
+
+    monkeypatch.setattr(ActivationTokens, "fetch_many", fetch_then_request)
+    totals = sweep(ActivationSweeper(batch_size=10, emails_per_minute=60, max_emails=10))
+
+    assert totals == {"stale": 2, "skipped": 1, "success": 1}
+    assert RedisClient.client.get(activation_key(stale[0])) == "requested"
+
+def test_batches_are_paced(stale, sleeps):
+    totals = sweep(ActivationSweeper(batch_size=1, emails_per_minute=30, max_emails=10))
+
+    assert totals == {"stale": 2, "success": 2}
+    assert sleeps == [2.0, 2.0]
+
+def test_unsent_batch_stops_the_run_and_removes_its_tokens(stale, sleeps, monkeypatch):
+    sweeper = ActivationSweeper(batch_size=1, emails_per_minute=60, max_emails=10)
+    monkeypatch.setattr(sweeper.mailer, "dispatch_many", lambda batch, defer: ["unsent"] * len(batch))
+    totals = sweep(sweeper)
+
+    assert totals == {"stale": 1, "unsent": 1}
+    assert sleeps == []
+    assert RedisClient.client.exists(*[activation_key(id) for id in stale]) == 0
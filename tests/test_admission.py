@@ -0,0 +1,92 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from src.config import AppConfigs
+from src.app.middleware import AdmissionControlMiddleware
+
+@pytest.fixture
+def admission(monkeypatch):
+    monkeypatch.setattr(AppConfigs, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(AppConfigs, "ADMISSION_LIMITS", {"slow": 1})
+    monkeypatch.setattr(AppConfigs, "ADMISSION_QUEUE_SIZE", 1)
+    monkeypatch.setattr(AppConfigs, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(AppConfigs, "ADMISSION_RETRY_AFTER_SECONDS", 3)
+    monkeypatch.setattr(AppConfigs, "ADMISSION_EXEMPT_ROUTES", ["stream"])
+
+def build_app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow/{id}", name="slow")
+    async def slow(id: int):
+        await release.wait()
+        return {"id": id}
+
+    @app.get("/stream", name="stream")
+    async def stream():
+        return {"ok": True}
+
+    @app.get("/health/live", name="live")
+    async def live():
+        return {"ok": True}
+
+    app.add_middleware(AdmissionControlMiddleware)
+    return app
+
+async def saturated(check):
+    """Holds the only slot of `slow` and fills its queue, then runs `check` with a client."""
+    release = asyncio.Event()
+    transport = httpx.ASGITransport(app=build_app(release))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        held = [asyncio.create_task(client.get(f"/slow/{id}")) for id in (1, 2)]
+        await asyncio.sleep(0.05)
+        try:
+            return await check(client)
+        finally:
+            release.set()
+            assert [(await task).status_code for task in held] == [200, 200]
+
+def test_full_queue_is_shed_with_retry_after(admission):
+    async def check(client):
+        return await client.get("/slow/3")
+
+    response = asyncio.run(saturated(check))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+
+def test_queue_wait_is_bounded(admission, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 0.05)
+    release = asyncio.Event()
+
+    async def run():
+        transport = httpx.ASGITransport(app=build_app(release))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            held = asyncio.create_task(client.get("/slow/1"))
+            await asyncio.sleep(0.01)
+            queued = await client.get("/slow/2")
+            release.set()
+            return queued, await held
+
+    queued, held = asyncio.run(run())
+    assert queued.status_code == 503
+    assert held.status_code == 200
+
+def test_exempt_routes_and_paths_pass_a_saturated_limiter(admission, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "ADMISSION_DEFAULT_CONCURRENCY", 0)
+
+    async def check(client):
+        return [(await client.get(path)).status_code for path in ("/stream", "/health/live")]
+
+    assert asyncio.run(saturated(check)) == [200, 200]
+
+def test_route_names_are_matched_once_per_request_line():
+    app = build_app(asyncio.Event())
+    middleware = AdmissionControlMiddleware(app)
+    scope = {"type": "http", "app": app, "method": "GET", "root_path": ""}
+
+    assert middleware.route_name({**scope, "path": "/slow/1"}) == "slow"
+    assert middleware.route_name({**scope, "path": "/slow/1"}) == "slow"
+    assert middleware.route_name({**scope, "path": "/missing"}) is None
+    assert middleware.route_name({**scope, "method": "POST", "path": "/slow/1"}) is None
+    info = middleware._route_names.cache_info()
+    assert (info.hits, info.misses) == (1, 3)
@@ -0,0 +1,50 @@
+import uuid
+from src.app.utils.ContentNegotiation import MSGPACK, pack, unpack
+
+LOOKUP = "/api/v1/tenant-prospectus/lookup"
+
+def test_lookup_accepts_msgpack_body(client, prospectus):
+    response = client.post(
+        LOOKUP,
+        content=pack({"ids": [uuid.UUID(prospectus["id"]).bytes]}),
+        headers={"Content-Type": MSGPACK, "Accept": MSGPACK},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+    assert [item["slug"] for item in unpack(response.content)] == [prospectus["slug"]]
+
+def test_lookup_rejects_invalid_msgpack_ids_with_422(client):
+    response = client.post(LOOKUP, content=pack({"ids": [b"\x00" * 15]}), headers={"Content-Type": MSGPACK})
+    assert response.status_code == 422
+    errors = response.json()["errors"]
+    assert errors and errors[0]["loc"] == ["body", "ids", 0]
+    assert all("input" not in error for error in errors)
+
+def test_lookup_rejects_undecodable_msgpack_with_422(client):
+    response = client.post(LOOKUP, content=b"\xc1", headers={"Content-Type": MSGPACK})
+    assert response.status_code == 422
+    assert response.json()["errors"][0]["type"] == "msgpack_invalid"
+
+def test_msgpack_representation_has_its_own_etag(client, prospectus):
+    url = f"/api/v1/tenant-prospectus/{prospectus['id']}"
+    json_etag = client.get(url).headers["etag"]
+    msgpack_response = client.get(url, headers={"Accept": MSGPACK})
+    msgpack_etag = msgpack_response.headers["etag"]
+    assert msgpack_response.headers["content-type"] == MSGPACK
+    assert msgpack_etag != json_etag
+
+    # A client holding the JSON body must not be told its copy is a current MessagePack one
+    assert client.get(url, headers={"Accept": MSGPACK, "If-None-Match": json_etag}).status_code == 200
+    assert client.get(url, headers={"If-None-Match": msgpack_etag}).status_code == 200
+
+    not_modified = client.get(url, headers={"Accept": MSGPACK, "If-None-Match": msgpack_etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == msgpack_etag
+    assert client.get(url, headers={"If-None-Match": json_etag}).status_code == 304
+
+def test_list_representations_have_distinct_etags(client, prospectus):
+    url = "/api/v1/tenant-prospectus"
+    json_etag = client.get(url).headers["etag"]
+    msgpack_etag = client.get(url, headers={"Accept": MSGPACK}).headers["etag"]
+    assert msgpack_etag != json_etag
+    assert client.get(url, headers={"Accept": MSGPACK, "If-None-Match": msgpack_etag}).status_code == 304
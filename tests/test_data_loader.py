@@ -0,0 +1,79 @@
+import uuid
+import asyncio
+import pytest
+from src.app.utils import Db
+from src.app.utils.DataLoader import DataLoader
+
+class Source:
+    """Records every batch it is asked for."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, keys):
+        self.batches.append(keys)
+        if self.fail:
+            raise ConnectionError("source unavailable")
+        return {key: key * 10 for key in keys if key >= 0}
+
+def test_keys_requested_together_share_one_batch():
+    source = Source()
+
+    async def load():
+        loader = DataLoader(source)
+        return await asyncio.gather(loader.load(3), loader.load_many([1, -1, 3]), loader.load(2))
+
+    assert asyncio.run(load()) == [30, [10, None, 30], 20]
+    assert source.batches == [[3, 1, -1, 2]]
+
+def test_memoized_keys_are_not_loaded_again():
+    source = Source()
+
+    async def load():
+        loader = DataLoader(source)
+        first = await loader.load_many([1, 2])
+        loader.prime(3, 33)
+        second = await loader.load_many([2, 3, 4])
+        return first, second
+
+    assert asyncio.run(load()) == ([10, 20], [20, 33, 40])
+    assert source.batches == [[1, 2], [4]]
+
+def test_batches_are_capped_at_max_batch_size():
+    source = Source()
+
+    async def load():
+        return await DataLoader(source, max_batch_size=2).load_many(range(5))
+
+    assert asyncio.run(load()) == [0, 10, 20, 30, 40]
+    assert source.batches == [[0, 1], [2, 3], [4]]
+
+def test_failed_batch_is_retried_by_a_later_call():
+    source = Source(fail=True)
+
+    async def load():
+        loader = DataLoader(source)
+        with pytest.raises(ConnectionError):
+            await loader.load(1)
+        source.fail = False
+        return await loader.load(1)
+
+    assert asyncio.run(load()) == 10
+    assert source.batches == [[1], [1]]
+
+def test_lookup_follows_the_request_order_in_one_query(client, onboarding_payload):
+    ids = []
+    for index in range(3):
+        payload = {**onboarding_payload, "slug": f"{onboarding_payload['slug']}-{index}",
+                   "requester_email": f"{index}-{onboarding_payload['requester_email']}"}
+        response = client.post("/api/v1/tenant-prospectus", json=payload)
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+
+    requested = [ids[2], ids[0], str(uuid.uuid4()), ids[2], ids[1]]
+    response = client.post("/api/v1/tenant-prospectus/lookup", json={"ids": requested})
+    assert response.status_code == 200, response.text
+    # Missing ids are omitted and duplicates returned once
+    assert [item["id"] for item in response.json()] == [ids[2], ids[0], ids[1]]
+    Db.assert_query_budget(response, 1)
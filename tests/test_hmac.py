@@ -0,0 +1,26 @@
+import base64
+import asyncio
+import uuid
+import pytest
+from fastapi import HTTPException
+from src.app.utils.HMAC import HmacAuthenticator, SIGNATURE_SIZE
+
+def test_tokens_whose_signature_contains_a_dot_verify():
+    authenticator = HmacAuthenticator()
+    dotted = 0
+    # About one signature in eight contains b"."; 200 tokens all but guarantee some do
+    for _ in range(200):
+        email = f"ada-{uuid.uuid4().hex[:8]}@example.com"
+        token = asyncio.run(authenticator.generate_token(id=uuid.uuid4(), email=email, slug="acme"))
+        dotted += b"." in base64.urlsafe_b64decode(token)[-SIGNATURE_SIZE:]
+        assert asyncio.run(authenticator.verify_token(token)) == email
+    assert dotted
+
+def test_tampered_token_is_rejected():
+    authenticator = HmacAuthenticator()
+    token = asyncio.run(authenticator.generate_token(id=uuid.uuid4(), email="ada@example.com", slug="acme"))
+    decoded = base64.urlsafe_b64decode(token)
+    tampered = base64.urlsafe_b64encode(decoded.replace(b"acme", b"evil")).decode()
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(authenticator.verify_token(tampered))
+    assert error.value.status_code == 400
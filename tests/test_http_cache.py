@@ -0,0 +1,69 @@
+import uuid
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from src.app.utils.HttpCache import Validator
+from src.app.utils.Redis import RedisClient, tagged_key
+
+def url(prospectus: dict) -> str:
+    return f"/api/v1/tenant-prospectus/{prospectus['id']}"
+
+def promote(client, prospectus: dict):
+    assert client.put(f"{url(prospectus)}/promote-status").status_code == 200
+
+def test_matching_if_none_match_gets_304(client, prospectus):
+    response = client.get(url(prospectus))
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    not_modified = client.get(url(prospectus), headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    # Weak comparison, lists and the wildcard
+    assert client.get(url(prospectus), headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get(url(prospectus), headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get(url(prospectus), headers={"If-None-Match": '"other"'}).status_code == 200
+
+def test_if_modified_since_is_compared_to_the_last_promotion(client, prospectus):
+    promote(client, prospectus)
+    last_modified = client.get(url(prospectus)).headers["last-modified"]
+
+    assert client.get(url(prospectus), headers={"If-Modified-Since": last_modified}).status_code == 304
+    earlier = format_datetime(parsedate_to_datetime(last_modified) - timedelta(seconds=1), usegmt=True)
+    assert client.get(url(prospectus), headers={"If-Modified-Since": earlier}).status_code == 200
+    assert client.get(url(prospectus), headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client, prospectus):
+    promote(client, prospectus)
+    last_modified = client.get(url(prospectus)).headers["last-modified"]
+    headers = {"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    assert client.get(url(prospectus), headers=headers).status_code == 200
+
+def test_promotion_replaces_the_cached_validator(client, prospectus):
+    etag = client.get(url(prospectus)).headers["etag"]
+    promote(client, prospectus)
+
+    response = client.get(url(prospectus), headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["status"] != prospectus["status"]
+    cached = RedisClient.client.get(tagged_key("etag.tp", uuid.UUID(prospectus["id"])))
+    assert Validator.loads(cached).etag == response.headers["etag"]
+
+def page_of(client, prospectus: dict) -> str:
+    # Oldest first: the page holding the prospectus depends on what the other tests created
+    number = 1
+    while True:
+        page = f"/api/v1/tenant-prospectus?page={number}&limit=100"
+        if prospectus["id"] in [item["id"] for item in client.get(page).json()]:
+            return page
+        number += 1
+
+def test_list_page_gets_304_until_a_prospectus_on_it_changes(client, prospectus):
+    page = page_of(client, prospectus)
+    etag = client.get(page).headers["etag"]
+    assert client.get(page, headers={"If-None-Match": etag}).status_code == 304
+
+    promote(client, prospectus)
+    assert client.get(page, headers={"If-None-Match": etag}).status_code == 200
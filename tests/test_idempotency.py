@@ -0,0 +1,104 @@
+import uuid
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.config import AppConfigs
+from src.app.utils.Idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, IdempotencyStore, idempotent
+
+@pytest.fixture
+def key(client) -> str:
+    return uuid.uuid4().hex
+
+class Handler:
+    """Counts its executions; optionally raises or waits for `release` first."""
+
+    def __init__(self, result=None, error: BaseException = None):
+        self.calls = 0
+        self.result = result if result is not None else {"id": uuid.uuid4().hex}
+        self.error = error
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+def test_retry_replays_the_first_response(key):
+    handler = Handler()
+    assert asyncio.run(idempotent("test", key, {"a": 1}, handler, status_code=201)) == handler.result
+
+    replay = asyncio.run(idempotent("test", key, {"a": 1}, handler, status_code=201))
+    assert handler.calls == 1
+    assert replay.status_code == 201
+    assert replay.headers[REPLAYED_HEADER] == "true"
+    assert replay.body == b'{"id":"%s"}' % handler.result["id"].encode()
+
+def test_key_reused_with_another_body_is_rejected(key):
+    asyncio.run(idempotent("test", key, {"a": 1}, Handler()))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(idempotent("test", key, {"a": 2}, Handler()))
+    assert error.value.status_code == 422
+
+def test_concurrent_duplicate_waits_for_the_first_outcome(key):
+    handler = Handler()
+
+    async def duplicates():
+        handler.release = asyncio.Event()
+        first = asyncio.create_task(idempotent("test", key, {"a": 1}, handler))
+        second = asyncio.create_task(idempotent("test", key, {"a": 1}, handler))
+        await asyncio.sleep(0.05)
+        handler.release.set()
+        return await first, await second
+
+    first, second = asyncio.run(duplicates())
+    assert handler.calls == 1
+    assert first == handler.result
+    assert second.headers[REPLAYED_HEADER] == "true"
+
+def test_duplicate_of_a_request_still_in_flight_gets_409(key, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "IDEMPOTENCY_WAIT_SECONDS", 0)
+
+    async def duplicates():
+        handler = Handler()
+        handler.release = asyncio.Event()
+        first = asyncio.create_task(idempotent("test", key, {"a": 1}, handler))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HTTPException) as error:
+                await idempotent("test", key, {"a": 1}, Handler())
+        finally:
+            handler.release.set()
+            await first
+        return error.value.status_code
+
+    assert asyncio.run(duplicates()) == 409
+
+@pytest.mark.parametrize("error", [RuntimeError("boom"), HTTPException(status_code=503)])
+def test_failure_releases_the_key(key, error):
+    with pytest.raises(type(error)):
+        asyncio.run(idempotent("test", key, {"a": 1}, Handler(error=error)))
+    assert IdempotencyStore.client.exists(f"idem:test:{key}") == 0
+
+    retry = Handler()
+    assert asyncio.run(idempotent("test", key, {"a": 1}, retry)) == retry.result
+    assert retry.calls == 1
+
+def test_client_error_is_replayed(key):
+    handler = Handler(error=HTTPException(status_code=409, detail="Slug taken"))
+    with pytest.raises(HTTPException):
+        asyncio.run(idempotent("test", key, {"a": 1}, handler))
+
+    replay = asyncio.run(idempotent("test", key, {"a": 1}, handler))
+    assert handler.calls == 1
+    assert (replay.status_code, replay.body) == (409, b'{"detail":"Slug taken"}')
+
+def test_onboarding_honors_the_header(client, onboarding_payload, key):
+    first = client.post("/api/v1/tenant-prospectus", json=onboarding_payload, headers={IDEMPOTENCY_HEADER: key})
+    retry = client.post("/api/v1/tenant-prospectus", json=onboarding_payload, headers={IDEMPOTENCY_HEADER: key})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers[REPLAYED_HEADER] == "true"
@@ -0,0 +1,6 @@
+from benchmarks import import_time
+
+def test_main_imports_within_budget_without_network_io():
+    # Raises RuntimeError when importing opens a network connection
+    report = import_time.measure("src.main", runs=3)
+    assert report["import_ms"] <= import_time.BUDGET_MS, report["slowest"]
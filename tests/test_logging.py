@@ -0,0 +1,42 @@
+import json
+import logging
+from src.app.utils.Logging import DeferredQueueHandler, JsonFormatter
+
+class Mutable:
+    def __init__(self):
+        self.value = "before"
+
+    def __repr__(self):
+        return f"Mutable({self.value})"
+
+def prepared(logger: logging.Logger, *args, **kwargs) -> logging.LogRecord:
+    records = []
+    handler = DeferredQueueHandler(records)
+    handler.enqueue = records.append
+    logger.addHandler(handler)
+    try:
+        logger.error(*args, **kwargs)
+    finally:
+        logger.removeHandler(handler)
+    return records[0]
+
+def test_arguments_are_rendered_on_the_calling_thread():
+    logger = logging.getLogger("tests.logging.args")
+    item = Mutable()
+    record = prepared(logger, "Promoted %r", item)
+    item.value = "after"
+
+    assert record.args is None
+    assert json.loads(JsonFormatter().format(record))["message"] == "Promoted Mutable(before)"
+
+def test_tracebacks_stay_a_separate_field():
+    logger = logging.getLogger("tests.logging.exc")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = prepared(logger, "Failed", exc_info=True)
+
+    assert record.exc_info is None
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Failed"
+    assert "ValueError: boom" in entry["exception"]
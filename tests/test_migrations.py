@@ -0,0 +1,79 @@
+import io
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from src.config import AppConfigs
+from src.app.utils import Migrations
+
+@pytest.fixture
+def connection():
+    engine = sa.create_engine("sqlite://")
+    with engine.connect() as connection:
+        connection.execute(sa.text("CREATE TABLE items (id INTEGER PRIMARY KEY, region VARCHAR)"))
+        connection.execute(sa.text("INSERT INTO items (id, region) VALUES (1, NULL), (2, 'us'), (3, NULL), (4, NULL), "
+                                   "(5, NULL), (6, NULL), (7, NULL), (8, NULL)"))
+        with Operations.context(MigrationContext.configure(connection)):
+            yield connection
+    engine.dispose()
+
+items = sa.table("items", sa.column("id"), sa.column("region"))
+
+def regions(connection) -> list:
+    return list(connection.execute(sa.select(items.c.region).order_by(items.c.id)).scalars())
+
+def test_backfill_walks_the_key_in_batches(connection, monkeypatch):
+    pauses = []
+    monkeypatch.setattr(Migrations.time, "sleep", pauses.append)
+
+    assert Migrations.backfill(items, {"region": "eu"}, items.c.region.is_(None), batch_size=3, pause=0.5) == 7
+    assert regions(connection) == ["eu", "us", "eu", "eu", "eu", "eu", "eu", "eu"]
+    # Two full batches are followed by a pause; the short last one ends the backfill
+    assert pauses == [0.5, 0.5]
+
+def test_backfill_resumes_where_it_stopped(connection, monkeypatch):
+    def interrupted(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(Migrations.time, "sleep", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        Migrations.backfill(items, {"region": "eu"}, items.c.region.is_(None), batch_size=3)
+    assert regions(connection) == ["eu", "us", "eu", "eu", None, None, None, None]
+
+    monkeypatch.setattr(Migrations.time, "sleep", lambda seconds: None)
+    assert Migrations.backfill(items, {"region": "eu"}, items.c.region.is_(None), batch_size=3) == 4
+    assert None not in regions(connection)
+
+def test_index_helpers_fall_back_to_plain_ddl(connection):
+    Migrations.create_index_concurrently("ix_items_region", "items", ["region"])
+    assert [index["name"] for index in sa.inspect(connection).get_indexes("items")] == ["ix_items_region"]
+
+    Migrations.drop_index_concurrently("ix_items_region", "items")
+    assert sa.inspect(connection).get_indexes("items") == []
+
+def postgresql_script():
+    buffer = io.StringIO()
+    context = MigrationContext.configure(dialect_name="postgresql", opts={"as_sql": True, "output_buffer": buffer})
+    return buffer, Operations.context(context)
+
+def test_concurrent_index_build_lifts_the_statement_timeout():
+    buffer, context = postgresql_script()
+    with context:
+        Migrations.create_index_concurrently("ix_items_region", "items", ["region"])
+
+    script = buffer.getvalue()
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_region ON items (region)" in script
+    # Lifted for the build only, outside the migration's transaction
+    statements = [statement.strip() for statement in script.split(";") if statement.strip()]
+    assert statements[:2] == ["COMMIT", "SET statement_timeout = 0"]
+    assert statements[3:] == [f"SET statement_timeout = {AppConfigs.MIGRATION_STATEMENT_TIMEOUT_MS}", "BEGIN"]
+
+def test_failed_index_build_restores_the_statement_timeout(monkeypatch):
+    def failing(*args, **kwargs):
+        raise sa.exc.OperationalError("CREATE INDEX", {}, Exception("canceling statement"))
+
+    monkeypatch.setattr(Migrations.op, "create_index", failing)
+    buffer, context = postgresql_script()
+    with context, pytest.raises(sa.exc.OperationalError):
+        Migrations.create_index_concurrently("ix_items_region", "items", ["region"])
+    assert f"SET statement_timeout = {AppConfigs.MIGRATION_STATEMENT_TIMEOUT_MS};" in buffer.getvalue()
@@ -0,0 +1,68 @@
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert, select, update
+from src.config import AppConfigs
+from src.app.utils import Db
+from src.app.model.ProspectusOutbox import ProspectusOutbox
+from src.app.workers.outbox_relay import OutboxRelay
+
+@pytest.fixture
+def relay(client):
+    relay = OutboxRelay(f"outbox-{uuid.uuid4().hex[:8]}", batch_size=2, maxlen=100)
+    # Only the rows of the test are pending
+    with Db.engine.begin() as connection:
+        connection.execute(update(ProspectusOutbox).where(ProspectusOutbox.published_at.is_(None))
+                           .values(published_at=datetime.utcnow()))
+    yield relay
+    relay.redis.client.delete(relay.stream)
+
+def add_events(count: int, published_at: datetime = None) -> list:
+    aggregate_id = uuid.uuid4()
+    with Db.engine.begin() as connection:
+        return list(connection.execute(insert(ProspectusOutbox).returning(ProspectusOutbox.id), [{
+            "aggregate_id": aggregate_id, "event_type": "prospectus.stage_changed",
+            "payload": {"sequence": sequence}, "created_at": datetime.utcnow(), "published_at": published_at,
+        } for sequence in range(count)]).scalars())
+
+def published(ids: list) -> dict:
+    with Db.engine.connect() as connection:
+        return dict(connection.execute(
+            select(ProspectusOutbox.id, ProspectusOutbox.published_at).where(ProspectusOutbox.id.in_(ids))
+        ).all())
+
+def test_relay_publishes_batches_in_id_order_and_marks_them(relay):
+    ids = add_events(3)
+
+    assert asyncio.run(relay.relay_once()) == 2
+    assert asyncio.run(relay.relay_once()) == 1
+    assert asyncio.run(relay.relay_once()) == 0
+
+    entries = relay.redis.client.xrange(relay.stream)
+    assert [fields["outbox_id"] for _, fields in entries] == [str(id) for id in ids]
+    assert [fields["payload"] for _, fields in entries] == [f'{{"sequence": {sequence}}}' for sequence in range(3)]
+    assert all(published(ids).values())
+
+def test_failed_publish_leaves_the_rows_unpublished(relay, monkeypatch):
+    ids = add_events(2)
+
+    async def unavailable(stream, entries, maxlen=None):
+        raise ConnectionError("stream unavailable")
+
+    monkeypatch.setattr(relay.redis, "stream_publish", unavailable)
+    with pytest.raises(ConnectionError):
+        asyncio.run(relay.relay_once())
+    assert published(ids) == {id: None for id in ids}
+
+    monkeypatch.undo()
+    assert asyncio.run(relay.relay_once()) == 2
+    assert [fields["outbox_id"] for _, fields in relay.redis.client.xrange(relay.stream)] == [str(id) for id in ids]
+
+def test_purge_drops_only_rows_published_past_retention(relay):
+    expired = add_events(1, published_at=datetime.utcnow() - timedelta(hours=AppConfigs.OUTBOX_RETENTION_HOURS + 1))
+    recent = add_events(1, published_at=datetime.utcnow())
+    pending = add_events(1)
+
+    assert relay._purge() >= 1
+    assert list(published(expired + recent + pending)) == recent + pending
@@ -0,0 +1,77 @@
+import os
+import time
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.config import AppConfigs
+from src.app.utils.Profiling import PROFILE_HEADER, PROFILE_ID_HEADER, ProfileStore, sign, verify
+from src.app.middleware import ProfilingMiddleware
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(AppConfigs, "PROFILE_SECRET", "profile-secret")
+    return "profile-secret"
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ProfileStore("local", str(tmp_path), ttl=60)
+    monkeypatch.setattr("src.app.middleware.profiling.Profiles", store)
+    return store
+
+def test_verify_accepts_only_unexpired_triggers_signed_with_the_secret(secret):
+    expires = int(time.time()) + 60
+    assert verify(sign(expires))
+    assert not verify(sign(int(time.time()) - 1))
+    assert not verify(sign(expires, secret="another-secret"))
+    assert not verify(f"{expires}.{'0' * 64}")
+    assert not verify("not-a-trigger")
+
+def test_verify_refuses_everything_without_a_secret(monkeypatch):
+    monkeypatch.setattr(AppConfigs, "PROFILE_SECRET", "")
+    assert not verify(sign(int(time.time()) + 60, secret=""))
+
+def test_profile_routes_hide_behind_a_signed_header(client, secret):
+    assert client.get("/health/profiles").status_code == 404
+    assert client.get("/health/profiles", headers={PROFILE_HEADER: "1.abc"}).status_code == 404
+    headers = {PROFILE_HEADER: sign(int(time.time()) + 60)}
+    assert client.get("/health/profiles", headers=headers).status_code == 200
+    assert client.get("/health/profiles/unknown", headers=headers).status_code == 404
+
+def test_middleware_profiles_only_triggered_requests(secret, store, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "PROFILE_SAMPLE_RATE", 0.0)
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        return {"ok": True}
+
+    with TestClient(ProfilingMiddleware(app)) as profiled:
+        assert PROFILE_ID_HEADER not in profiled.get("/work").headers
+        assert PROFILE_ID_HEADER not in profiled.get("/work", headers={PROFILE_HEADER: "1.abc"}).headers
+
+        response = profiled.get("/work", headers={PROFILE_HEADER: sign(int(time.time()) + 60)})
+        id = response.headers[PROFILE_ID_HEADER]
+
+    kind, extension, _ = asyncio.run(store.load(id))
+    assert (kind, extension) == ("collapsed", "collapsed.txt")
+    assert asyncio.run(store.latest())[0].startswith(f"{id} GET /work ")
+
+def test_local_store_keeps_the_latest_profiles(store, monkeypatch):
+    monkeypatch.setattr(ProfileStore, "INDEX_SIZE", 3)
+    ids = [f"{index:032x}" for index in range(5)]
+    for id in ids:
+        asyncio.run(store.save(id, "collapsed", "collapsed.txt", b"main 1\n", f"GET /{id}"))
+
+    assert [entry.split(" ")[0] for entry in asyncio.run(store.latest())] == ids[:1:-1]
+    assert sorted(os.listdir(store.directory)) == sorted([f"{id}.collapsed.txt" for id in ids[2:]] + ["index.txt"])
+    assert asyncio.run(store.load(ids[0])) is None
+
+def test_local_store_drops_expired_profiles(store):
+    asyncio.run(store.save("a" * 32, "collapsed", "collapsed.txt", b"main 1\n", "GET /old"))
+    expired = time.time() - store.ttl - 1
+    os.utime(os.path.join(store.directory, f"{'a' * 32}.collapsed.txt"), (expired, expired))
+
+    asyncio.run(store.save("b" * 32, "collapsed", "collapsed.txt", b"main 1\n", "GET /new"))
+    assert asyncio.run(store.latest()) == [f"{'b' * 32} GET /new"]
+    assert asyncio.run(store.load("a" * 32)) is None
@@ -0,0 +1,57 @@
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from src.app.utils import Db
+from src.app.utils.Redis import RedisClient, tagged_key
+from src.app.model.Prospectus import Prospectus
+from src.app.model.ProspectusArchive import ProspectusArchive
+from src.app.workers.prospectus_archiver import ProspectusArchiver
+
+def archived(id: uuid.UUID) -> bool:
+    with Db.engine.connect() as connection:
+        return connection.execute(select(ProspectusArchive.id).where(ProspectusArchive.id == id)).first() is not None
+
+def test_prospectus_without_created_at_is_archived(client, prospectus):
+    id = uuid.UUID(prospectus["id"])
+    with Db.engine.begin() as connection:
+        connection.execute(update(Prospectus).where(Prospectus.id == id).values(created_at=None, is_delete=True))
+
+    ProspectusArchiver(batch_size=100, pause=0).run()
+
+    assert archived(id)
+    with Db.engine.connect() as connection:
+        created_at, updated_at = connection.execute(
+            select(ProspectusArchive.created_at, ProspectusArchive.updated_at).where(ProspectusArchive.id == id)
+        ).one()
+    assert created_at == updated_at
+
+def test_prospectus_never_updated_ages_from_its_creation(client, prospectus, onboarding_payload):
+    suffix = uuid.uuid4().hex[:8]
+    response = client.post("/api/v1/tenant-prospectus", json={
+        **onboarding_payload, "slug": f"recent-{suffix}", "requester_email": f"recent-{suffix}@example.com",
+    })
+    old, recent = uuid.UUID(prospectus["id"]), uuid.UUID(response.json()["id"])
+    with Db.engine.begin() as connection:
+        connection.execute(update(Prospectus).where(Prospectus.id == old).values(
+            updated_at=None, created_at=datetime.utcnow() - timedelta(days=365),
+        ))
+        connection.execute(update(Prospectus).where(Prospectus.id == recent).values(updated_at=None))
+
+    ProspectusArchiver(batch_size=100, pause=0).run()
+
+    assert archived(old)
+    assert not archived(recent)
+
+def test_archived_prospectus_leave_the_caches(client, prospectus):
+    id = prospectus["id"]
+    assert client.get(f"/api/v1/tenant-prospectus/{id}").status_code == 200
+    keys = [tagged_key("cache.tp", id), tagged_key("etag.tp", uuid.UUID(id))]
+    assert RedisClient.client.exists(*keys) == 2
+
+    with Db.engine.begin() as connection:
+        connection.execute(update(Prospectus).where(Prospectus.id == uuid.UUID(id)).values(is_delete=True))
+    ProspectusArchiver(batch_size=100, pause=0).run()
+
+    assert RedisClient.client.exists(*keys) == 0
+    response = client.get(f"/api/v1/tenant-prospectus/{id}")
+    assert response.status_code == 200 and response.json() is None
@@ -0,0 +1,13 @@
+from src.app.repository.Prospectus_Repository import ProspectusRepository
+
+def test_stream_ends_with_gone_when_the_row_disappears(client, prospectus, monkeypatch):
+    async def vanished(self, id):
+        return None
+
+    # The row is archived between the existence check and the snapshot
+    monkeypatch.setattr(ProspectusRepository, "get_prospectus_by_id", vanished)
+    response = client.get(f"/api/v1/tenant-prospectus/{prospectus['id']}/events")
+
+    assert response.status_code == 200
+    assert "event: gone" in response.text
+    assert "event: status" not in response.text
@@ -0,0 +1,26 @@
+import uuid
+from src.app.utils import Db
+from src.app.utils.Redis import RedisClient
+from src.app.services.prospectus import activation_key
+
+def test_onboarding_query_budget(client, onboarding_payload):
+    response = client.post("/api/v1/tenant-prospectus", json=onboarding_payload)
+    assert response.status_code == 201, response.text
+    Db.assert_query_budget(response, 4)
+
+def test_identity_activation_query_budget(client, prospectus):
+    response = client.get(f"/api/v1/tenant-prospectus/{prospectus['id']}/identity-activation")
+    assert response.status_code == 200, response.text
+    Db.assert_query_budget(response, 1)
+
+def test_identity_verification_query_budget(client, prospectus):
+    id = prospectus["id"]
+    assert client.get(f"/api/v1/tenant-prospectus/{id}/identity-activation").status_code == 200
+    # Activation -> verification -> infrastructure, the stage a verification link is accepted in
+    for _ in range(2):
+        assert client.put(f"/api/v1/tenant-prospectus/{id}/promote-status").status_code == 200
+
+    key = RedisClient.client.get(activation_key(uuid.UUID(id)))
+    response = client.get(f"/api/v1/tenant-prospectus/{id}/identity-verification/{key}")
+    assert response.status_code == 200, response.text
+    Db.assert_query_budget(response, 1)
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from src.config import AppConfigs
+from src.server import options
+from src.app.utils import RateLimiter as RateLimiterModule
+from src.app.utils.Redis import RedisClient
+from src.app.utils.RateLimiter import RateLimit, RateLimiter
+
+WINDOW = 60
+
+@pytest.fixture
+def limiter(client, monkeypatch):
+    """A fresh limiter, enabled, allowing 2 requests per minute on the `limited` route."""
+    limiter = RateLimiter()
+    monkeypatch.setattr(RateLimiterModule, "AppRateLimiter", limiter)
+    monkeypatch.setattr(AppConfigs, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(AppConfigs, "RATE_LIMITS", {"limited": f"2/{WINDOW}"})
+    for key in RedisClient.client.scan_iter("rl:*"):
+        RedisClient.client.delete(key)
+    return limiter
+
+def hit(limiter: RateLimiter, identity: str, now: float):
+    return asyncio.run(limiter.hit("limited", identity, 2, WINDOW, now))
+
+def test_sliding_window_weighs_the_previous_window(limiter):
+    start = 1_000 * WINDOW
+    RedisClient.client.set(f"rl:{{limited:ip=a}}:{999}", 2)
+
+    # At the start of a window, the previous one still counts in full
+    assert hit(limiter, "ip=a", start) == WINDOW
+    # Near its end, the previous window has slid out
+    assert hit(limiter, "ip=a", start + WINDOW - 1) is None
+
+def test_local_buckets_still_shed_when_redis_fails(limiter, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(RedisClient, "evaluate", unavailable)
+    now = 1_000 * WINDOW + 30
+    # Fails open on Redis errors, but the pod's own bucket stops a single client
+    assert hit(limiter, "ip=a", now) is None
+    assert hit(limiter, "ip=a", now) is None
+    assert hit(limiter, "ip=a", now) == 30
+
+def limited_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{id}", dependencies=[Depends(RateLimit("limited", keys=("ip", "path:id")))])
+    async def item(id: str):
+        return {"id": id}
+
+    return app
+
+def test_over_the_limit_is_429_with_retry_after(limiter):
+    with TestClient(limited_app()) as api:
+        assert api.get("/items/a").status_code == 200
+        assert api.get("/items/a").status_code == 200
+        response = api.get("/items/a")
+
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= WINDOW
+
+def call(dependency: RateLimit, ip: str, id: str):
+    request = Request({"type": "http", "client": (ip, 1234), "path_params": {"id": id}, "headers": []})
+    asyncio.run(dependency(request))
+
+def test_denied_request_does_not_spend_the_other_keys(limiter):
+    dependency = RateLimit("limited", keys=("ip", "path:id"))
+    call(dependency, "10.0.0.1", "a")
+    call(dependency, "10.0.0.1", "a")
+
+    # Denied by `path:id`: the hit already counted for this address is taken back
+    with pytest.raises(Exception) as denied:
+        call(dependency, "10.0.0.2", "a")
+    assert denied.value.status_code == 429
+    call(dependency, "10.0.0.2", "b")
+    call(dependency, "10.0.0.2", "c")
+
+def test_clients_behind_a_trusted_proxy_have_their_own_budget(limiter, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "FORWARDED_ALLOW_IPS", "testclient")
+    # What the server workers install from their `forwarded_allow_ips` setting
+    app = ProxyHeadersMiddleware(limited_app(), trusted_hosts=options(workers=1)["forwarded_allow_ips"])
+
+    with TestClient(app) as api:
+        for id in ("a", "b"):
+            assert api.get(f"/items/{id}", headers={"X-Forwarded-For": "203.0.113.1"}).status_code == 200
+        assert api.get("/items/c", headers={"X-Forwarded-For": "203.0.113.1"}).status_code == 429
+        assert api.get("/items/d", headers={"X-Forwarded-For": "203.0.113.2"}).status_code == 200
+
+def test_forwarded_for_is_ignored_from_other_peers(limiter, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "FORWARDED_ALLOW_IPS", "127.0.0.1")
+    app = ProxyHeadersMiddleware(limited_app(), trusted_hosts=options(workers=1)["forwarded_allow_ips"])
+
+    with TestClient(app) as api:
+        for id, address in (("a", "203.0.113.1"), ("b", "203.0.113.2")):
+            assert api.get(f"/items/{id}", headers={"X-Forwarded-For": address}).status_code == 200
+        # Every request counts against the peer itself, whatever address it claims
+        assert api.get("/items/c", headers={"X-Forwarded-For": "203.0.113.3"}).status_code == 429
@@ -0,0 +1,102 @@
+import uuid
+import asyncio
+import pytest
+import redis
+from redis.crc import key_slot
+from src.config import AppConfigs
+from src.app.utils import Redis
+from src.app.utils.Redis import DurableRedisClient, RedisClient, RedisClientConnector, client_for, tagged_key
+from src.app.services.prospectus import activation_key, fetch_activation_token, legacy_activation_key
+
+def test_tagged_key_hashes_every_key_of_an_entity_to_one_slot():
+    id = uuid.UUID("6f1c3b3e-4a0e-4b8c-9a77-1d2f3e4a5b6c")
+    assert tagged_key("acl.tp.iv", id) == "acl.tp.iv:{6f1c3b3e-4a0e-4b8c-9a77-1d2f3e4a5b6c}"
+    assert tagged_key("cache.tp", id, "lock", 2) == "cache.tp:{6f1c3b3e-4a0e-4b8c-9a77-1d2f3e4a5b6c}:lock:2"
+    assert len({key_slot(tagged_key(namespace, id, *parts).encode())
+                for namespace, parts in [("acl.tp.iv", ()), ("cache.tp", ()), ("cache.tp", ("lock",)), ("etag.tp", ())]}) == 1
+
+def test_client_for_maps_namespaces_to_the_durable_instance_once_configured(monkeypatch):
+    monkeypatch.setattr(AppConfigs, "REDIS_NAMESPACE_INSTANCES", {"acl.tp.iv": "durable", "cache.tp": "default"})
+    monkeypatch.setattr(AppConfigs, "REDIS_DURABLE_HOST", "")
+    monkeypatch.setattr(AppConfigs, "REDIS_DURABLE_SENTINELS", "")
+    assert client_for("acl.tp.iv") is RedisClient
+
+    monkeypatch.setattr(AppConfigs, "REDIS_DURABLE_HOST", "durable.redis")
+    assert client_for("acl.tp.iv") is DurableRedisClient
+    assert client_for("cache.tp") is RedisClient
+    assert client_for("unmapped") is RedisClient
+
+class Recorder:
+    """Stands in for a redis-py client class, recording how it was built."""
+
+    def __init__(self, *args, **kwargs):
+        self.args, self.kwargs = args, kwargs
+
+    def ping(self):
+        return True
+
+    def master_for(self, service, **kwargs):
+        self.service = service
+        return Recorder(**kwargs)
+
+@pytest.fixture
+def durable(monkeypatch):
+    for field, value in {"MODE": "standalone", "HOST": "durable.redis", "PORT": "6380", "USERNAME": "", "PASSWORD": "secret",
+                         "SENTINELS": "", "SENTINEL_SERVICE": "durable-master"}.items():
+        monkeypatch.setattr(AppConfigs, f"REDIS_DURABLE_{field}", value)
+    monkeypatch.setattr(Redis.redis, "Redis", Recorder)
+    monkeypatch.setattr(Redis, "RedisCluster", Recorder)
+    monkeypatch.setattr(Redis, "Sentinel", Recorder)
+    return RedisClientConnector("durable", "REDIS_DURABLE")
+
+def test_connect_reads_the_settings_of_its_prefix(durable):
+    durable.connect()
+    assert durable.client.kwargs["host"] == "durable.redis"
+    assert durable.client.kwargs["port"] == 6380
+    assert durable.client.kwargs["password"] == "secret"
+    assert durable.client.kwargs["username"] is None
+    assert durable.cluster is False
+
+def test_connect_in_cluster_mode(durable, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "REDIS_DURABLE_MODE", "cluster")
+    durable.connect()
+    assert isinstance(durable.client, Recorder) and durable.client.kwargs["host"] == "durable.redis"
+    assert durable.cluster is True
+
+def test_connect_in_sentinel_mode_follows_the_master(durable, monkeypatch):
+    monkeypatch.setattr(AppConfigs, "REDIS_DURABLE_MODE", "sentinel")
+    monkeypatch.setattr(AppConfigs, "REDIS_DURABLE_SENTINELS", "sentinel-a:26379, sentinel-b:26379")
+    built = []
+    monkeypatch.setattr(Redis, "Sentinel", lambda *args, **kwargs: built.append(Recorder(*args, **kwargs)) or built[-1])
+
+    durable.connect()
+    assert built[0].args == ([("sentinel-a", 26379), ("sentinel-b", 26379)],)
+    assert built[0].service == "durable-master"
+    assert durable.client.kwargs["password"] == "secret"
+    assert durable.cluster is False
+
+def test_connect_raises_when_the_instance_is_unreachable(durable, monkeypatch):
+    class Unreachable(Recorder):
+        def ping(self):
+            raise redis.ConnectionError("connection refused")
+
+    monkeypatch.setattr(Redis.redis, "Redis", Unreachable)
+    with pytest.raises(redis.ConnectionError):
+        durable.connect()
+
+def test_activation_token_falls_back_to_the_legacy_key(client, monkeypatch):
+    id = uuid.uuid4()
+    RedisClient.client.set(legacy_activation_key(id), "legacy-token")
+    try:
+        assert legacy_activation_key(id) == f"acl.tp.iv-{id}"
+        assert asyncio.run(fetch_activation_token(id)) == "legacy-token"
+
+        # The current layout wins over the legacy one
+        RedisClient.client.set(activation_key(id), "current-token")
+        assert asyncio.run(fetch_activation_token(id)) == "current-token"
+
+        RedisClient.client.delete(activation_key(id))
+        monkeypatch.setattr(AppConfigs, "REDIS_LEGACY_KEY_FALLBACK", False)
+        assert asyncio.run(fetch_activation_token(id)) is None
+    finally:
+        RedisClient.client.delete(legacy_activation_key(id), activation_key(id))
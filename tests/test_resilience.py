@@ -0,0 +1,96 @@
+import smtplib
+from contextlib import contextmanager
+from email.message import EmailMessage
+import pytest
+from sqlalchemy import text
+from src.app.utils import Db
+from src.app.utils.Mailer import EmailClient, SmtpBreaker
+from src.app.utils.Resilience import CircuitBreaker, CircuitOpenError
+
+def open_breaker(reset_timeout: float) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    return breaker
+
+def test_check_open_refuses_while_open():
+    breaker = open_breaker(reset_timeout=60)
+    with pytest.raises(CircuitOpenError):
+        breaker.check_open()
+
+def test_check_open_does_not_take_the_half_open_probe():
+    breaker = open_breaker(reset_timeout=0)
+    # Sessions that never run a query must not hold the probe slot
+    breaker.check_open()
+    breaker.check_open()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.fixture
+def half_open_database():
+    breaker = Db.DatabaseBreaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+    yield breaker
+    breaker.record_success()
+
+def test_first_database_statement_is_the_probe(half_open_database):
+    sessions = [Db.session() for _ in range(3)]
+    first = next(sessions[0])
+    for session in sessions[1:]:
+        next(session)
+    # Opening sessions leaves the probe slot free
+    assert half_open_database.state == CircuitBreaker.HALF_OPEN
+    assert half_open_database.probe_started == 0.0
+
+    first.execute(text("SELECT 1"))
+    assert half_open_database.state == CircuitBreaker.CLOSED
+    for session in sessions:
+        session.close()
+
+def test_database_statements_wait_for_the_probe(half_open_database):
+    session = Db.session()
+    dbsession = next(session)
+    # Another request's statement holds the probe slot
+    assert half_open_database.allow()
+
+    with pytest.raises(CircuitOpenError):
+        dbsession.execute(text("SELECT 1"))
+
+    half_open_database.record_success()
+    dbsession.execute(text("SELECT 1"))
+    session.close()
+
+class Server:
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def send_message(self, msg, to_addrs):
+        raise self.error
+
+def client_raising(monkeypatch, error: Exception) -> EmailClient:
+    @contextmanager
+    def connection(self):
+        yield Server(error)
+
+    monkeypatch.setattr(EmailClient, "_connection", connection)
+    return EmailClient()
+
+def test_smtp_answer_does_not_trip_the_breaker(monkeypatch):
+    mailer = client_raising(monkeypatch, smtplib.SMTPNotSupportedError("SMTPUTF8 not supported"))
+    failures = SmtpBreaker.failures
+
+    assert mailer.dispatch_many([(["ada@example.com"], EmailMessage())], defer=False) == ["error"]
+    assert mailer._send(["ada@example.com"], EmailMessage())["status"] == "error"
+    assert SmtpBreaker.failures == failures == 0
+
+def test_dropped_smtp_session_trips_the_breaker(monkeypatch):
+    mailer = client_raising(monkeypatch, smtplib.SMTPServerDisconnected("Connection unexpectedly closed"))
+    try:
+        assert mailer.dispatch_many([(["ada@example.com"], EmailMessage())], defer=False) == ["unsent"]
+        assert SmtpBreaker.failures == 1
+    finally:
+        SmtpBreaker.record_success()
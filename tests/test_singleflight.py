@@ -0,0 +1,116 @@
+import json
+import time
+import uuid
+import asyncio
+import pytest
+from src.app.utils import Db
+from src.app.utils import Singleflight as SingleflightModule
+from src.app.utils.Redis import RedisClient
+from src.app.utils.Singleflight import ReadThroughCache, Singleflight
+
+def test_shared_loads_return_their_connections(client, prospectus):
+    checked_out = Db.engine.pool.checkedout()
+    for _ in range(3):
+        response = client.get(f"/api/v1/tenant-prospectus/{prospectus['id']}")
+        assert response.status_code == 200
+        assert response.json()["slug"] == prospectus["slug"]
+    assert Db.engine.pool.checkedout() == checked_out
+
+class Loader:
+    """Counts its calls; `during` runs inside the load, e.g. to act as another pod."""
+
+    def __init__(self, value="fresh", during=None):
+        self.calls = 0
+        self.value = value
+        self.during = during
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.during is not None:
+            self.during()
+        return self.value
+
+@pytest.fixture
+def cache(client):
+    cache = ReadThroughCache(f"test.{uuid.uuid4().hex[:8]}", ttl=60, lock_seconds=0.2)
+    yield cache
+    RedisClient.client.delete(cache._key("key"), cache._key("key", "lock"))
+
+def seed(cache: ReadThroughCache, value, expires_in: float, delta: float = 0.0):
+    entry = {"value": value, "delta": delta, "expiry": time.time() + expires_in}
+    RedisClient.client.set(cache._key("key"), json.dumps(entry))
+
+def test_singleflight_coalesces_identical_loads():
+    loader = Loader()
+
+    async def load():
+        flights = Singleflight("test")
+        return await asyncio.gather(*(flights.do("key", loader) for _ in range(5)))
+
+    assert asyncio.run(load()) == ["fresh"] * 5
+    assert loader.calls == 1
+
+def test_concurrent_misses_load_once_and_cache_the_value(cache):
+    loader = Loader()
+
+    async def read():
+        return await asyncio.gather(*(cache.get("key", loader) for _ in range(5)))
+
+    assert asyncio.run(read()) == ["fresh"] * 5
+    assert loader.calls == 1
+    assert json.loads(RedisClient.client.get(cache._key("key")))["value"] == "fresh"
+    # The lock is released after the load
+    assert RedisClient.client.exists(cache._key("key", "lock")) == 0
+
+def test_xfetch_refreshes_early_as_expiry_nears(cache, monkeypatch):
+    seed(cache, "stale", expires_in=5, delta=1.0)
+    loader = Loader()
+
+    # -delta * beta * log(1 - 0) = 0: far enough from expiry, the entry is served
+    monkeypatch.setattr(SingleflightModule.random, "random", lambda: 0.0)
+    assert asyncio.run(cache.get("key", loader)) == "stale"
+    assert loader.calls == 0
+
+    # -log(1 - 0.999) * 1.0 > 5s left: this read refreshes the entry
+    monkeypatch.setattr(SingleflightModule.random, "random", lambda: 0.999)
+    assert asyncio.run(cache.get("key", loader)) == "fresh"
+    assert loader.calls == 1
+    assert json.loads(RedisClient.client.get(cache._key("key")))["expiry"] > time.time() + 50
+
+def test_early_refresh_under_another_pods_lock_serves_the_current_value(cache, monkeypatch):
+    seed(cache, "current", expires_in=1, delta=1.0)
+    RedisClient.client.set(cache._key("key", "lock"), "another-pod")
+    monkeypatch.setattr(SingleflightModule.random, "random", lambda: 0.999)
+    loader = Loader()
+
+    assert asyncio.run(cache.get("key", loader)) == "current"
+    assert loader.calls == 0
+
+def test_cold_key_under_another_pods_lock_waits_for_its_value(cache):
+    RedisClient.client.set(cache._key("key", "lock"), "another-pod")
+    loader = Loader()
+
+    async def read():
+        waiting = asyncio.create_task(cache.get("key", loader))
+        await asyncio.sleep(0.05)
+        seed(cache, "theirs", expires_in=60)
+        return await waiting
+
+    assert asyncio.run(read()) == "theirs"
+    assert loader.calls == 0
+
+def test_cold_key_loads_itself_once_the_lock_wait_runs_out(cache):
+    RedisClient.client.set(cache._key("key", "lock"), "another-pod")
+    loader = Loader()
+
+    assert asyncio.run(cache.get("key", loader)) == "fresh"
+    assert loader.calls == 1
+    assert RedisClient.client.get(cache._key("key", "lock")) == "another-pod"
+
+def test_release_leaves_a_lock_taken_after_ours_expired(cache):
+    # Our lock expires during a slow load and another pod takes it
+    loader = Loader(during=lambda: RedisClient.client.set(cache._key("key", "lock"), "another-pod"))
+
+    assert asyncio.run(cache.get("key", loader)) == "fresh"
+    assert RedisClient.client.get(cache._key("key", "lock")) == "another-pod"
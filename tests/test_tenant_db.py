@@ -0,0 +1,65 @@
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from src.app.utils import TenantDb
+from src.app.utils.TenantDb import TenantEngine, TenantEngineCache, open_tenant_session
+
+@pytest.fixture
+def disposed(monkeypatch):
+    """Tenant engines get a pool of their own (as in "database" isolation); records which are disposed."""
+    names = []
+    monkeypatch.setattr(TenantEngineCache, "_create", lambda self, identifier: TenantEngine(create_engine("sqlite://", poolclass=QueuePool), owns_pool=True))
+    monkeypatch.setattr(TenantEngine, "dispose", lambda self: names.append(self))
+    return names
+
+def test_leased_engine_is_not_evicted_under_the_caller(disposed):
+    cache = TenantEngineCache(max_engines=1, idle_seconds=300)
+    with cache.lease("acme") as acme:
+        with cache.lease("globex") as globex:
+            # Over capacity, but both engines are held
+            assert disposed == []
+        # Released: it is the only one that can go
+        assert [entry.engine for entry in disposed] == [globex]
+    assert list(cache._engines) == ["tenant_acme"]
+    assert cache._engines["tenant_acme"].engine is acme
+
+def test_reap_skips_leased_engines(disposed):
+    cache = TenantEngineCache(max_engines=10, idle_seconds=0)
+    with cache.lease("acme"):
+        cache.reap()
+        assert disposed == []
+    cache.reap()
+    assert len(disposed) == 1
+
+def test_invalid_slug_is_refused(disposed):
+    with pytest.raises(ValueError):
+        with TenantEngineCache(max_engines=1, idle_seconds=300).lease("Not A Slug"):
+            pass
+
+def test_exhausted_budget_times_out_and_releases_the_lease(disposed, monkeypatch):
+    cache = TenantEngineCache(max_engines=1, idle_seconds=300)
+    monkeypatch.setattr(TenantDb, "TenantEngines", cache)
+    monkeypatch.setattr(TenantDb, "_connection_budget", threading.BoundedSemaphore(1))
+    TenantDb._connection_budget.acquire()
+
+    with pytest.raises(TimeoutError):
+        with open_tenant_session("acme", timeout=0.01):
+            pass
+    assert cache._engines["tenant_acme"].leases == 0
+
+def test_infrastructure_needs_the_infrastructure_stage(client, prospectus):
+    response = client.get(f"/api/v1/tenant-prospectus/{prospectus['id']}/infrastructure")
+    assert response.status_code == 409
+
+def test_infrastructure_reports_the_tenant_schema(client, prospectus):
+    id = prospectus["id"]
+    assert client.get(f"/api/v1/tenant-prospectus/{id}/identity-activation").status_code == 200
+    for _ in range(2):
+        assert client.put(f"/api/v1/tenant-prospectus/{id}/promote-status").status_code == 200
+
+    response = client.get(f"/api/v1/tenant-prospectus/{id}/infrastructure")
+    assert response.status_code == 200, response.text
+    # The stand-in database has no tenant schemas
+    assert response.json() == {"id": id, "slug": prospectus["slug"], "ready": False}
+    assert TenantDb.TenantEngines._engines[TenantDb.tenant_identifier(prospectus["slug"])].leases == 0
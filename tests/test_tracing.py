@@ -0,0 +1,51 @@
+from src.app.utils import Tracing
+from src.app.utils.Tracing import BatchSpanProcessor, Tracer
+
+TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+class Collector:
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+def test_untrusted_sampled_flag_does_not_force_sampling():
+    tracer = Tracer(sample_rate=0.0, processor=Collector())
+    with tracer.start_trace("GET /", traceparent=TRACEPARENT) as root:
+        assert root is None
+    assert tracer.processor.spans == []
+
+def test_trusted_sampled_flag_continues_the_trace():
+    tracer = Tracer(sample_rate=0.0, processor=Collector(), trust_parent_sampled=True)
+    with tracer.start_trace("GET /", traceparent=TRACEPARENT) as root:
+        assert root.trace_id == "0af7651916cd43dd8448eb211c80319c"
+        assert root.parent_id == "b7ad6b7169203331"
+    assert tracer.processor.spans == [root]
+
+def test_locally_sampled_trace_keeps_the_incoming_trace_id():
+    tracer = Tracer(sample_rate=1.0, processor=Collector())
+    with tracer.start_trace("GET /", traceparent=TRACEPARENT.replace("-01", "-00")) as root:
+        assert root.trace_id == "0af7651916cd43dd8448eb211c80319c"
+
+class NullExporter:
+    def export(self, spans):
+        pass
+
+    def shutdown(self):
+        pass
+
+def test_fork_restarts_only_the_active_processor(monkeypatch):
+    monkeypatch.setattr(Tracing, "_active_processor", None)
+    replaced, active = BatchSpanProcessor(NullExporter()), BatchSpanProcessor(NullExporter())
+    workers = replaced._worker, active._worker
+
+    Tracing._restart_after_fork()
+    assert replaced._worker is workers[0]
+    assert active._worker is not workers[1] and active._worker.is_alive()
+
+    active.shutdown()
+    replaced.shutdown()
+    assert Tracing._active_processor is None
+    Tracing._restart_after_fork()
+    assert not active._worker.is_alive()
@@ -0,0 +1,100 @@
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, insert, select
+from src.app.utils import Db
+from src.app.utils.WriteBehind import WriteBehindBuffer
+from src.app.model.ProspectusStageHistory import ProspectusStageHistory
+from src.app.repository.Prospectus_Repository import ProspectusRepository, _percentile
+
+@pytest.fixture
+def table():
+    metadata = MetaData()
+    table = Table(f"write_behind_{uuid.uuid4().hex[:8]}", metadata,
+                  Column("id", Integer, primary_key=True, autoincrement=True), Column("value", Integer))
+    metadata.create_all(Db.engine)
+    yield table
+    metadata.drop_all(Db.engine)
+
+def written(table: Table) -> list:
+    with Db.engine.connect() as connection:
+        return list(connection.execute(select(table.c.value).order_by(table.c.id)).scalars())
+
+def test_reaching_flush_rows_starts_a_single_flush(table):
+    buffer = WriteBehindBuffer(table, flush_rows=2, flush_interval=60, max_rows=10)
+
+    async def fill():
+        for value in range(5):
+            buffer.append({"value": value})
+        # Every append past the threshold joins the flush already in flight
+        flushing = buffer._flushing
+        assert flushing is not None and buffer._schedule() is flushing
+        await flushing
+
+    asyncio.run(fill())
+    assert written(table) == [0, 1, 2, 3, 4]
+    assert len(buffer) == 0
+
+def test_failed_flush_keeps_the_rows_in_order(table, monkeypatch):
+    buffer = WriteBehindBuffer(table, flush_rows=2, flush_interval=60, max_rows=10)
+    for value in range(3):
+        buffer.append({"value": value})
+
+    def unavailable():
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(Db.engine, "begin", unavailable)
+    assert buffer.flush() == 0
+    assert list(buffer._rows) == [{"value": 0}, {"value": 1}, {"value": 2}]
+
+    monkeypatch.undo()
+    assert buffer.flush() == 3
+    assert written(table) == [0, 1, 2]
+
+def test_rows_past_max_rows_are_dropped_oldest_first(table):
+    buffer = WriteBehindBuffer(table, flush_rows=10, flush_interval=60, max_rows=3)
+    for value in range(5):
+        buffer.append({"value": value})
+    assert list(buffer._rows) == [{"value": 2}, {"value": 3}, {"value": 4}]
+
+    # A batch put back into a buffer that filled up meanwhile keeps only its newest rows
+    batch = buffer._take()
+    buffer.append({"value": 5})
+    buffer.append({"value": 6})
+    buffer._restore(batch)
+    assert list(buffer._rows) == [{"value": 4}, {"value": 5}, {"value": 6}]
+
+def test_drain_waits_for_the_flush_in_flight(table):
+    buffer = WriteBehindBuffer(table, flush_rows=2, flush_interval=60, max_rows=10)
+
+    async def shutdown():
+        for value in range(3):
+            buffer.append({"value": value})
+        await buffer.drain()
+
+    asyncio.run(shutdown())
+    assert written(table) == [0, 1, 2]
+    assert len(buffer) == 0
+
+def test_percentile_interpolates_as_percentile_cont():
+    values = [float(value) for value in range(1, 11)]
+    # SELECT percentile_cont(0.5), percentile_cont(0.95) WITHIN GROUP (ORDER BY v) FROM generate_series(1, 10) v
+    assert _percentile(values, 0.5) == pytest.approx(5.5)
+    assert _percentile(values, 0.95) == pytest.approx(9.55)
+    assert _percentile([4.0], 0.95) == 4.0
+
+def test_stage_dwell_reports_p50_and_p95(client):
+    stage, entered = f"STAGE_{uuid.uuid4().hex[:8]}", datetime.utcnow()
+    with Db.engine.begin() as connection:
+        connection.execute(insert(ProspectusStageHistory.__table__), [{
+            "prospectus_id": uuid.uuid4(), "from_status": stage, "to_status": "NEXT",
+            "entered_at": entered, "transitioned_at": entered + timedelta(seconds=seconds),
+        } for seconds in range(10, 0, -1)])
+
+    dbsession = Db.SessionFactory()
+    try:
+        dwell = asyncio.run(ProspectusRepository(dbsession).get_stage_dwell())
+    finally:
+        dbsession.close()
+    assert [row for row in dwell if row[0] == stage] == [(stage, 10, pytest.approx(5.5), pytest.approx(9.55))]